@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+
+def user_cache_key(user_id) -> str:
+    return f"auth:user:{user_id}"
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, но get_user (на каждом запросе из сессии) берёт пользователя из кэша.
+    Сбрасывается при save/delete пользователя (смена пароля, is_active, is_superuser).
+    AUTH_CACHE_SECONDS = 0 — без кэша.
+    """
+
+    def get_user(self, user_id):
+        if not settings.AUTH_CACHE_SECONDS:
+            return super().get_user(user_id)
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_CACHE_SECONDS)
+        return user
+
+
+def invalidate(*keys):
+    """Удаляем сразу и ещё раз после коммита — чтобы параллельный запрос не закэшировал старое."""
+    keys = [k for k in keys if k]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _user_changed(sender, instance, **kwargs):
+    invalidate(user_cache_key(instance.pk))
+
+
+post_save.connect(_user_changed, sender=User, dispatch_uid="auth_cache_user_saved")
+post_delete.connect(_user_changed, sender=User, dispatch_uid="auth_cache_user_deleted")
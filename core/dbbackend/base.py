@@ -0,0 +1,15 @@
+import time
+
+from django.db.backends.postgresql import base
+
+from core.dbstats import record_connect
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend Django + замер времени установки соединения (core/dbstats.py)."""
+
+    def get_new_connection(self, conn_params):
+        start = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        record_connect(time.perf_counter() - start)
+        return connection
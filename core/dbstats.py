@@ -0,0 +1,50 @@
+import os
+import threading
+import time
+
+from django.core.signals import request_started
+
+_lock = threading.Lock()
+_stats = {
+    "requests": 0,
+    "connects": 0,
+    "connect_seconds_total": 0.0,
+    "connect_seconds_max": 0.0,
+    "started_at": time.time(),
+}
+
+
+def record_connect(seconds: float):
+    """Вызывается backend-ом (core.dbbackend) после открытия нового соединения."""
+    with _lock:
+        _stats["connects"] += 1
+        _stats["connect_seconds_total"] += seconds
+        _stats["connect_seconds_max"] = max(_stats["connect_seconds_max"], seconds)
+
+
+def _count_request(sender, **kwargs):
+    with _lock:
+        _stats["requests"] += 1
+
+
+request_started.connect(_count_request, dispatch_uid="dbstats_count_request")
+
+
+def snapshot() -> dict:
+    """
+    Счётчики текущего процесса (gunicorn worker).
+    reuse_rate = доля запросов, которым не понадобилось новое соединение.
+    """
+    with _lock:
+        s = dict(_stats)
+    requests = s["requests"]
+    connects = s["connects"]
+    return {
+        "pid": os.getpid(),
+        "uptime_s": int(time.time() - s["started_at"]),
+        "requests": requests,
+        "connects": connects,
+        "reuse_rate": round(max(0.0, 1 - connects / requests), 4) if requests else None,
+        "connect_ms_avg": round(s["connect_seconds_total"] / connects * 1000, 2) if connects else None,
+        "connect_ms_max": round(s["connect_seconds_max"] * 1000, 2),
+    }
@@ -0,0 +1,168 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_PARAM = "_profile"
+PROFILE_ID_RE = re.compile(r"^\d{13}-[0-9a-f]{8}$")
+SQL_MAX_CHARS = 2000
+
+
+class SqlTimeline:
+    """execute_wrapper: каждый SQL запроса с отметкой начала и длительностью (мс от начала запроса)."""
+
+    def __init__(self, alias: str, t0: float, entries: list):
+        self.alias = alias
+        self.t0 = t0
+        self.entries = entries
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            end = time.perf_counter()
+            self.entries.append({
+                "db": self.alias,
+                "at_ms": round((start - self.t0) * 1000, 2),
+                "ms": round((end - start) * 1000, 2),
+                "sql": sql[:SQL_MAX_CHARS],
+                "many": many,
+            })
+
+
+class ProfilingMiddleware:
+    """
+    Профиль отдельного запроса: cProfile + SQL timeline -> PROFILE_DIR (кольцо из PROFILE_RING_SIZE).
+    Включается:
+    - dispatcher-ом: заголовок X-Profile: 1 или ?_profile=1
+    - случайной выборкой: PROFILE_SAMPLE_RATE (0.0 — выключено)
+    Если ни то, ни другое — только проверка заголовка/параметра, без профилировщика.
+    Ставить после AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE
+
+    def _wanted(self, request) -> bool:
+        if request.META.get(PROFILE_HEADER) == "1" or request.GET.get(PROFILE_PARAM) == "1":
+            # флаг — только для dispatcher (superuser), как и страница профилей
+            return request.user.is_superuser
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if not self._wanted(request):
+            return self.get_response(request)
+
+        sql = []
+        profiler = cProfile.Profile()
+        t0 = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(SqlTimeline(conn.alias, t0, sql)))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - t0
+
+        profile_id = save_profile(profiler, {
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status": response.status_code,
+            "user": request.user.get_username() if request.user.is_authenticated else "",
+            "ms": round(duration * 1000, 2),
+            "sql_count": len(sql),
+            "sql_ms": round(sum(q["ms"] for q in sql), 2),
+            "sql": sql,
+        })
+        response["X-Profile-Id"] = profile_id
+        return response
+
+
+def _dir() -> str:
+    path = str(settings.PROFILE_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def save_profile(profiler: cProfile.Profile, meta: dict) -> str:
+    """
+    Сохраняет <id>.prof (pstats) и <id>.json (метаданные + SQL) атомарно (tmp + os.replace),
+    затем удаляет самые старые профили сверх PROFILE_RING_SIZE.
+    """
+    directory = _dir()
+    profile_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+    meta = {"id": profile_id, "created_at": time.time(), **meta}
+
+    prof_path = os.path.join(directory, profile_id + ".prof")
+    profiler.dump_stats(prof_path + ".tmp")
+    os.replace(prof_path + ".tmp", prof_path)
+
+    json_path = os.path.join(directory, profile_id + ".json")
+    with open(json_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(json_path + ".tmp", json_path)
+
+    _prune(directory)
+    return profile_id
+
+
+def _prune(directory: str):
+    ids = sorted(name[:-5] for name in os.listdir(directory) if name.endswith(".json"))
+    for old in ids[:max(0, len(ids) - settings.PROFILE_RING_SIZE)]:
+        for ext in (".json", ".prof"):
+            try:
+                os.remove(os.path.join(directory, old + ext))
+            except FileNotFoundError:
+                pass  # уже удалил другой worker
+
+
+def list_profiles() -> list:
+    """Метаданные профилей (без SQL), новые сверху."""
+    directory = _dir()
+    result = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        meta.pop("sql", None)
+        result.append(meta)
+    return result
+
+
+def profile_path(profile_id: str, ext: str):
+    """Путь к файлу профиля или None (неверный id / файла нет)."""
+    if not PROFILE_ID_RE.match(profile_id or ""):
+        return None
+    path = os.path.join(_dir(), profile_id + ext)
+    return path if os.path.exists(path) else None
+
+
+def load_profile(profile_id: str, sort: str = "cumulative", limit: int = 60):
+    """(метаданные с SQL, текст pstats) или None."""
+    json_path = profile_path(profile_id, ".json")
+    prof_path = profile_path(profile_id, ".prof")
+    if not json_path or not prof_path:
+        return None
+    with open(json_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    out = io.StringIO()
+    pstats.Stats(prof_path, stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+    return meta, out.getvalue()
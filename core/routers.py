@@ -0,0 +1,91 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+REPLICA = "replica"
+PIN_COOKIE = "db_pin"
+
+_use_replica = ContextVar("use_replica", default=False)
+_pinned = ContextVar("pinned_to_primary", default=False)
+_wrote = ContextVar("wrote_to_primary", default=False)
+
+
+class ReplicaRouter:
+    """
+    Чтение с реплики только там, где это явно разрешено (read_replica / use_replica).
+    Всё остальное, а также чтение внутри транзакций и сразу после записи
+    этого же пользователя — с primary (default).
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _use_replica.get() or _pinned.get():
+            return None
+        if connections["default"].in_atomic_block:
+            return None
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплика — копия default, связи между ними допустимы
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+@contextmanager
+def use_replica():
+    """Для отчётов/команд: запросы внутри блока читают с реплики."""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def read_replica(view):
+    """Декоратор для read-only view (рейтинги, списки, выгрузки)."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with use_replica():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaPinMiddleware:
+    """
+    "Прилипание" к primary: после записи (или любого POST) ставим cookie на
+    REPLICA_PIN_SECONDS, пока она жива — пользователь читает только с primary
+    и видит свои изменения даже при отставании реплики.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            pinned = float(request.COOKIES.get(PIN_COOKIE) or 0) > time.time()
+        except ValueError:
+            pinned = False
+
+        pin_token = _pinned.set(pinned)
+        wrote_token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _wrote.get() or request.method not in ("GET", "HEAD", "OPTIONS"):
+                seconds = settings.REPLICA_PIN_SECONDS
+                response.set_cookie(
+                    PIN_COOKIE, str(int(time.time()) + seconds),
+                    max_age=seconds, httponly=True, samesite="Lax",
+                )
+            return response
+        finally:
+            _wrote.reset(wrote_token)
+            _pinned.reset(pin_token)
@@ -1,4 +1,5 @@
 from pathlib import Path
+import json
 import os
 import dj_database_url
 
@@ -25,6 +26,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.profiling.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -46,12 +48,76 @@ TEMPLATES = [{
 
 WSGI_APPLICATION = "core.wsgi.application"
 
+# Соединения с БД:
+# - DB_CONN_MAX_AGE: сколько секунд держать соединение открытым между запросами (0 = закрывать)
+# - conn_health_checks: перед переиспользованием соединение проверяется (после рестарта БД не будет ошибки)
+# Пул psycopg (OPTIONS["pool"]) появился только в Django 5.1 — на 5.0 держим постоянные соединения.
+# Статистика переиспользования/времени подключения: /ops/db-stats/ (core/dbstats.py)
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", "60"))
+
 DATABASES = {
     "default": dj_database_url.config(
-        default=os.environ.get("DATABASE_URL")
+        default=os.environ.get("DATABASE_URL"),
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True,
     )
 }
 
+if DATABASES["default"].get("ENGINE") == "django.db.backends.postgresql":
+    # тот же backend + замер connect time
+    DATABASES["default"]["ENGINE"] = "core.dbbackend"
+
+# Реплика для тяжёлого чтения (рейтинги, списки, выгрузки), см. core/routers.py.
+# Для локальной проверки подойдут два sqlite: sqlite:///db.sqlite3 и sqlite:///replica.sqlite3
+REPLICA_DATABASE_URL = os.environ.get("REPLICA_DATABASE_URL")
+# сколько секунд после записи пользователь читает только с primary
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", "10"))
+
+if REPLICA_DATABASE_URL:
+    DATABASES["replica"] = dj_database_url.parse(
+        REPLICA_DATABASE_URL,
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True,
+    )
+    if DATABASES["replica"].get("ENGINE") == "django.db.backends.postgresql":
+        DATABASES["replica"]["ENGINE"] = "core.dbbackend"
+    # в тестах реплика = та же тестовая БД
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+    DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+    MIDDLEWARE.append("core.routers.ReplicaPinMiddleware")
+
+# Кэш: REDIS_URL -> Redis (pip install redis), общий для всех gunicorn worker-ов;
+# без него — LocMemCache в каждом процессе.
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}}
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# Быстрый путь авторизации: сессия из кэша с записью в БД (cached_db),
+# пользователь и id его фирмы — из кэша на AUTH_CACHE_SECONDS (core/auth.py, permissions.user_company).
+# AUTH_CACHE_SECONDS=0 — без кэша пользователей/фирм.
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+AUTHENTICATION_BACKENDS = ["core.auth.CachedModelBackend"]
+AUTH_CACHE_SECONDS = int(os.environ.get("AUTH_CACHE_SECONDS", "300"))
+
+# Idempotency-ключи действий (orders/idempotency.py): сколько часов хранить результат;
+# просроченные удаляет manage.py sweep_idempotency_keys
+IDEMPOTENCY_TTL_HOURS = int(os.environ.get("IDEMPOTENCY_TTL_HOURS", "24"))
+# через сколько секунд ключ в статусе "pending" считается брошенным (воркер упал) и запрос
+# выполняется заново. Должно быть заметно больше таймаута воркера (gunicorn --timeout, по умолчанию
+# 30 с) и прокси: пока запрос ещё может выполняться, повтор обязан получить 409, а не второй прогон.
+IDEMPOTENCY_PENDING_SECONDS = int(os.environ.get("IDEMPOTENCY_PENDING_SECONDS", "600"))
+
+# Месячные выписки (orders/statements.py, manage.py generate_statements):
+# TTF-шрифт с кириллицей для PDF и число процессов рендера (0 = по числу CPU)
+STATEMENT_FONT = os.environ.get("STATEMENT_FONT", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+STATEMENT_WORKERS = int(os.environ.get("STATEMENT_WORKERS", "0"))
+
+# Admin на больших таблицах (pagination.EstimatedCountPaginator): точный COUNT(*) — до этого числа строк,
+# дальше — оценка Postgres (без фильтра) или "не меньше N" (с фильтром/поиском). 0 — всегда точный COUNT.
+ADMIN_EXACT_COUNT_LIMIT = int(os.environ.get("ADMIN_EXACT_COUNT_LIMIT", "10000"))
+
 LANGUAGE_CODE = "ru"
 TIME_ZONE = "Europe/Vienna"
 USE_TZ = True
@@ -61,8 +127,42 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Отдача media через веб-сервер после проверки доступа в Django:
+# "" (FileResponse), "x-accel" (nginx X-Accel-Redirect) или "x-sendfile".
+MEDIA_OFFLOAD = os.environ.get("MEDIA_OFFLOAD", "")
+# internal location в nginx, который смотрит на MEDIA_ROOT
+MEDIA_OFFLOAD_PREFIX = os.environ.get("MEDIA_OFFLOAD_PREFIX", "/protected-media/")
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Auto-dispatch (orders/dispatch.py): лимит заказов фирмы в день и вес загрузки в стоимости
+DISPATCH_MAX_PER_DAY = int(os.environ.get("DISPATCH_MAX_PER_DAY", "6"))
+DISPATCH_LOAD_WEIGHT = float(os.environ.get("DISPATCH_LOAD_WEIGHT", "0.5"))
+
+# Рабочий день фирм — для поиска свободных окон (orders/schedule.py)
+WORKDAY_START = os.environ.get("WORKDAY_START", "07:00")
+WORKDAY_END = os.environ.get("WORKDAY_END", "19:00")
+
+# Dashboard: "Nicht möglich на проверку" — только заказы not_possible с датой монтажа
+# за последние N дней (более старые считаются разобранными / забытыми, их ищут в списке)
+NOT_POSSIBLE_REVIEW_DAYS = int(os.environ.get("NOT_POSSIBLE_REVIEW_DAYS", "14"))
+
+# Архив: закрытые заказы/назначения/проводки старше N дней (manage.py archive_old_rows)
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "365"))
+
+# Трекинг доставки (orders/tracking.py, manage.py sync_tracking):
+# TRACKING_CARRIERS = JSON {"dhl": {"url": "https://.../track/{tracking_number}", "rate": 5}, ...}
+# rate — запросов в секунду к перевозчику, TRACKING_CONCURRENCY — всего параллельных запросов
+TRACKING_CARRIERS = json.loads(os.environ.get("TRACKING_CARRIERS", "{}"))
+TRACKING_CONCURRENCY = int(os.environ.get("TRACKING_CONCURRENCY", "16"))
+
+# Профилирование запросов (core/profiling.py, страница /ops/profiles/):
+# dispatcher: заголовок X-Profile: 1 или ?_profile=1; плюс случайная доля запросов PROFILE_SAMPLE_RATE.
+# Хранятся последние PROFILE_RING_SIZE профилей в PROFILE_DIR.
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", str(BASE_DIR / "profiles"))
+PROFILE_RING_SIZE = int(os.environ.get("PROFILE_RING_SIZE", "200"))
+
 if os.environ.get("RENDER"):
     DEBUG = False
 
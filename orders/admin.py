@@ -1,14 +1,141 @@
 from django.contrib import admin
-from .models import Company, Transaction
+
+from .models import (
+    ArchivedRecord,
+    BonusEscalationRule,
+    Company,
+    Delivery,
+    InstallationOrder,
+    LedgerEntry,
+    OrderAssignment,
+    OrderDocument,
+    OrderStatusChange,
+    PenaltyRule,
+    Transaction,
+)
+from .pagination import EstimatedCountPaginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Списки больших таблиц:
+    - без точного COUNT(*) на каждую страницу (EstimatedCountPaginator, show_full_result_count=False)
+    - FK в list_display — через list_select_related, в формах — autocomplete вместо <select> на всю таблицу
+    - поиск только "=" по полям с индексом UPPER(...), date_hierarchy — по индексированной дате
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
 
 @admin.register(Company)
 class CompanyAdmin(admin.ModelAdmin):
-    list_display = ("name", "email", "balance_eur")
-    search_fields = ("name", "email")
-    filter_horizontal = ("users",)
+    list_display = ("name", "email", "rating", "balance_eur")
+    search_fields = ("^name", "=email")
+    ordering = ("name",)
+    autocomplete_fields = ("users",)
+
+
+@admin.register(InstallationOrder)
+class InstallationOrderAdmin(LargeTableAdmin):
+    list_display = ("order_number", "customer_name", "date", "time_from", "status", "current_company")
+    list_select_related = ("current_company",)
+    list_filter = ("status",)
+    search_fields = ("=order_number",)
+    date_hierarchy = "date"
+    ordering = ("-date", "-time_from", "-id")
+    autocomplete_fields = ("current_company", "created_by")
+
+
+@admin.register(OrderAssignment)
+class OrderAssignmentAdmin(LargeTableAdmin):
+    list_display = ("order", "company", "assigned_at", "unassigned_at", "actor_user")
+    list_select_related = ("order", "company", "actor_user")
+    search_fields = ("=order__order_number",)
+    ordering = ("-id",)
+    autocomplete_fields = ("order", "company", "actor_user")
+
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(LargeTableAdmin):
+    list_display = ("created_at", "company", "entry_type", "source", "amount_eur", "order", "comment")
+    list_select_related = ("company", "order")
+    list_filter = ("entry_type", "source")
+    search_fields = ("=order__order_number",)
+    date_hierarchy = "created_at"
+    ordering = ("-created_at", "-id")
+    autocomplete_fields = ("company", "order")
+
+
+@admin.register(Delivery)
+class DeliveryAdmin(LargeTableAdmin):
+    list_display = ("order", "status", "carrier", "tracking_number", "planned_date", "delivered_date")
+    list_select_related = ("order",)
+    list_filter = ("status",)
+    search_fields = ("=order__order_number",)
+    ordering = ("-id",)
+    autocomplete_fields = ("order",)
+
+
+@admin.register(OrderDocument)
+class OrderDocumentAdmin(LargeTableAdmin):
+    list_display = ("filename", "status", "source", "size_bytes", "order", "created_at")
+    list_select_related = ("order",)
+    list_filter = ("status", "source")
+    search_fields = ("=sha256", "=order__order_number")
+    ordering = ("-id",)
+    autocomplete_fields = ("order",)
+
+
+@admin.register(OrderStatusChange)
+class OrderStatusChangeAdmin(LargeTableAdmin):
+    """Аудит переходов статуса (transitions.py) — только чтение."""
+    list_display = ("created_at", "order", "from_status", "to_status", "company", "actor_user", "reason")
+    list_select_related = ("order", "company", "actor_user")
+    list_filter = ("to_status",)
+    search_fields = ("=order__order_number",)
+    ordering = ("-id",)
+    raw_id_fields = ("order", "company", "actor_user")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PenaltyRule)
+class PenaltyRuleAdmin(admin.ModelAdmin):
+    list_display = ("name", "hours_before_install_from", "hours_before_install_to", "penalty_eur", "is_active")
+
+
+@admin.register(BonusEscalationRule)
+class BonusEscalationRuleAdmin(admin.ModelAdmin):
+    list_display = ("name", "hours_before_install_from", "hours_before_install_to", "increment_eur", "is_active")
+
+
+@admin.register(ArchivedRecord)
+class ArchivedRecordAdmin(LargeTableAdmin):
+    """Архив только для чтения (см. archive.py)."""
+    list_display = ("kind", "source_id", "order_number", "company_id", "record_date", "archived_at")
+    list_filter = ("kind",)
+    ordering = ("-id",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(Transaction)
-class TransactionAdmin(admin.ModelAdmin):
-    list_display = ("date", "type", "source", "amount", "order_id", "comment")
-    list_filter = ("type", "date")
-    search_fields = ("source", "comment")
+class TransactionAdmin(LargeTableAdmin):
+    """Старый кошелёк — до переноса в LedgerEntry (manage.py merge_legacy_wallet)."""
+    list_display = ("date", "company", "type", "source", "amount", "order_id", "comment")
+    list_select_related = ("company",)
+    list_filter = ("type",)
+    # "=source" — iexact по индексу UPPER(source); без "%...%" по всей таблице
+    search_fields = ("=source",)
+    date_hierarchy = "date"
+    ordering = ("-date", "-id")
+    autocomplete_fields = ("company",)
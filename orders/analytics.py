@@ -0,0 +1,222 @@
+"""
+Рейтинг фирм по всей истории (OrderAssignment + LedgerEntry), а не только по текущим заказам.
+"Вся история" включает архив (ArchivedRecord, см. archive.py): назначения архивных заказов,
+архивные закрытые назначения и архивные штрафы — иначе после archive_old_rows рейтинг
+молча считался бы только по последним месяцам.
+
+Данные грузятся в колонки NumPy (горячие таблицы + архив), агрегаты считаются через bincount
+по ключу (фирма, неделя), результат пишется в CompanyRatingSnapshot.
+
+Что считаем на каждое назначение:
+- reject   — назначение закрыто и заказ больше не у этой фирмы (отказалась / переназначен),
+  неделя = unassigned_at
+- finished / failed (not_possible, storno) / fault (company_fault) — по заказу, только для
+  назначения фирмы, которая держит заказ (открытое назначение, или последнее с фирмой =
+  current_company: при not_possible / storno оно закрыто, но это не отказ), неделя = assigned_at
+Штрафы — сумма penalty-проводок по неделе created_at, в целых центах (int64): через float
+суммы в евро расходились бы с кошельком на копейки.
+Недели — по UTC, начиная с понедельника.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils.dateparse import parse_datetime
+
+from .models import OrderAssignment, LedgerEntry, Company, CompanyRatingSnapshot, ArchivedRecord
+
+WEEK = 7 * 86400
+# 1970-01-01 — четверг; сдвиг на 3 дня выравнивает недели по понедельникам
+MONDAY_SHIFT = 3 * 86400
+EPOCH_MONDAY = date(1969, 12, 29)
+
+
+def _week_index(ts: np.ndarray) -> np.ndarray:
+    return np.floor_divide(ts + MONDAY_SHIFT, WEEK).astype(np.int64)
+
+
+def _timestamps(values) -> np.ndarray:
+    return np.fromiter((v.timestamp() if v else np.nan for v in values), dtype=np.float64)
+
+
+def _dt(value):
+    """Дата из JSON архива (DjangoJSONEncoder пишет ISO-строку)."""
+    return parse_datetime(value) if value else None
+
+
+def _archived_assignments(known: set):
+    """
+    Назначения из архива в том же виде, что и горячие строки.
+    Статус/причина нужны только активному назначению — для архивных заказов берём их
+    из данных заказа, у отдельно архивированных (всегда закрытых) назначений они не нужны.
+    """
+    orders = ArchivedRecord.objects.filter(kind="order").values_list(
+        "data__assignments", "data__status", "data__reason_category", "data__current_company",
+    )
+    for assignments, status, reason, holder in orders.iterator(chunk_size=2000):
+        last = max((a["id"] for a in assignments or ()), default=None)
+        for a in assignments or ():
+            if a.get("company") in known:
+                unassigned_at = _dt(a.get("unassigned_at"))
+                yield (a["company"], _dt(a["assigned_at"]), unassigned_at, status, reason,
+                       unassigned_at is None or (a["id"] == last and a["company"] == holder))
+
+    closed = ArchivedRecord.objects.filter(kind="assignment").values_list(
+        "company_id", "data__assigned_at", "data__unassigned_at",
+    )
+    for company_id, assigned_at, unassigned_at in closed.iterator(chunk_size=2000):
+        if company_id in known:
+            yield company_id, _dt(assigned_at), _dt(unassigned_at), None, None, False
+
+
+def _archived_penalties(known: set):
+    rows = ArchivedRecord.objects.filter(kind="ledger", data__entry_type="penalty").values_list(
+        "company_id", "record_date", "data__amount_eur",
+    )
+    for company_id, created_at, amount in rows.iterator(chunk_size=2000):
+        if company_id in known:
+            yield company_id, created_at, Decimal(str(amount))
+
+
+def _cents(amount: Decimal) -> int:
+    return int(amount.scaleb(2).to_integral_value())
+
+
+def load_columns() -> dict:
+    """Вся история в колонках: назначения и штрафы из горячих таблиц и из архива, фирмы."""
+    known = set(Company.objects.values_list("id", flat=True))
+    later = OrderAssignment.objects.filter(order_id=OuterRef("order_id"), id__gt=OuterRef("id"))
+    rows = list(OrderAssignment.objects.annotate(
+        holder=Q(unassigned_at__isnull=True) | (Q(company_id=F("order__current_company_id")) & ~Exists(later)),
+    ).values_list(
+        "company_id", "assigned_at", "unassigned_at", "order__status", "order__reason_category", "holder",
+    ))
+    rows.extend(_archived_assignments(known))
+    penalties = list(LedgerEntry.objects.filter(entry_type="penalty").values_list(
+        "company_id", "created_at", "amount_eur",
+    ))
+    penalties.extend(_archived_penalties(known))
+    company_ids = np.fromiter(known, dtype=np.int64, count=len(known))
+
+    a_company, a_assigned, a_unassigned, a_status, a_reason, a_holder = zip(*rows) if rows else ((),) * 6
+    p_company, p_created, p_amount = zip(*penalties) if penalties else ((),) * 3
+
+    return {
+        "company_ids": np.sort(company_ids),
+        "a_company": np.asarray(a_company, dtype=np.int64),
+        "a_assigned": _timestamps(a_assigned),
+        "a_unassigned": _timestamps(a_unassigned),
+        "a_status": np.asarray(a_status, dtype=object),
+        "a_reason": np.asarray(a_reason, dtype=object),
+        "a_holder": np.asarray(a_holder, dtype=bool),
+        "p_company": np.asarray(p_company, dtype=np.int64),
+        "p_created": _timestamps(p_created),
+        # штраф хранится со знаком минус
+        "p_cents": -np.fromiter((_cents(x) for x in p_amount), dtype=np.int64, count=len(p_amount)),
+    }
+
+
+def compute(cols: dict) -> dict:
+    """
+    Векторный расчёт. Возвращает dict массивов:
+    totals[метрика] — shape (n_companies,), weekly[метрика] — shape (n_companies, n_weeks).
+    """
+    company_ids = cols["company_ids"]
+    n = len(company_ids)
+
+    active = cols["a_holder"]
+    rejected = ~active
+    status = cols["a_status"]
+    finished = active & (status == "finished")
+    failed = active & ((status == "not_possible") | (status == "storno"))
+    fault = active & (cols["a_reason"] == "company_fault")
+
+    a_idx = np.searchsorted(company_ids, cols["a_company"])
+    p_idx = np.searchsorted(company_ids, cols["p_company"])
+
+    week_assigned = _week_index(np.nan_to_num(cols["a_assigned"]))
+    week_unassigned = _week_index(np.nan_to_num(cols["a_unassigned"]))
+    week_penalty = _week_index(cols["p_created"])
+
+    all_weeks = np.concatenate([week_assigned, week_unassigned[rejected], week_penalty])
+    if len(all_weeks):
+        w0, w1 = int(all_weeks.min()), int(all_weeks.max())
+    else:
+        w0 = w1 = 0
+    n_weeks = w1 - w0 + 1
+
+    def per_week(idx, weeks, mask=None, weights=None):
+        if mask is not None:
+            idx, weeks = idx[mask], weeks[mask]
+            weights = weights[mask] if weights is not None else None
+        key = idx * n_weeks + (weeks - w0)
+        if weights is None:
+            return np.bincount(key, minlength=n * n_weeks).reshape(n, n_weeks)
+        # bincount с weights считает во float64 — целые центы складываем точно
+        out = np.zeros(n * n_weeks, dtype=np.int64)
+        np.add.at(out, key, weights)
+        return out.reshape(n, n_weeks)
+
+    weekly = {
+        "assignments": per_week(a_idx, week_assigned),
+        "rejects": per_week(a_idx, week_unassigned, rejected),
+        "finished": per_week(a_idx, week_assigned, finished),
+        "failed": per_week(a_idx, week_assigned, failed),
+        "faults": per_week(a_idx, week_assigned, fault),
+        "penalty_cents": per_week(p_idx, week_penalty, weights=cols["p_cents"]),
+    }
+    totals = {k: v.sum(axis=1) for k, v in weekly.items()}
+
+    for bucket in (weekly, totals):
+        total = bucket["assignments"].astype(np.float64)
+        safe = np.where(total > 0, total, 1.0)
+        bucket["fault_rate"] = np.where(total > 0, bucket["faults"] / safe, 0.0)
+        bucket["reject_rate"] = np.where(total > 0, bucket["rejects"] / safe, 0.0)
+        bucket["finish_rate"] = np.where(total > 0, bucket["finished"] / safe, 0.0)
+        fail_rate = np.where(total > 0, bucket["failed"] / safe, 0.0)
+        # та же шкала, что recalc_company, плюс отказы
+        rating = 5.0 - bucket["fault_rate"] * 3.0 - fail_rate * 2.0 - np.minimum(bucket["reject_rate"], 1.0)
+        bucket["rating"] = np.where(total > 0, np.clip(rating, 1.0, 5.0), 5.0)
+
+    return {"company_ids": company_ids, "week0": w0, "n_weeks": n_weeks, "weekly": weekly, "totals": totals}
+
+
+def _dec(x, places: str) -> Decimal:
+    return Decimal(str(float(x))).quantize(Decimal(places))
+
+
+def _snapshot(company_id, week_start, bucket, i, j=None):
+    get = (lambda k: bucket[k][i]) if j is None else (lambda k: bucket[k][i, j])
+    return CompanyRatingSnapshot(
+        company_id=int(company_id),
+        week_start=week_start,
+        assignments=int(get("assignments")),
+        finished=int(get("finished")),
+        rejects=int(get("rejects")),
+        faults=int(get("faults")),
+        failed=int(get("failed")),
+        penalty_total_eur=Decimal(int(get("penalty_cents"))).scaleb(-2),
+        fault_rate=_dec(get("fault_rate"), "0.0001"),
+        reject_rate=_dec(get("reject_rate"), "0.0001"),
+        finish_rate=_dec(get("finish_rate"), "0.0001"),
+        rating=_dec(get("rating"), "0.01"),
+    )
+
+
+@transaction.atomic
+def write_snapshots(result: dict) -> int:
+    """Полностью заменяет снимки рейтинга. Недели без активности не пишем."""
+    company_ids = result["company_ids"]
+    weekly, totals = result["weekly"], result["totals"]
+
+    objs = [_snapshot(cid, None, totals, i) for i, cid in enumerate(company_ids)]
+    active = (weekly["assignments"] + weekly["rejects"] + (weekly["penalty_cents"] != 0)) > 0
+    for i, j in zip(*np.nonzero(active)):
+        week_start = EPOCH_MONDAY + timedelta(weeks=result["week0"] + int(j))
+        objs.append(_snapshot(company_ids[i], week_start, weekly, i, j))
+
+    CompanyRatingSnapshot.objects.all().delete()
+    CompanyRatingSnapshot.objects.bulk_create(objs, batch_size=1000)
+    return len(objs)
@@ -0,0 +1,325 @@
+"""
+JSON API для мобильного приложения монтажников (/api/v1/...).
+
+- те же правила доступа, что в views.py: user_company / is_dispatcher
+- списки: keyset-курсор по (date, time_from, id), ?fields= для выбора полей, gzip
+- batch: несколько действий (take / status / reject / finish) одним POST-запросом,
+  каждое действие — отдельная транзакция сервиса, ошибка одного не откатывает остальные
+- bulk-status: один статус для многих заказов через transitions.bulk_transition —
+  все или ни одного (в отличие от batch)
+- без сессии — 401 JSON, а не redirect на страницу логина
+"""
+import base64
+import json
+from datetime import date, time as dtime
+from functools import wraps
+
+from django.contrib.auth import authenticate, login
+from django.db.models import Q
+from django.forms.models import model_to_dict
+from django.http import JsonResponse
+from django.middleware.csrf import get_token
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET, require_POST
+
+from .forms import OrderCompanyUpdateForm
+from .idempotency import idempotent
+from .models import InstallationOrder, Company
+from .permissions import is_dispatcher, user_company
+from .services import take_from_open_pool, company_reject_order, finish_order_and_pay
+from .transitions import COMPANY, DISPATCHER, TransitionError, bulk_transition, save_company_update
+
+# имя поля в API -> колонка для .values()
+FIELDS = {
+    "id": "id",
+    "order_number": "order_number",
+    "customer_name": "customer_name",
+    "address": "address",
+    "phone": "phone",
+    "date": "date",
+    "time_from": "time_from",
+    "time_to": "time_to",
+    "status": "status",
+    "company": "current_company_id",
+    "reason_category": "reason_category",
+    "reason_text": "reason_text",
+    "base_price_eur": "base_price_eur",
+    "bonus_pot_eur": "bonus_pot_eur",
+    "taken_from_pool": "taken_from_pool",
+    "updated_at": "updated_at",
+}
+DEFAULT_FIELDS = ("id", "order_number", "customer_name", "address", "date", "time_from", "time_to", "status")
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+MAX_BATCH = 100
+
+
+class ApiError(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _error(message: str, status: int = 400) -> JsonResponse:
+    return JsonResponse({"error": message}, status=status)
+
+
+def api_view(view):
+    """login_required для API: 401 JSON вместо redirect, ApiError -> JSON с кодом."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return _error("Требуется авторизация.", 401)
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as e:
+            return _error(str(e), e.status)
+    return wrapper
+
+
+def _company(request, company_id=None) -> Company:
+    """
+    Фирма, от имени которой идёт запрос.
+    Dispatcher может указать любую фирму (?company= / "company" в batch).
+    """
+    if company_id and is_dispatcher(request.user):
+        try:
+            company_id = int(company_id)
+        except (TypeError, ValueError):
+            raise ApiError("company должен быть числом.")
+        c = Company.objects.filter(id=company_id).first()
+        if not c:
+            raise ApiError("Фирма не найдена.", 404)
+        return c
+    c = user_company(request.user)
+    if not c:
+        raise ApiError("Вы не привязаны к фирме.", 403)
+    return c
+
+
+# ---------------- СПИСКИ ----------------
+
+def _parse_fields(request) -> list:
+    raw = request.GET.get("fields", "").strip()
+    if not raw:
+        return list(DEFAULT_FIELDS)
+    names = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in names if f not in FIELDS]
+    if unknown:
+        raise ApiError(f"Неизвестные поля: {', '.join(unknown)}.")
+    return names
+
+
+def encode_cursor(row) -> str:
+    raw = f"{row['date'].isoformat()}|{row['time_from'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        d, t, pk = raw.split("|")
+        return date.fromisoformat(d), dtime.fromisoformat(t), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError("Неверный cursor.")
+
+
+def _page(request, qs) -> JsonResponse:
+    """
+    Keyset-пагинация: порядок (date, time_from, id), следующая страница — строго после курсора.
+    Без OFFSET, поэтому стоимость страницы не растёт с номером.
+    """
+    names = _parse_fields(request)
+    try:
+        limit = min(max(int(request.GET.get("limit", PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ApiError("limit должен быть числом.")
+
+    if request.GET.get("cursor"):
+        d, t, pk = decode_cursor(request.GET["cursor"])
+        qs = qs.filter(Q(date__gt=d) | Q(date=d, time_from__gt=t) | Q(date=d, time_from=t, id__gt=pk))
+
+    columns = {FIELDS[n] for n in names} | {"id", "date", "time_from"}
+    rows = list(qs.order_by("date", "time_from", "id").values(*columns)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return JsonResponse({
+        "results": [{n: row[FIELDS[n]] for n in names} for row in rows],
+        "next_cursor": encode_cursor(rows[-1]) if has_more else None,
+    })
+
+
+@gzip_page
+@require_GET
+@api_view
+def my_orders(request):
+    """Заказы фирмы (как views.my_orders). ?status= — фильтр по статусу."""
+    c = _company(request, request.GET.get("company"))
+    qs = InstallationOrder.objects.filter(current_company=c)
+    if request.GET.get("status"):
+        qs = qs.filter(status=request.GET["status"])
+    return _page(request, qs)
+
+
+@gzip_page
+@require_GET
+@api_view
+def pool(request):
+    """Общий контейнер (как views.pool)."""
+    _company(request, request.GET.get("company"))
+    return _page(request, InstallationOrder.objects.filter(status="open_pool"))
+
+
+# ---------------- BATCH ----------------
+
+def _op_take(request, c, item):
+    take_from_open_pool(item["id"], c.id, actor_user=request.user)
+
+
+def _op_reject(request, c, item):
+    reason = (str(item.get("reason") or "")).strip()[:200] or "No reason"
+    company_reject_order(item["id"], c.id, reason=reason, actor_user=request.user)
+
+
+def _op_finish(request, c, item):
+    finish_order_and_pay(item["id"], c.id, actor_user=request.user)
+
+
+def _op_status(request, c, item):
+    """Как views.order_edit_company: только свои заказы, проверка через OrderCompanyUpdateForm."""
+    order = InstallationOrder.objects.filter(pk=item["id"]).first()
+    if not order:
+        raise ValueError("Заказ не найден.")
+    if order.current_company_id != c.id:
+        raise ValueError("Нет доступа.")
+
+    # частичное обновление: неуказанные поля берём из заказа
+    data = model_to_dict(order, fields=["status", "reason_category", "reason_text"])
+    data.update({k: item[k] for k in ("status", "reason_category", "reason_text") if k in item})
+    data = {k: ("" if v is None else v) for k, v in data.items()}
+
+    form = OrderCompanyUpdateForm(data, instance=order)
+    if not form.is_valid():
+        raise ValueError(" ".join(e for errors in form.errors.values() for e in errors))
+    save_company_update(form, c.id, actor_user=request.user)
+
+
+OPERATIONS = {
+    "take": _op_take,
+    "reject": _op_reject,
+    "finish": _op_finish,
+    "status": _op_status,
+}
+
+
+@require_POST
+@api_view
+@idempotent("api_batch")
+def batch(request):
+    """
+    POST {"actions": [{"op": "take", "id": 1}, {"op": "status", "id": 2, "status": "in_progress"}, ...]}
+    Заголовок Idempotency-Key: повтор того же запроса вернёт первый ответ (idempotency.py).
+    Ответ: {"results": [{"id": 1, "op": "take", "ok": true}, {"id": 2, "op": "status", "ok": false, "error": "..."}]}
+    """
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        raise ApiError("Тело запроса должно быть JSON.")
+    actions = payload.get("actions") if isinstance(payload, dict) else None
+    if not isinstance(actions, list) or not actions:
+        raise ApiError("Нужен непустой список actions.")
+    if len(actions) > MAX_BATCH:
+        raise ApiError(f"Не больше {MAX_BATCH} действий за запрос.")
+
+    c = _company(request, payload.get("company"))
+    results = []
+    for item in actions:
+        op = item.get("op") if isinstance(item, dict) else None
+        oid = item.get("id") if isinstance(item, dict) else None
+        result = {"id": oid, "op": op, "ok": False}
+        if not isinstance(op, str) or op not in OPERATIONS or not isinstance(oid, int):
+            result["error"] = "Нужны op (take/reject/finish/status) и числовой id."
+        else:
+            try:
+                OPERATIONS[op](request, c, item)
+                result["ok"] = True
+            except Exception as e:
+                result["error"] = str(e)
+        results.append(result)
+
+    return JsonResponse({"results": results})
+
+
+@require_POST
+@api_view
+@idempotent("api_bulk_status")
+def bulk_status(request):
+    """
+    POST {"ids": [1, 2], "status": "storno", "reason": "...", "reason_category": "neutral"}
+    Как views.bulk_status, но и для фирмы (только свои заказы). Все заказы или ни одного:
+    200 {"ids": [...]} или 409 {"error": "...", "errors": {"<id>": "..."}}.
+    """
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        raise ApiError("Тело запроса должно быть JSON.")
+    if not isinstance(payload, dict):
+        raise ApiError("Тело запроса должно быть JSON-объектом.")
+    ids = payload.get("ids")
+    if not isinstance(ids, list) or not ids or not all(isinstance(x, int) for x in ids):
+        raise ApiError("Нужен непустой список числовых ids.")
+    if len(ids) > MAX_BATCH:
+        raise ApiError(f"Не больше {MAX_BATCH} заказов за запрос.")
+    if not isinstance(payload.get("status"), str):
+        raise ApiError("Нужен status.")
+    for field in ("reason", "reason_category"):
+        if payload.get(field) is not None and not isinstance(payload[field], str):
+            raise ApiError(f"{field} должен быть строкой.")
+
+    if is_dispatcher(request.user):
+        actor, company_id = DISPATCHER, None
+    else:
+        actor, company_id = COMPANY, _company(request).id
+    try:
+        done = bulk_transition(
+            ids, payload["status"], actor, company_id=company_id, actor_user=request.user,
+            reason=(payload.get("reason") or "").strip()[:500],
+            reason_category=payload.get("reason_category") or None,
+        )
+    except TransitionError as e:
+        return JsonResponse({"error": str(e), "errors": {str(k): v for k, v in e.errors.items()}}, status=409)
+    return JsonResponse({"ids": done})
+
+
+# ---------------- AUTH ----------------
+
+@csrf_exempt
+@require_POST
+def api_login(request):
+    """
+    POST {"username": ..., "password": ...} -> сессия + csrf_token.
+    Дальше приложение шлёт cookie сессии и заголовок X-CSRFToken на POST.
+    """
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        return _error("Тело запроса должно быть JSON.")
+    user = authenticate(
+        request,
+        username=str(payload.get("username", "")).strip(),
+        # пароль как есть: пробелы в начале/конце — часть пароля
+        password=str(payload.get("password", "")),
+    )
+    if not user:
+        return _error("Неверный логин или пароль.", 401)
+    login(request, user)
+    c = user_company(user)
+    return JsonResponse({
+        "user": user.username,
+        "company": c.id if c else None,
+        "dispatcher": is_dispatcher(user),
+        "csrf_token": get_token(request),
+    })
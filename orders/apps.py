@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class OrdersConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "orders"
+
+    def ready(self):
+        # Подключаем сигналы (понадобится позже)
+        from . import signals  # noqa
+        # счётчики запросов/соединений БД (core/dbstats.py) — с первого запроса
+        from core import dbstats  # noqa
+        # сброс кэша пользователей (core/auth.py) в любом процессе, который их меняет
+        from core import auth  # noqa
@@ -0,0 +1,147 @@
+from django.core import serializers
+from django.db import transaction
+
+from .models import (
+    InstallationOrder,
+    OrderAssignment,
+    LedgerEntry,
+    Delivery,
+    ArchivedRecord,
+    BonusEscalation,
+    OrderStatusChange,
+)
+from .signals import defer_rating_recalc
+
+FINAL_STATUSES = ("finished", "storno", "not_possible")
+
+
+def _fields(obj) -> dict:
+    """Поля модели в виде dict (FK -> id, Decimal/даты сериализует JSONField)."""
+    data = serializers.serialize("python", [obj])[0]["fields"]
+    data["id"] = obj.pk
+    return data
+
+
+def _chunks(qs, batch: int):
+    """id записей пачками, чтобы не держать всё в памяти и в одной транзакции."""
+    ids = list(qs.values_list("id", flat=True).order_by("id")[:batch])
+    while ids:
+        yield ids
+        ids = list(qs.filter(id__gt=ids[-1]).values_list("id", flat=True).order_by("id")[:batch])
+
+
+def archive_ledger(cutoff, batch: int = 500, dry_run: bool = False) -> int:
+    """
+    Переносит проводки старше cutoff в архив.
+    Баланс фирмы (Company.balance_eur) хранится отдельно и не меняется.
+    """
+    qs = LedgerEntry.objects.filter(created_at__lt=cutoff)
+    if dry_run:
+        return qs.count()
+
+    total = 0
+    for ids in _chunks(qs, batch):
+        with transaction.atomic():
+            entries = list(LedgerEntry.objects.select_related("order").filter(id__in=ids))
+            ArchivedRecord.objects.bulk_create([
+                ArchivedRecord(
+                    kind="ledger",
+                    source_id=e.id,
+                    company_id=e.company_id,
+                    order_number=e.order.order_number if e.order else "",
+                    record_date=e.created_at,
+                    data=_fields(e),
+                )
+                for e in entries
+            ], ignore_conflicts=True)
+            LedgerEntry.objects.filter(id__in=ids).delete()
+        total += len(ids)
+    return total
+
+
+def archive_orders(cutoff, batch: int = 500, dry_run: bool = False) -> int:
+    """
+    Переносит закрытые заказы (finished/storno/not_possible), не менявшиеся с cutoff.
+    Назначения, доставка и удаляемый каскадом аудит (смены статуса, повышения бонуса)
+    кладутся внутрь записи заказа.
+    Рейтинг фирмы не меняется: recalc_company учитывает архивные заказы.
+    """
+    qs = InstallationOrder.objects.filter(status__in=FINAL_STATUSES, updated_at__lt=cutoff)
+    if dry_run:
+        return qs.count()
+
+    total = 0
+    for ids in _chunks(qs, batch):
+        with transaction.atomic(), defer_rating_recalc():
+            orders = list(InstallationOrder.objects.select_for_update().filter(id__in=ids))
+
+            assignments = {}
+            for a in OrderAssignment.objects.filter(order_id__in=ids).order_by("assigned_at"):
+                assignments.setdefault(a.order_id, []).append(_fields(a))
+            deliveries = {d.order_id: _fields(d) for d in Delivery.objects.filter(order_id__in=ids)}
+            status_changes = {}
+            for c in OrderStatusChange.objects.filter(order_id__in=ids).order_by("id"):
+                status_changes.setdefault(c.order_id, []).append(_fields(c))
+            escalations = {}
+            for e in BonusEscalation.objects.filter(order_id__in=ids).order_by("id"):
+                escalations.setdefault(e.order_id, []).append(_fields(e))
+
+            records = []
+            for o in orders:
+                data = _fields(o)
+                data["assignments"] = assignments.get(o.id, [])
+                data["delivery"] = deliveries.get(o.id)
+                data["status_changes"] = status_changes.get(o.id, [])
+                data["bonus_escalations"] = escalations.get(o.id, [])
+                records.append(ArchivedRecord(
+                    kind="order",
+                    source_id=o.id,
+                    company_id=o.current_company_id,
+                    order_number=o.order_number,
+                    record_date=o.created_at,
+                    data=data,
+                ))
+            ArchivedRecord.objects.bulk_create(records, ignore_conflicts=True)
+            InstallationOrder.objects.filter(id__in=ids).delete()
+        total += len(ids)
+    return total
+
+
+def archive_assignments(cutoff, batch: int = 500, dry_run: bool = False) -> int:
+    """Переносит закрытые назначения (unassigned_at < cutoff) у заказов, которые ещё в работе."""
+    # назначения завершённых заказов уходят вместе с заказом (archive_orders)
+    qs = (OrderAssignment.objects.filter(unassigned_at__isnull=False, unassigned_at__lt=cutoff)
+          .exclude(order__status__in=FINAL_STATUSES))
+    if dry_run:
+        return qs.count()
+
+    total = 0
+    for ids in _chunks(qs, batch):
+        with transaction.atomic():
+            rows = list(OrderAssignment.objects.select_related("order").filter(id__in=ids))
+            ArchivedRecord.objects.bulk_create([
+                ArchivedRecord(
+                    kind="assignment",
+                    source_id=a.id,
+                    company_id=a.company_id,
+                    order_number=a.order.order_number,
+                    record_date=a.assigned_at,
+                    data=_fields(a),
+                )
+                for a in rows
+            ], ignore_conflicts=True)
+            OrderAssignment.objects.filter(id__in=ids).delete()
+        total += len(ids)
+    return total
+
+
+def archive_all(cutoff, batch: int = 500, dry_run: bool = False) -> dict:
+    """
+    Порядок важен: сначала проводки (иначе удаление заказа обнулит в них order),
+    потом заказы (с их назначениями), потом оставшиеся закрытые назначения.
+    """
+    return {
+        "ledger": archive_ledger(cutoff, batch, dry_run),
+        "order": archive_orders(cutoff, batch, dry_run),
+        "assignment": archive_assignments(cutoff, batch, dry_run),
+    }
@@ -0,0 +1,134 @@
+"""
+Счётчики заказов по (дата, фирма, статус) — OrderStatusCounter.
+
+Каждый переход заказа даёт дельту: -1 старому ключу, +1 новому.
+Сигналы (signals.py) применяют её при save()/delete(), массовые операции
+через UPDATE (services.bulk_assign_orders и т.п.) вызывают apply_deltas сами.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .models import InstallationOrder, OrderStatusCounter
+
+OPEN_STATUSES = ("inbox", "open_pool", "assigned", "in_progress")
+
+
+def key_of(date, company_id, status):
+    return (date, company_id, status)
+
+
+def _lock_order(item):
+    (date, company_id, status), _ = item
+    return date, company_id or 0, status
+
+
+def apply_deltas(deltas):
+    """
+    deltas: {(date, company_id, status): +-n}. Вызывать внутри транзакции заказа.
+    Строки обновляем в одном порядке (дата, фирма, статус) — две транзакции с общими
+    ключами берут блокировки одинаково и не ловят deadlock.
+    """
+    for (date, company_id, status), delta in sorted(deltas.items(), key=_lock_order):
+        if not delta:
+            continue
+        qs = OrderStatusCounter.objects.filter(date=date, company_id=company_id, status=status)
+        if qs.update(count=F("count") + delta):
+            continue
+        try:
+            with transaction.atomic():
+                OrderStatusCounter.objects.create(date=date, company_id=company_id, status=status, count=delta)
+        except IntegrityError:
+            # строку только что создал параллельный запрос
+            qs.update(count=F("count") + delta)
+
+
+def transition_deltas(changes):
+    """changes: [(old_key | None, new_key | None)] -> сгруппированные дельты."""
+    deltas = Counter()
+    for old, new in changes:
+        if old == new:
+            continue
+        if old is not None:
+            deltas[old] -= 1
+        if new is not None:
+            deltas[new] += 1
+    return deltas
+
+
+@transaction.atomic
+def reconcile() -> int:
+    """
+    Сверка с InstallationOrder одним GROUP BY. Возвращает число исправленных строк.
+    """
+    actual = {
+        key_of(d, cid, st): n
+        for d, cid, st, n in InstallationOrder.objects
+        .values_list("date", "current_company_id", "status")
+        .annotate(n=Count("id"))
+        .order_by()
+    }
+    stored = {
+        key_of(c.date, c.company_id, c.status): c
+        for c in OrderStatusCounter.objects.select_for_update()
+    }
+
+    fixed = 0
+    to_create = []
+    for key, n in actual.items():
+        row = stored.pop(key, None)
+        if row is None:
+            to_create.append(OrderStatusCounter(date=key[0], company_id=key[1], status=key[2], count=n))
+            fixed += 1
+        elif row.count != n:
+            row.count = n
+            row.save(update_fields=["count"])
+            fixed += 1
+    OrderStatusCounter.objects.bulk_create(to_create)
+
+    # строки без заказов: ненулевые — расхождение, нулевые остаются после переходов
+    stale = [row.id for row in stored.values()]
+    fixed += sum(1 for row in stored.values() if row.count)
+    OrderStatusCounter.objects.filter(id__in=stale).delete()
+    return fixed
+
+
+def dashboard_counts(days_ahead: int = 14) -> dict:
+    """
+    Все цифры для dashboard — несколько GROUP BY по таблице счётчиков.
+    Стоимость не константная: by_status и by_company читают все строки с count > 0,
+    их число ~ дни истории x активные фирмы x статусы. Это на порядки меньше
+    InstallationOrder, но растёт со временем; остальные запросы ограничены по дате.
+    """
+    today = timezone.localdate()
+    qs = OrderStatusCounter.objects.filter(count__gt=0)
+
+    by_status = dict(qs.values_list("status").annotate(n=Sum("count")).order_by())
+    overdue = qs.filter(date__lt=today, status__in=OPEN_STATUSES).aggregate(n=Sum("count"))["n"] or 0
+    review_since = today - timezone.timedelta(days=settings.NOT_POSSIBLE_REVIEW_DAYS)
+    not_possible_review = (qs.filter(status="not_possible", date__gte=review_since)
+                           .aggregate(n=Sum("count"))["n"] or 0)
+
+    by_company = {}
+    for cid, name, status, n in (qs.filter(company__isnull=False)
+                                 .values_list("company_id", "company__name", "status")
+                                 .annotate(n=Sum("count")).order_by("company__name")):
+        by_company.setdefault((cid, name), {})[status] = n
+
+    by_day = {}
+    for d, status, n in (qs.filter(date__gte=today, date__lt=today + timezone.timedelta(days=days_ahead))
+                         .values_list("date", "status")
+                         .annotate(n=Sum("count")).order_by("date")):
+        by_day.setdefault(d, {})[status] = n
+
+    return {
+        "by_status": by_status,
+        "overdue": overdue,
+        "not_possible_review": not_possible_review,
+        "review_since": review_since,
+        "by_company": by_company,
+        "by_day": by_day,
+    }
@@ -0,0 +1,221 @@
+"""
+Auto-dispatch: пакетное распределение inbox-заказов по фирмам.
+
+Вход (3 запроса): inbox-заказы за период, фирмы с рейтингом, текущая занятость фирм
+(активные заказы за те же дни). Дальше всё считается в памяти:
+- greedy: заказы по времени, каждому — лучшая свободная фирма (куча по стоимости)
+- hungarian: эвристика — Hungarian (scipy.optimize.linear_sum_assignment) по "волнам" (заказам
+  дня с одним временем окончания), волна за волной; из этого плана и greedy берётся лучший.
+  Оптимален только каждый шаг внутри волны, глобального оптимума режим не гарантирует.
+
+Стоимость пары (заказ, фирма) = -rating + DISPATCH_LOAD_WEIGHT * загрузка фирмы в этот день.
+Фирма не берёт больше DISPATCH_MAX_PER_DAY заказов в день и не берёт пересекающиеся по времени.
+"""
+import bisect
+import heapq
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+from .models import InstallationOrder, Company
+from .schedule import DaySchedule, ACTIVE_STATUSES, minutes
+from .services import bulk_assign_orders
+
+try:
+    import numpy as np
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # hungarian-режим недоступен, greedy работает без зависимостей
+    np = None
+    linear_sum_assignment = None
+
+INFEASIBLE = 1e9
+# hungarian: штраф за час простоя фирмы перед заказом; пустой день считается как 8 часов простоя
+GAP_WEIGHT = 1.0
+EMPTY_DAY_GAP_HOURS = 8
+
+
+def load_inputs(date_from, date_to):
+    """
+    Загружает всё нужное для распределения тремя запросами.
+    orders:    [(order_id, date, start_min, end_min)]
+    companies: {company_id: rating}
+    busy:      {(company_id, date): DaySchedule}
+    """
+    orders = [
+        (oid, d, minutes(tf), minutes(tt))
+        for oid, d, tf, tt in InstallationOrder.objects
+        .filter(status="inbox", date__gte=date_from, date__lte=date_to)
+        .order_by("date", "time_from", "id")
+        .values_list("id", "date", "time_from", "time_to")
+    ]
+    companies = {cid: float(r) for cid, r in Company.objects.values_list("id", "rating")}
+
+    busy = defaultdict(DaySchedule)
+    for cid, d, tf, tt in (InstallationOrder.objects
+                           .filter(status__in=ACTIVE_STATUSES, current_company__isnull=False,
+                                   date__gte=date_from, date__lte=date_to)
+                           .values_list("current_company_id", "date", "time_from", "time_to")):
+        busy[(cid, d)].add(minutes(tf), minutes(tt))
+    return orders, companies, busy
+
+
+def solve_greedy(orders, companies, busy, max_per_day=None, load_weight=None):
+    """
+    Жадное распределение. Для каждого дня — куча фирм по стоимости;
+    берём лучшую, если она свободна в нужное окно (иначе следующую).
+    Возвращает {order_id: company_id}.
+    """
+    max_per_day = settings.DISPATCH_MAX_PER_DAY if max_per_day is None else max_per_day
+    load_weight = settings.DISPATCH_LOAD_WEIGHT if load_weight is None else load_weight
+
+    result = {}
+    by_day = defaultdict(list)
+    for o in orders:
+        by_day[o[1]].append(o)
+
+    for day, day_orders in by_day.items():
+        heap = []
+        for cid, rating in companies.items():
+            load = len(busy[(cid, day)]) if (cid, day) in busy else 0
+            if load < max_per_day:
+                heap.append((-rating + load_weight * load, cid))
+        heapq.heapify(heap)
+
+        for oid, _, start, end in sorted(day_orders, key=lambda o: (o[2], o[3])):
+            skipped = []
+            chosen = None
+            while heap:
+                cost, cid = heapq.heappop(heap)
+                slots = busy[(cid, day)]
+                if slots.is_free(start, end):
+                    chosen = cid
+                    break
+                skipped.append((cost, cid))
+
+            for item in skipped:
+                heapq.heappush(heap, item)
+            if chosen is None:
+                continue
+
+            slots = busy[(chosen, day)]
+            slots.add(start, end)
+            result[oid] = chosen
+            if len(slots) < max_per_day:
+                heapq.heappush(heap, (-companies[chosen] + load_weight * len(slots), chosen))
+
+    return result
+
+
+def _copy_busy(busy):
+    copied = defaultdict(DaySchedule)
+    copied.update({key: slots.copy() for key, slots in busy.items()})
+    return copied
+
+
+def _solve_waves(orders, companies, busy, max_per_day, load_weight):
+    """
+    Заказы дня с одним временем окончания попарно пересекаются, значит в такой "волне"
+    фирма берёт не больше одного заказа — это ровно задача о назначениях заказ × фирма.
+    Пара недопустима (INFEASIBLE), если фирма занята в это окно или выбрала дневной лимит.
+    Волны идут по времени окончания (так интервалы упаковываются плотнее всего), расписание
+    фирм обновляется после каждой — пересечений нет ни внутри волны, ни между волнами.
+    К стоимости добавляется простой фирмы перед заказом (GAP_WEIGHT за час): заказ встаёт
+    вплотную к уже занятому времени и не дробит окна, нужные следующим волнам.
+    """
+    company_ids = list(companies)
+    ratings = np.asarray([companies[cid] for cid in company_ids], dtype=np.float64)
+
+    waves = defaultdict(list)
+    for o in orders:
+        waves[(o[1], o[3])].append(o)
+
+    result = {}
+    for (day, _), wave in sorted(waves.items()):
+        loads = np.asarray([len(busy[(cid, day)]) if (cid, day) in busy else 0 for cid in company_ids])
+        cost = np.tile(-ratings + load_weight * loads, (len(wave), 1))
+        full = loads >= max_per_day
+        cost[:, full] = INFEASIBLE
+        for j, cid in enumerate(company_ids):
+            if full[j]:
+                continue
+            slots = busy.get((cid, day))
+            if not slots:
+                cost[:, j] += GAP_WEIGHT * EMPTY_DAY_GAP_HOURS
+                continue
+            for i, (_, _, start, end) in enumerate(wave):
+                if not slots.is_free(start, end):
+                    cost[i, j] = INFEASIBLE
+                    continue
+                k = bisect.bisect_left(slots.starts, start)
+                gap = start - slots.ends[k - 1] if k else EMPTY_DAY_GAP_HOURS * 60
+                cost[i, j] += GAP_WEIGHT * gap / 60
+
+        rows, cols = linear_sum_assignment(cost)
+        for i, j in zip(rows.tolist(), cols.tolist()):
+            if cost[i, j] >= INFEASIBLE:
+                continue
+            oid, _, start, end = wave[i]
+            busy[(company_ids[j], day)].add(start, end)
+            result[oid] = company_ids[j]
+    return result
+
+
+def solve_hungarian(orders, companies, busy, max_per_day=None, load_weight=None):
+    """
+    Эвристика: Hungarian по волнам (_solve_waves). Внутри волны — минимальная стоимость
+    при максимуме назначений, но волны решаются по очереди и не пересматриваются, так что
+    это не глобальный оптимум. Поэтому на копиях расписаний считаются оба плана (волны и greedy)
+    и берётся тот, где назначено больше заказов (при равенстве — больше суммарный рейтинг).
+    busy обновляется выбранным планом, как у solve_greedy.
+    """
+    if linear_sum_assignment is None:
+        raise RuntimeError("Для режима hungarian нужны numpy и scipy (pip install scipy).")
+
+    max_per_day = settings.DISPATCH_MAX_PER_DAY if max_per_day is None else max_per_day
+    load_weight = settings.DISPATCH_LOAD_WEIGHT if load_weight is None else load_weight
+
+    plans = []
+    for solver in (_solve_waves, solve_greedy):
+        plan_busy = _copy_busy(busy)
+        plan = solver(orders, companies, plan_busy, max_per_day, load_weight)
+        plans.append((len(plan), sum(companies[cid] for cid in plan.values()), plan, plan_busy))
+
+    _, _, result, result_busy = max(plans, key=lambda p: (p[0], p[1]))
+    busy.clear()
+    busy.update(result_busy)
+    return result
+
+
+SOLVERS = {
+    "greedy": solve_greedy,
+    "hungarian": solve_hungarian,
+}
+
+
+def auto_dispatch(date_from, date_to, mode: str = "greedy", actor_user=None, dry_run: bool = False) -> dict:
+    """
+    Распределяет все inbox-заказы за период и сохраняет через bulk_assign_orders.
+    Возвращает статистику прогона.
+    """
+    t0 = time.perf_counter()
+    orders, companies, busy = load_inputs(date_from, date_to)
+    t1 = time.perf_counter()
+    plan = SOLVERS[mode](orders, companies, busy)
+    t2 = time.perf_counter()
+
+    assigned = []
+    if not dry_run and plan:
+        assigned = bulk_assign_orders(sorted(plan.items()), actor_user=actor_user)
+    t3 = time.perf_counter()
+
+    return {
+        "orders": len(orders),
+        "companies": len(companies),
+        "planned": len(plan),
+        "assigned": len(assigned),
+        "unassigned": len(orders) - len(plan),
+        "load_s": round(t1 - t0, 3),
+        "solve_s": round(t2 - t1, 3),
+        "commit_s": round(t3 - t2, 3),
+    }
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import InstallationOrder, BonusEscalationRule, BonusEscalation
+from .services import _hours_to_install
+
+
+def _install_at_or_after(dt):
+    return Q(date__gt=dt.date()) | Q(date=dt.date(), time_from__gte=dt.time())
+
+
+def _install_before(dt):
+    return Q(date__lt=dt.date()) | Q(date=dt.date(), time_from__lt=dt.time())
+
+
+def _rule_window(rule: BonusEscalationRule, now):
+    """
+    Окно установки для правила: _hours_to_install(order) в [from, to]
+    <=> date + time_from в [now + from ч, now + (to + 1) ч).
+    Уже прошедшие установки не повышаем.
+    """
+    lo = timezone.localtime(now + timedelta(hours=rule.hours_before_install_from)).replace(tzinfo=None)
+    hi = timezone.localtime(now + timedelta(hours=rule.hours_before_install_to + 1)).replace(tzinfo=None)
+    return _install_at_or_after(lo) & _install_before(hi)
+
+
+def escalate_bonus_pots(now=None, dry_run: bool = False) -> dict:
+    """
+    Повышает bonus_pot_eur у заказов в open_pool по правилам BonusEscalationRule.
+    На каждое правило — один UPDATE по набору заказов и один bulk_create аудита.
+    Возвращает {rule.name: сколько заказов повышено}.
+    """
+    now = now or timezone.now()
+    result = {}
+
+    for rule in BonusEscalationRule.objects.filter(is_active=True):
+        with transaction.atomic():
+            rows = list(
+                InstallationOrder.objects.select_for_update()
+                .filter(status="open_pool")
+                .filter(_rule_window(rule, now))
+                .exclude(bonus_escalations__rule=rule)
+                .values_list("id", "date", "time_from")
+            )
+            # контроль той же функцией, что выбирает штраф (граничные случаи, DST)
+            hours = {}
+            for oid, d, tf in rows:
+                h = _hours_to_install(InstallationOrder(date=d, time_from=tf), now)
+                if rule.hours_before_install_from <= h <= rule.hours_before_install_to:
+                    hours[oid] = h
+
+            result[rule.name] = len(hours)
+            if dry_run or not hours:
+                continue
+
+            InstallationOrder.objects.filter(id__in=list(hours)).update(
+                bonus_pot_eur=F("bonus_pot_eur") + rule.increment_eur,
+                updated_at=now,
+            )
+            BonusEscalation.objects.bulk_create([
+                BonusEscalation(order_id=oid, rule=rule, amount_eur=rule.increment_eur, hours_to_install=h)
+                for oid, h in hours.items()
+            ])
+
+    return result
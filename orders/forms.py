@@ -1,5 +1,6 @@
 from django import forms
 from .models import InstallationOrder, Delivery, OrderDocument
+from .transitions import COMPANY, targets
 
 
 class OrderCreateForm(forms.ModelForm):
@@ -26,12 +27,22 @@ class OrderCompanyUpdateForm(forms.ModelForm):
     """
     Форма для фирмы: обновить статус, причину и фото.
     Важно: для not_possible и storno — причина и фото обязательны.
+    Статус — только текущий или разрешённый таблицей переходов (transitions.py);
+    сохранять через transitions.save_company_update.
     """
     class Meta:
         model = InstallationOrder
         fields = ["status", "reason_category", "reason_text", "photo"]
         widgets = {"reason_text": forms.Textarea(attrs={"rows": 3})}
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.current_status = self.instance.status
+        allowed = {self.current_status, *targets(self.current_status, COMPANY)}
+        self.fields["status"].choices = [
+            (code, label) for code, label in InstallationOrder.STATUS_CHOICES if code in allowed
+        ]
+
     def clean(self):
         cleaned = super().clean()
         status = cleaned.get("status")
@@ -0,0 +1,142 @@
+"""
+iCalendar-фид заказов фирмы (/calendar/<token>.ics) для календаря в телефоне.
+
+- ссылка подписана (django.core.signing), логин не нужен — календари не умеют сессии;
+  в подписи — id фирмы и её Company.calendar_nonce: "новая ссылка" меняет nonce и отзывает старые
+- состояние фида = (число заказов, max(updated_at)) одним агрегатом:
+  по нему ETag/Last-Modified (conditional GET -> 304) и ключ кэша всего фида
+- если фид изменился, VEVENT пересобираются только для заказов с новым updated_at,
+  остальные берутся из кэша по ключу (id, updated_at)
+"""
+import secrets
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import Company, InstallationOrder
+
+SIGN_SALT = "orders.ical"
+FEED_STATUSES = ("assigned", "in_progress", "finished")
+PAST_DAYS = 30
+CACHE_SECONDS = 7 * 24 * 3600
+
+
+def feed_token(company: Company) -> str:
+    if not company.calendar_nonce:
+        # первая ссылка фирмы; условный UPDATE — параллельный запрос не перезапишет уже выданный nonce
+        Company.objects.filter(id=company.id, calendar_nonce="").update(calendar_nonce=secrets.token_hex(16))
+        company.calendar_nonce = Company.objects.values_list("calendar_nonce", flat=True).get(id=company.id)
+    return signing.Signer(salt=SIGN_SALT).sign(f"{company.id}.{company.calendar_nonce}")
+
+
+def rotate_nonce(company: Company):
+    """Новый секрет ссылки — все выданные ранее ссылки перестают работать."""
+    company.calendar_nonce = secrets.token_hex(16)
+    company.save(update_fields=["calendar_nonce"])
+
+
+def company_id_from_token(token: str):
+    """id фирмы или None, если подпись не сходится или ссылка отозвана (nonce сменился)."""
+    try:
+        company_id, nonce = signing.Signer(salt=SIGN_SALT).unsign(token).split(".", 1)
+        company_id = int(company_id)
+    except (signing.BadSignature, ValueError):
+        return None
+    if not nonce or not Company.objects.filter(id=company_id, calendar_nonce=nonce).exists():
+        return None
+    return company_id
+
+
+def _feed_qs(company_id: int):
+    since = timezone.localdate() - timedelta(days=PAST_DAYS)
+    return InstallationOrder.objects.filter(
+        current_company_id=company_id, status__in=FEED_STATUSES, date__gte=since,
+    )
+
+
+def feed_state(company_id: int):
+    """(count, max_updated_at) — меняется при любом изменении, добавлении или уходе заказа."""
+    agg = _feed_qs(company_id).aggregate(n=Count("id"), last=Max("updated_at"))
+    return agg["n"], agg["last"]
+
+
+def _escape(value) -> str:
+    return (str(value or "").replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _fold(line: str) -> str:
+    """RFC 5545: строки длиннее 75 октетов переносятся (CRLF + пробел)."""
+    data = line.encode()
+    if len(data) <= 75:
+        return line
+    parts = []
+    while data:
+        size = 75 if not parts else 74
+        # не режем многобайтный символ UTF-8
+        while size < len(data) and (data[size] & 0xC0) == 0x80:
+            size -= 1
+        parts.append(data[:size].decode())
+        data = data[size:]
+    return "\r\n ".join(parts)
+
+
+def _utc(dt: datetime) -> str:
+    return dt.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _local(day, t) -> datetime:
+    return timezone.make_aware(datetime.combine(day, t), timezone.get_current_timezone())
+
+
+def render_event(o: dict) -> str:
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:order-{o['id']}@installsystem",
+        f"DTSTAMP:{_utc(o['updated_at'])}",
+        f"DTSTART:{_utc(_local(o['date'], o['time_from']))}",
+        f"DTEND:{_utc(_local(o['date'], o['time_to']))}",
+        f"SUMMARY:{_escape(o['order_number'] + ' · ' + o['customer_name'])}",
+        f"LOCATION:{_escape(o['address'])}",
+        f"DESCRIPTION:{_escape(o['phone'])}",
+        "END:VEVENT",
+    ]
+    return "\r\n".join(_fold(line) for line in lines)
+
+
+def _event_key(o: dict) -> str:
+    return f"ical:event:{o['id']}:{o['updated_at'].timestamp()}"
+
+
+def build_feed(company_id: int, state) -> str:
+    """Готовый .ics; весь фид кэшируется по состоянию, VEVENT — по (id, updated_at)."""
+    count, last = state
+    feed_key = f"ical:feed:{company_id}:{count}:{last.timestamp() if last else 0}"
+    feed = cache.get(feed_key)
+    if feed is not None:
+        return feed
+
+    rows = list(_feed_qs(company_id).order_by("date", "time_from", "id").values(
+        "id", "order_number", "customer_name", "address", "phone", "date", "time_from", "time_to", "updated_at",
+    ))
+    keys = [_event_key(o) for o in rows]
+    cached = cache.get_many(keys)
+    fresh = {k: render_event(o) for k, o in zip(keys, rows) if k not in cached}
+    if fresh:
+        cache.set_many(fresh, CACHE_SECONDS)
+    cached.update(fresh)
+
+    feed = "\r\n".join([
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//installsystem//orders//RU",
+        "CALSCALE:GREGORIAN",
+        "X-WR-CALNAME:Заказы",
+        *(cached[k] for k in keys),
+        "END:VCALENDAR",
+    ]) + "\r\n"
+    cache.set(feed_key, feed, CACHE_SECONDS)
+    return feed
@@ -0,0 +1,118 @@
+"""
+Idempotency-ключи для действий, меняющих состояние.
+
+Клиент передаёт ключ (поле/параметр idempotency_key или заголовок Idempotency-Key).
+Первый запрос "занимает" ключ (INSERT в своей короткой транзакции), выполняет view
+и сохраняет результат: код, redirect, flash-сообщения, JSON-тело.
+Повтор с тем же ключом (двойной тап, ретрай мобильной сети) получает сохранённый ответ
+и не трогает заказ/фирму — никаких повторных select_for_update и штрафов.
+Ключ привязан к пользователю и действию с его аргументами (scope:pk).
+Без ключа view работает как раньше.
+"""
+import uuid
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+FIELD = "idempotency_key"
+HEADER = "Idempotency-Key"
+
+
+def _pending_timeout() -> timedelta:
+    """Ключ в статусе pending старше этого считаем брошенным (процесс упал) — выполняем заново."""
+    return timedelta(seconds=settings.IDEMPOTENCY_PENDING_SECONDS)
+
+
+def new_key() -> str:
+    """Ключ для формы/ссылки — генерируется при каждом показе страницы."""
+    return uuid.uuid4().hex
+
+
+def _request_key(request) -> str:
+    key = request.POST.get(FIELD) or request.GET.get(FIELD) or request.headers.get(HEADER) or ""
+    return key.strip()[:100]
+
+
+def _claim(user, scope: str, key: str):
+    """(запись, True) если ключ наш, (запись, False) если уже был."""
+    now = timezone.now()
+    expires_at = now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(user=user, scope=scope, key=key, expires_at=expires_at), True
+        except IntegrityError:
+            existing = IdempotencyKey.objects.filter(user=user, scope=scope, key=key).first()
+            if existing is None:
+                continue  # удалили между INSERT и SELECT
+            abandoned = existing.status == "pending" and existing.created_at < now - _pending_timeout()
+            if existing.expires_at > now and not abandoned:
+                return existing, False
+            IdempotencyKey.objects.filter(id=existing.id).delete()
+    raise IntegrityError("Не удалось занять idempotency key.")
+
+
+def _replay(request, record: IdempotencyKey):
+    if record.status == "pending":
+        if request.content_type == "application/json":
+            return HttpResponse('{"error": "Запрос уже выполняется."}', status=409, content_type="application/json")
+        messages.info(request, "Запрос уже выполняется.")
+        return HttpResponseRedirect(request.META.get("HTTP_REFERER") or "/")
+    for level, text in record.messages:
+        messages.add_message(request, level, text)
+    if record.location:
+        return HttpResponseRedirect(record.location)
+    return HttpResponse(record.body, status=record.response_status or 200, content_type="application/json")
+
+
+def idempotent(scope: str):
+    """Декоратор view: повтор с тем же ключом возвращает первый результат."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = _request_key(request)
+            if not key or not request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+
+            full_scope = ":".join([scope, *(str(v) for v in args), *(str(v) for v in kwargs.values())])
+            record, created = _claim(request.user, full_scope, key)
+            if not created:
+                return _replay(request, record)
+
+            storage = getattr(request, "_messages", None)
+            queued = getattr(storage, "_queued_messages", [])
+            before = len(queued)
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                IdempotencyKey.objects.filter(id=record.id).delete()
+                raise
+
+            record.status = "done"
+            record.response_status = response.status_code
+            record.location = response.get("Location", "")[:500]
+            record.messages = [[m.level, str(m.message)] for m in queued[before:]]
+            if not record.location and not getattr(response, "streaming", False):
+                record.body = response.content.decode(response.charset or "utf-8", errors="replace")
+            record.save(update_fields=["status", "response_status", "location", "messages", "body"])
+            return response
+        return wrapper
+    return decorator
+
+
+def sweep_expired(batch: int = 1000) -> int:
+    """Удаляет просроченные ключи пачками (manage.py sweep_idempotency_keys)."""
+    total = 0
+    while True:
+        ids = list(IdempotencyKey.objects.filter(expires_at__lt=timezone.now())
+                   .values_list("id", flat=True)[:batch])
+        if not ids:
+            return total
+        total += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,170 @@
+"""
+Email Inbox: забираем PDF-вложения из локального Maildir или mbox в PDF Inbox.
+
+Ящик читается по одному письму (mailbox.get_file), в памяти только текущее письмо.
+Дубли отсеиваются по sha256 (OrderDocument.sha256) одним запросом на пачку; если тот же PDF
+параллельно сохранил другой процесс, unique sha256 отсекает его по одному документу (savepoint).
+Файлы пишутся до коммита: при откате пачки записанные ею blob-ы удаляются.
+Прогресс сохраняется вместе с документами пачки, так что после рестарта продолжаем
+с необработанных писем:
+- mbox: письма только дописываются в конец, ключ — порядковый номер, хватает last_key
+- Maildir: имя файла начинается с времени доставки, но сравнивать имена как строки нельзя
+  (время разной длины, письма с более ранним временем доставляются позже) — храним
+  множество обработанных ключей (MailboxMessage)
+"""
+import hashlib
+import mailbox
+import time
+from email import policy
+from email.parser import BytesParser
+
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+
+from .models import OrderDocument, MailboxCheckpoint, MailboxMessage
+from .storage import blob_name, pdf_storage
+
+_parser = BytesParser(policy=policy.default)
+# ключей в одном IN (...) при поиске уже обработанных писем
+KEYS_CHUNK = 500
+
+
+def _open(path: str, kind: str):
+    if kind == "maildir":
+        return mailbox.Maildir(path, factory=None, create=False)
+    return mailbox.mbox(path, factory=None, create=False)
+
+
+def _new_keys(box, kind: str, checkpoint) -> list:
+    """Ключи необработанных писем в порядке доставки."""
+    if kind == "mbox":
+        after = int(checkpoint.last_key) if checkpoint.last_key else -1
+        return sorted(k for k in box.iterkeys() if k > after)
+    present = list(box.iterkeys())
+    # только ключи, которые сейчас лежат в папке: таблица обработанных растёт без конца
+    seen = set()
+    for i in range(0, len(present), KEYS_CHUNK):
+        seen.update(checkpoint.messages.filter(key__in=present[i:i + KEYS_CHUNK]).values_list("key", flat=True))
+    # порядок только для предсказуемого прогресса, на отбор не влияет
+    return sorted((k for k in present if k not in seen), key=_delivery_order)
+
+
+def _delivery_order(key: str):
+    stamp, _, rest = key.partition(".")
+    return (int(stamp), rest) if stamp.isdigit() else (float("inf"), key)
+
+
+def pdf_attachments(msg):
+    """[(filename, bytes)] для всех PDF во вложениях письма."""
+    result = []
+    for part in msg.walk():
+        if part.is_multipart():
+            continue
+        filename = part.get_filename() or ""
+        if part.get_content_type() != "application/pdf" and not filename.lower().endswith(".pdf"):
+            continue
+        data = part.get_payload(decode=True)
+        if data:
+            result.append((filename or "attachment.pdf", data))
+    return result
+
+
+def _known_shas(shas) -> set:
+    return set(OrderDocument.objects.filter(sha256__in=list(shas)).values_list("sha256", flat=True))
+
+
+def _remove_orphans(shas):
+    """После отката: удаляем blob-ы, на которые так и не сослался ни один документ."""
+    for sha in shas:
+        if not OrderDocument.objects.filter(sha256=sha).exists():
+            pdf_storage.delete(blob_name(sha))
+
+
+def _save_batch(checkpoint, keys, pdfs) -> tuple:
+    """Сохраняет PDF пачки и отмечает её письма обработанными в одной транзакции."""
+    by_sha = {}
+    for filename, data in pdfs:
+        by_sha.setdefault(hashlib.sha256(data).hexdigest(), (filename, data))
+
+    created = 0
+    written = []  # blob-ы, которых до этой пачки на диске не было
+    try:
+        with transaction.atomic():
+            existing = _known_shas(by_sha)
+            for sha, (filename, data) in by_sha.items():
+                if sha in existing:
+                    continue
+                new_blob = not pdf_storage.exists(blob_name(sha))
+                try:
+                    with transaction.atomic():
+                        OrderDocument(
+                            source="email",
+                            file=ContentFile(data, name=filename),
+                            filename=filename[-255:],
+                            sha256=sha,
+                        ).save()
+                except IntegrityError:
+                    # тот же PDF только что закоммитил параллельный импорт — blob теперь его
+                    continue
+                if new_blob:
+                    written.append(sha)
+                created += 1
+
+            duplicates = len(pdfs) - created
+            if checkpoint.kind == "maildir":
+                MailboxMessage.objects.bulk_create(
+                    [MailboxMessage(checkpoint=checkpoint, key=k) for k in keys], ignore_conflicts=True,
+                )
+            checkpoint.last_key = str(keys[-1])
+            checkpoint.messages_total += len(keys)
+            checkpoint.pdfs_total += created
+            checkpoint.duplicates_total += duplicates
+            checkpoint.save()
+    except BaseException:
+        _remove_orphans(written)
+        raise
+    return created, duplicates
+
+
+def ingest_mailbox(path: str, kind: str = "maildir", batch: int = 50, limit: int = 0, log=None) -> dict:
+    """
+    Обрабатывает новые письма ящика (см. _new_keys).
+    Возвращает статистику: писем, новых PDF, дублей, писем/сек.
+    """
+    box = _open(path, kind)
+    checkpoint, _ = MailboxCheckpoint.objects.get_or_create(path=path, defaults={"kind": kind})
+
+    keys = _new_keys(box, kind, checkpoint)
+    if limit:
+        keys = keys[:limit]
+
+    started = time.perf_counter()
+    stats = {"messages": 0, "pdfs": 0, "duplicates": 0}
+    pending = []
+    batch_keys = []
+
+    for key in keys:
+        with box.get_file(key) as fp:
+            msg = _parser.parse(fp)
+        pending.extend(pdf_attachments(msg))
+        batch_keys.append(key)
+
+        if len(batch_keys) >= batch:
+            created, dups = _save_batch(checkpoint, batch_keys, pending)
+            stats["messages"] += len(batch_keys)
+            stats["pdfs"] += created
+            stats["duplicates"] += dups
+            pending, batch_keys = [], []
+            if log:
+                log(f"{stats['messages']} писем, {stats['pdfs']} PDF")
+
+    if batch_keys:
+        created, dups = _save_batch(checkpoint, batch_keys, pending)
+        stats["messages"] += len(batch_keys)
+        stats["pdfs"] += created
+        stats["duplicates"] += dups
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 3)
+    stats["messages_per_sec"] = round(stats["messages"] / elapsed, 1) if elapsed and stats["messages"] else 0.0
+    return stats
@@ -0,0 +1,127 @@
+import random
+import statistics
+import time
+from datetime import date, time as dtime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from orders.counters import reconcile
+from orders.models import Company, InstallationOrder, LedgerEntry
+
+SEED_PREFIX = "BENCH-"
+
+
+class Command(BaseCommand):
+    help = (
+        "Время и число SQL-запросов admin-списков заказов и кошелька. "
+        "--seed N сначала создаёт N заказов и N проводок (bulk_create пачками) для проверки на 1M строк."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True, help="Superuser для admin.")
+        parser.add_argument("--seed", type=int, default=0, help="Сколько строк досоздать (заказы и проводки).")
+        parser.add_argument("--companies", type=int, default=200)
+        parser.add_argument("--batch", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--target-ms", type=float, default=500, help="Цель по p95 на страницу.")
+
+    def _seed(self, n: int, companies: int, batch: int):
+        company_ids = list(Company.objects.values_list("id", flat=True)[:companies])
+        missing = companies - len(company_ids)
+        if missing > 0:
+            created = Company.objects.bulk_create(
+                [Company(name=f"{SEED_PREFIX}{i}") for i in range(len(company_ids), companies)]
+            )
+            company_ids += [c.id for c in created]
+
+        start = InstallationOrder.objects.filter(order_number__startswith=SEED_PREFIX).count()
+        today = date.today()
+        statuses = [s for s, _ in InstallationOrder.STATUS_CHOICES]
+        rnd = random.Random(start)
+
+        # bulk_create не шлёт сигналы: счётчики dashboard сверяем в конце через reconcile()
+        for offset in range(start, start + n, batch):
+            size = min(batch, start + n - offset)
+            with transaction.atomic():
+                orders = InstallationOrder.objects.bulk_create([
+                    InstallationOrder(
+                        order_number=f"{SEED_PREFIX}{offset + i}",
+                        customer_name=f"Kunde {offset + i}",
+                        date=today + timedelta(days=rnd.randint(-730, 60)),
+                        time_from=dtime(rnd.randint(7, 16)),
+                        time_to=dtime(18),
+                        status=rnd.choice(statuses),
+                        current_company_id=rnd.choice(company_ids),
+                    )
+                    for i in range(size)
+                ])
+                LedgerEntry.objects.bulk_create([
+                    LedgerEntry(
+                        company_id=o.current_company_id,
+                        order_id=o.id,
+                        entry_type="base_payment",
+                        amount_eur=Decimal(rnd.randint(50, 500)),
+                    )
+                    for o in orders
+                ])
+            self.stdout.write(f"  создано {offset + size - start}/{n}")
+
+        if connection.vendor == "postgresql":
+            # reltuples для EstimatedCountPaginator и статистика планировщика
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {InstallationOrder._meta.db_table}")
+                cursor.execute(f"ANALYZE {LedgerEntry._meta.db_table}")
+        reconcile()
+
+    def handle(self, *args, **opts):
+        user = User.objects.filter(username=opts["username"], is_superuser=True).first()
+        if not user:
+            raise CommandError("Superuser не найден.")
+
+        if opts["seed"]:
+            t0 = time.perf_counter()
+            self._seed(opts["seed"], opts["companies"], opts["batch"])
+            self.stdout.write(f"Seed: {time.perf_counter() - t0:.1f}s")
+
+        sample = InstallationOrder.objects.order_by("-id").values_list("order_number", "date").first()
+        number, day = sample or ("-", date.today())
+        cases = [
+            ("orders", "/admin/orders/installationorder/"),
+            ("orders page 100", "/admin/orders/installationorder/?p=100"),
+            ("orders status", "/admin/orders/installationorder/?status__exact=finished"),
+            ("orders search", f"/admin/orders/installationorder/?q={number}"),
+            ("orders month", f"/admin/orders/installationorder/?date__year={day.year}&date__month={day.month}"),
+            ("ledger", "/admin/orders/ledgerentry/"),
+            ("ledger month", f"/admin/orders/ledgerentry/?created_at__year={day.year}"),
+            ("company autocomplete", "/admin/autocomplete/?app_label=orders&model_name=installationorder"
+                                     "&field_name=current_company&term=a"),
+        ]
+
+        client = Client()
+        client.force_login(user)
+        self.stdout.write(f"{'':22} {'status':>6} {'sql':>5} {'p50 ms':>8} {'p95 ms':>8}")
+        slow = 0
+        for name, url in cases:
+            client.get(url)  # прогрев
+            timings = []
+            for _ in range(opts["repeat"]):
+                with CaptureQueriesContext(connection) as ctx:
+                    t0 = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            slow += p95 > opts["target_ms"]
+            self.stdout.write(
+                f"{name:22} {response.status_code:>6} {len(ctx.captured_queries):>5} "
+                f"{statistics.median(timings):>8.1f} {p95:>8.1f}" + ("  !" if p95 > opts["target_ms"] else "")
+            )
+
+        total = InstallationOrder.objects.count()
+        msg = f"Заказов: {total}. Страниц медленнее {opts['target_ms']:.0f} ms: {slow}/{len(cases)}"
+        self.stdout.write(self.style.SUCCESS(msg) if not slow else self.style.WARNING(msg))
@@ -0,0 +1,58 @@
+import gzip
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+
+class Command(BaseCommand):
+    help = "Сравнивает размер ответа и время HTML-страниц и JSON API (/api/v1/) для пользователя фирмы."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True, help="Пользователь, привязанный к фирме.")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--fields", default="id,status,date,time_from", help="Поля для sparse-запроса.")
+
+    def handle(self, *args, **opts):
+        user = User.objects.filter(username=opts["username"]).first()
+        if not user:
+            raise CommandError("Пользователь не найден.")
+
+        client = Client()
+        client.force_login(user)
+
+        # HTML-страницы отдают до 300 строк — берём API-страницу того же размера
+        cases = [
+            ("HTML my-orders", "/my-orders/"),
+            ("API my-orders", "/api/v1/my-orders/?limit=300"),
+            ("API my-orders sparse", f"/api/v1/my-orders/?limit=300&fields={opts['fields']}"),
+            ("HTML pool", "/pool/"),
+            ("API pool", "/api/v1/pool/?limit=300"),
+            ("API pool sparse", f"/api/v1/pool/?limit=300&fields={opts['fields']}"),
+        ]
+
+        self.stdout.write(f"{'':24} {'status':>6} {'bytes':>9} {'gzip':>8} {'p50 ms':>8} {'p95 ms':>8}")
+        for name, url in cases:
+            timings = []
+            response = None
+            for _ in range(opts["repeat"]):
+                t0 = time.perf_counter()
+                response = client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+                if getattr(response, "streaming", False):
+                    body = b"".join(response.streaming_content)
+                else:
+                    body = response.content
+                timings.append((time.perf_counter() - t0) * 1000)
+
+            if response.get("Content-Encoding") == "gzip":
+                gz_size, raw_size = len(body), len(gzip.decompress(body))
+            else:
+                raw_size, gz_size = len(body), len(gzip.compress(body))
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f"{name:24} {response.status_code:>6} {raw_size:>9} {gz_size:>8} "
+                f"{statistics.median(timings):>8.1f} {p95:>8.1f}"
+            )
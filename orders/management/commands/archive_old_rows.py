@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.archive import archive_all
+
+
+class Command(BaseCommand):
+    help = "Переносит старые закрытые заказы, назначения и проводки в архив (ArchivedRecord)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=settings.ARCHIVE_AFTER_DAYS,
+            help="Горизонт: архивировать записи старше N дней.",
+        )
+        parser.add_argument("--batch", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **opts):
+        cutoff = timezone.now() - timedelta(days=opts["days"])
+        result = archive_all(cutoff, batch=opts["batch"], dry_run=opts["dry_run"])
+        self.stdout.write(self.style.SUCCESS(
+            f"До {cutoff:%Y-%m-%d}: заказов {result['order']}, назначений {result['assignment']}, "
+            f"проводок {result['ledger']}" + (" (dry-run)" if opts["dry_run"] else "")
+        ))
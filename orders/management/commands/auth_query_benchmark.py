@@ -0,0 +1,54 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+PAGES = ("/pool/", "/my-orders/")
+# свой locmem-кэш на время замера: общий кэш (сессии, idempotency, счётчики) не трогаем
+BENCH_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                            "LOCATION": "auth-query-benchmark"}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Число SQL-запросов на /pool/ и /my-orders/: без кэша (db-сессии, ModelBackend) "
+        "и с быстрым путём авторизации (cached_db, CachedModelBackend, кэш id фирмы в user_company)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True, help="Пользователь, привязанный к фирме.")
+
+    def _measure(self, user) -> dict:
+        client = Client()
+        client.force_login(user)
+        result = {}
+        for url in PAGES:
+            client.get(url)  # прогрев кэша
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(url)
+            result[url] = (response.status_code, len(ctx.captured_queries))
+        return result
+
+    def handle(self, *args, **opts):
+        user = User.objects.filter(username=opts["username"]).first()
+        if not user:
+            raise CommandError("Пользователь не найден.")
+
+        with override_settings(
+            CACHES=BENCH_CACHES,
+            SESSION_ENGINE="django.contrib.sessions.backends.db",
+            AUTHENTICATION_BACKENDS=["django.contrib.auth.backends.ModelBackend"],
+            AUTH_CACHE_SECONDS=0,
+        ):
+            cache.clear()  # только свой locmem
+            before = self._measure(user)
+        with override_settings(CACHES=BENCH_CACHES):
+            cache.clear()
+            after = self._measure(user)
+
+        self.stdout.write(f"{'':14} {'без кэша':>10} {'с кэшем':>10}")
+        for url in PAGES:
+            self.stdout.write(f"{url:14} {before[url][1]:>10} {after[url][1]:>10}"
+                              + ("" if before[url][0] == after[url][0] == 200 else f"  (HTTP {after[url][0]})"))
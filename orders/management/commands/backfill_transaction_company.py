@@ -0,0 +1,73 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Привязывает старые Transaction без фирмы к Company: по order_id -> фирма заказа, "
+        "иначе по source == Company.name. Пачками, один UPDATE на фирму в пачке."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **opts):
+        try:
+            Transaction = apps.get_model("orders", "Transaction")
+        except LookupError:
+            raise CommandError("Модель Transaction не найдена.")
+        Company = apps.get_model("orders", "Company")
+        try:
+            Order = apps.get_model("orders", "InstallationOrder")
+        except LookupError:  # legacy-схема без заказов: только по source
+            Order = None
+
+        # имя фирмы -> id; одинаковые имена неоднозначны, по ним не привязываем
+        by_name = {}
+        for cid, name in Company.objects.values_list("id", "name"):
+            key = (name or "").strip().lower()
+            by_name[key] = None if key in by_name else cid
+
+        stats = {"by_order": 0, "by_source": 0, "unmatched": 0}
+        qs = Transaction.objects.filter(company__isnull=True)
+        last_id = 0
+        while True:
+            rows = list(qs.filter(id__gt=last_id).order_by("id").values_list("id", "order_id", "source")[:opts["batch"]])
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            order_company = {}
+            if Order is not None:
+                order_ids = {oid for _, oid, _ in rows if oid}
+                order_company = dict(
+                    Order.objects.filter(id__in=order_ids, current_company__isnull=False)
+                    .values_list("id", "current_company_id")
+                )
+
+            per_company = {}
+            for tid, oid, source in rows:
+                cid = order_company.get(oid)
+                if cid:
+                    stats["by_order"] += 1
+                else:
+                    cid = by_name.get((source or "").strip().lower())
+                    if not cid:
+                        stats["unmatched"] += 1
+                        continue
+                    stats["by_source"] += 1
+                per_company.setdefault(cid, []).append(tid)
+
+            if not opts["dry_run"]:
+                with transaction.atomic():
+                    for cid, ids in per_company.items():
+                        Transaction.objects.filter(id__in=ids, company__isnull=True).update(company_id=cid)
+
+            self.stdout.write(f"  до id={last_id}: привязано {sum(len(v) for v in per_company.values())}/{len(rows)}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"По заказу: {stats['by_order']}, по source: {stats['by_source']}, "
+            f"без фирмы осталось: {stats['unmatched']}" + (" (dry-run)" if opts["dry_run"] else "")
+        ))
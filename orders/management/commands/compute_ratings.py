@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.analytics import load_columns, compute, write_snapshots
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает рейтинг фирм по всей истории назначений и штрафов (CompanyRatingSnapshot)."
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        cols = load_columns()
+        t1 = time.perf_counter()
+        result = compute(cols)
+        t2 = time.perf_counter()
+        written = write_snapshots(result)
+        t3 = time.perf_counter()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Назначений {len(cols['a_company'])}, штрафов {len(cols['p_company'])}, "
+            f"фирм {len(result['company_ids'])}, недель {result['n_weeks']}: записано {written} снимков · "
+            f"load {t1 - t0:.2f}s, compute {t2 - t1:.3f}s, write {t3 - t2:.2f}s"
+        ))
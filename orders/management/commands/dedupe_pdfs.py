@@ -0,0 +1,63 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from orders.models import OrderDocument
+from orders.storage import pdf_storage, sha256_from_name, PDF_PREFIX
+
+
+class Command(BaseCommand):
+    help = "Переносит PDF из order_pdfs/<имя> в хранилище по sha256 (hardlink, без копирования)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument(
+            "--remove-orphans", action="store_true",
+            help="Удалить файлы в order_pdfs/ (старая раскладка), на которые нет ссылок в БД.",
+        )
+
+    def handle(self, *args, **opts):
+        dry = opts["dry_run"]
+        moved = 0
+        freed = 0
+
+        qs = OrderDocument.objects.exclude(sha256="").only("id", "file", "sha256").order_by("id")
+        for doc in qs.iterator(chunk_size=opts["batch"]):
+            if sha256_from_name(doc.file.name) == doc.sha256:
+                continue
+            old_path = os.path.join(settings.MEDIA_ROOT, doc.file.name)
+            if not os.path.isfile(old_path):
+                self.stderr.write(f"#{doc.id}: нет файла {doc.file.name}")
+                continue
+
+            new_exists = os.path.exists(pdf_storage.path_for_sha256(doc.sha256))
+            if not dry:
+                name = pdf_storage.link_existing(old_path, doc.sha256)
+                OrderDocument.objects.filter(id=doc.id).update(file=name)
+                size = os.path.getsize(old_path)
+                os.unlink(old_path)
+                if new_exists:
+                    freed += size
+            moved += 1
+
+        orphans = 0
+        if opts["remove_orphans"]:
+            legacy_dir = os.path.join(settings.MEDIA_ROOT, PDF_PREFIX)
+            referenced = set(OrderDocument.objects.values_list("file", flat=True))
+            for entry in os.scandir(legacy_dir) if os.path.isdir(legacy_dir) else []:
+                if not entry.is_file():
+                    continue
+                name = f"{PDF_PREFIX}/{entry.name}"
+                if name in referenced:
+                    continue
+                orphans += 1
+                if not dry:
+                    freed += entry.stat().st_size
+                    os.unlink(entry.path)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Перенесено: {moved}, удалено сирот: {orphans}, освобождено: {freed} bytes"
+            + (" (dry-run)" if dry else "")
+        ))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.escalation import escalate_bonus_pots
+
+
+class Command(BaseCommand):
+    help = "Повышает bonus_pot_eur у заказов, которые долго висят в общем контейнере."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument(
+            "--loop", type=int, default=0, metavar="SECONDS",
+            help="Запускать повторно каждые N секунд (встроенный планировщик).",
+        )
+
+    def handle(self, *args, **opts):
+        while True:
+            result = escalate_bonus_pots(dry_run=opts["dry_run"])
+            summary = ", ".join(f"{name}: {n}" for name, n in result.items()) or "нет активных правил"
+            self.stdout.write(self.style.SUCCESS(
+                f"Escalation: {summary}" + (" (dry-run)" if opts["dry_run"] else "")
+            ))
+            if not opts["loop"]:
+                break
+            time.sleep(opts["loop"])
@@ -0,0 +1,45 @@
+import os
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from orders.statements import REQUEST_MARKER, generate_statements, pending_months, statements_dir
+
+
+class Command(BaseCommand):
+    help = (
+        "Месячные выписки (CSV + PDF) по кошельку всех фирм -> MEDIA_ROOT/statements/YYYY-MM/. "
+        "--pending — месяцы, заказанные со страницы выписок (для cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="YYYY-MM (по умолчанию прошлый месяц)")
+        parser.add_argument("--workers", type=int, default=None, help="Процессов рендера (STATEMENT_WORKERS).")
+        parser.add_argument("--pending", action="store_true", help="Только месяцы из очереди страницы выписок.")
+
+    def handle(self, *args, **opts):
+        if opts["pending"]:
+            for month in pending_months():
+                self._generate(month, opts["workers"])
+                os.remove(os.path.join(statements_dir(month), REQUEST_MARKER))
+            return
+
+        if opts["month"]:
+            try:
+                year, month = (int(x) for x in opts["month"].split("-"))
+                first = date(year, month, 1)
+            except ValueError:
+                raise CommandError("Месяц в формате YYYY-MM.")
+        else:
+            today = timezone.localdate()
+            first = date(today.year - (today.month == 1), (today.month - 2) % 12 + 1, 1)
+
+        self._generate(first, opts["workers"])
+
+    def _generate(self, first, workers):
+        stats = generate_statements(first, workers=workers)
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['month']}: фирм {stats['companies']}, проводок {stats['entries']} -> {stats['dir']} · "
+            f"load {stats['load_s']}s, render {stats['render_s']}s, всего {stats['total_s']}s"
+        ))
@@ -0,0 +1,29 @@
+import mailbox
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.mail_ingest import ingest_mailbox
+
+
+class Command(BaseCommand):
+    help = "Забирает PDF-вложения из Maildir/mbox в PDF Inbox (source=email), с checkpoint-ом."
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument("--maildir", help="Путь к Maildir (cur/new/tmp)")
+        group.add_argument("--mbox", help="Путь к mbox-файлу")
+        parser.add_argument("--batch", type=int, default=50, help="Писем на одну транзакцию/checkpoint.")
+        parser.add_argument("--limit", type=int, default=0, help="Не больше N писем за запуск.")
+
+    def handle(self, *args, **opts):
+        kind, path = ("maildir", opts["maildir"]) if opts["maildir"] else ("mbox", opts["mbox"])
+        try:
+            stats = ingest_mailbox(path, kind, batch=opts["batch"], limit=opts["limit"], log=self.stdout.write)
+        except (FileNotFoundError, mailbox.Error) as e:
+            raise CommandError(f"Не удалось открыть {kind} {path}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{kind} {path}: писем {stats['messages']}, новых PDF {stats['pdfs']}, "
+            f"дублей {stats['duplicates']}, {stats['messages_per_sec']} писем/с"
+        ))
+
@@ -0,0 +1,117 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, F, Sum, When
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит старые Transaction (уже привязанные к фирме, см. backfill_transaction_company) "
+        "в LedgerEntry — единую ленту кошелька. Пачками: bulk_create + DELETE в одной транзакции, "
+        "повторный запуск продолжает с оставшихся строк. "
+        "Инвариант: Company.balance_eur = сумма LedgerEntry фирмы (на нём держатся выписки). "
+        "По умолчанию считается, что старые строки уже учтены в балансе (старый кошелёк показывал "
+        "balance_eur рядом с ними) — баланс не меняется; --adjust-balance — не учтены, баланс "
+        "увеличивается на перенесённые суммы в той же транзакции."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument("--adjust-balance", action="store_true",
+                            help="Старые строки не входят в balance_eur — добавить их суммы к балансу.")
+
+    def _mismatches(self, models, with_legacy: bool) -> list:
+        """
+        Фирмы со старыми строками, у которых balance_eur != сумма LedgerEntry
+        (+ сумма ещё не перенесённых Transaction, если они уже учтены в балансе).
+        """
+        Company, LedgerEntry, Transaction, company_ids = models
+        ledger = dict(LedgerEntry.objects.filter(company_id__in=company_ids)
+                      .values_list("company_id").annotate(s=Sum("amount_eur")).order_by())
+        legacy = dict(Transaction.objects.filter(company_id__in=company_ids)
+                      .values_list("company_id").annotate(s=Sum("amount")).order_by()) if with_legacy else {}
+        result = []
+        for cid, name, balance in Company.objects.filter(id__in=company_ids).values_list("id", "name", "balance_eur"):
+            expected = (ledger.get(cid) or 0) + (legacy.get(cid) or 0)
+            if balance != expected:
+                result.append(f"{name} (#{cid}): balance_eur {balance}, ожидается {expected}")
+        return result
+
+    def handle(self, *args, **opts):
+        try:
+            Transaction = apps.get_model("orders", "Transaction")
+        except LookupError:
+            raise CommandError("Модель Transaction не найдена — переносить нечего.")
+        LedgerEntry = apps.get_model("orders", "LedgerEntry")
+        Company = apps.get_model("orders", "Company")
+        Order = apps.get_model("orders", "InstallationOrder")
+        types = {code for code, _ in LedgerEntry.TYPE}
+        sources = {code for code, _ in LedgerEntry.SOURCE}
+        adjust = opts["adjust_balance"]
+
+        qs = Transaction.objects.filter(company__isnull=False)
+        company_ids = sorted(set(qs.values_list("company_id", flat=True)))
+        models = (Company, LedgerEntry, Transaction, company_ids)
+        # до переноса: старые строки учтены в балансе (или нет при --adjust-balance)
+        mismatches = self._mismatches(models, with_legacy=not adjust)
+        if opts["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(
+                f"К переносу: {qs.count()}, без фирмы: {Transaction.objects.filter(company__isnull=True).count()}, "
+                f"баланс не сходится: {len(mismatches)} (dry-run)"
+            ))
+            for line in mismatches:
+                self.stdout.write(f"  {line}")
+            return
+        if mismatches:
+            raise CommandError(
+                "Баланс не сходится с кошельком, перенос нарушит выписки:\n  " + "\n  ".join(mismatches)
+                + ("" if adjust else "\nЕсли старые строки не входят в balance_eur — запустите с --adjust-balance.")
+            )
+
+        moved = 0
+        while True:
+            rows = list(qs.order_by("id")[:opts["batch"]])
+            if not rows:
+                break
+            order_ids = set(Order.objects.filter(id__in={t.order_id for t in rows if t.order_id})
+                            .values_list("id", flat=True))
+
+            entries = []
+            for t in rows:
+                # тип/источник вне справочника LedgerEntry сохраняем в комментарии
+                known = t.type in types and (t.source or "direct") in sources
+                prefix = "" if known else f"[{t.type}/{t.source}] "
+                entries.append(LedgerEntry(
+                    company_id=t.company_id,
+                    order_id=t.order_id if t.order_id in order_ids else None,
+                    entry_type=t.type if t.type in types else "manual",
+                    source=t.source if t.source in sources else "direct",
+                    amount_eur=t.amount,
+                    comment=(prefix + (t.comment or "")).strip()[:500],
+                ))
+
+            with transaction.atomic():
+                created = LedgerEntry.objects.bulk_create(entries)
+                # created_at — auto_now_add, дату операции ставим одним UPDATE на пачку
+                LedgerEntry.objects.filter(id__in=[e.id for e in created]).update(created_at=Case(
+                    *(When(id=e.id, then=t.date) for e, t in zip(created, rows))
+                ))
+                Transaction.objects.filter(id__in=[t.id for t in rows]).delete()
+                if adjust:
+                    totals = {}
+                    for t in rows:
+                        totals[t.company_id] = totals.get(t.company_id, 0) + t.amount
+                    for cid in sorted(totals):
+                        Company.objects.filter(id=cid).update(balance_eur=F("balance_eur") + totals[cid])
+            moved += len(rows)
+            self.stdout.write(f"  перенесено {moved}")
+
+        mismatches = self._mismatches(models, with_legacy=False)
+        if mismatches:
+            raise CommandError("После переноса balance_eur != сумма LedgerEntry:\n  " + "\n  ".join(mismatches))
+
+        left = Transaction.objects.filter(company__isnull=True).count()
+        self.stdout.write(self.style.SUCCESS(
+            f"Перенесено в LedgerEntry: {moved}. Без фирмы осталось: {left} (backfill_transaction_company)."
+        ))
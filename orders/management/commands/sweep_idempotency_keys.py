@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from orders.idempotency import sweep_expired
+
+
+class Command(BaseCommand):
+    help = "Удаляет просроченные idempotency-ключи (IDEMPOTENCY_TTL_HOURS)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        deleted = sweep_expired(batch=opts["batch"])
+        self.stdout.write(self.style.SUCCESS(f"Удалено ключей: {deleted}"))
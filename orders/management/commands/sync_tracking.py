@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.tracking import sync_deliveries
+
+
+class Command(BaseCommand):
+    help = "Опрашивает перевозчиков по planned/sent доставкам и обновляет статус (orders/tracking.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=None, help="Параллельных запросов (TRACKING_CONCURRENCY).")
+        parser.add_argument("--batch", type=int, default=500)
+        parser.add_argument("--limit", type=int, default=None, help="Проверить не больше N доставок.")
+        parser.add_argument(
+            "--loop", type=int, default=0, metavar="SECONDS",
+            help="Запускать повторно каждые N секунд.",
+        )
+
+    def handle(self, *args, **opts):
+        log = self.stdout.write if opts["verbosity"] > 1 else None
+        while True:
+            stats = sync_deliveries(
+                concurrency=opts["concurrency"], batch=opts["batch"], limit=opts["limit"], log=log,
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"Трекинг: проверено {stats['checked']}, обновлено {stats['updated']}, "
+                f"нет адаптера {stats['no_adapter']}, номер не найден {stats['unknown']}, "
+                f"ошибок {stats['errors']}, статус назад {stats['backward']}, "
+                f"изменено вручную {stats['conflicts']} · {stats['seconds']}s, {stats['per_minute']} доставок/мин"
+            ))
+            if not opts["loop"]:
+                break
+            time.sleep(opts["loop"])
@@ -0,0 +1,59 @@
+import hashlib
+import json
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+# детерминированный статус по номеру: одинаковый ответ при повторных прогонах
+STUB_STATUSES = ("label_created", "in_transit", "out_for_delivery", "delivered", "delivered", "returned")
+
+
+class Command(BaseCommand):
+    help = (
+        "Локальный HTTP-перевозчик для проверки sync_tracking: GET /track/<номер> -> JSON. "
+        'Пример: TRACKING_CARRIERS=\'{"stub": {"url": "http://127.0.0.1:8765/track/{tracking_number}"}}\''
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency", type=int, default=50, help="Задержка ответа, мс.")
+
+    def handle(self, *args, **opts):
+        latency = opts["latency"] / 1000
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(latency)
+                prefix = "/track/"
+                number = self.path[len(prefix):] if self.path.startswith(prefix) else ""
+                if not number or number.startswith("unknown"):
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+
+                h = int(hashlib.sha256(number.encode()).hexdigest(), 16)
+                status = STUB_STATUSES[h % len(STUB_STATUSES)]
+                body = {"status": status}
+                if status == "delivered":
+                    body["delivered_date"] = (date.today() - timedelta(days=h % 3)).isoformat()
+                data = json.dumps(body).encode()
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", opts["port"]), Handler)
+        self.stdout.write(f"Stub-перевозчик: http://127.0.0.1:{opts['port']}/track/<номер>, задержка {opts['latency']} мс")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
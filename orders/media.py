@@ -0,0 +1,109 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, Http404
+from django.utils._os import safe_join
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header: str, size: int):
+    """
+    Разбирает заголовок Range (поддерживаем один диапазон).
+    Возвращает (start, end) включительно, None если заголовка нет/он не понятен,
+    или "unsatisfiable" если диапазон за пределами файла.
+    """
+    m = RANGE_RE.match((header or "").strip())
+    if not m:
+        return None
+    first, last = m.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # bytes=-500 -> последние 500 байт
+        length = int(last)
+        if length == 0:
+            return "unsatisfiable"
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return "unsatisfiable"
+    return start, min(end, size - 1)
+
+
+def _iter_range(f, start: int, length: int):
+    """Отдаёт кусок файла блоками, не читая его целиком в память."""
+    try:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+def media_response(request, name: str):
+    """
+    Ответ с файлом из MEDIA_ROOT (проверка доступа делается во view).
+    - MEDIA_OFFLOAD=x-accel    -> X-Accel-Redirect (nginx отдаёт файл сам)
+    - MEDIA_OFFLOAD=x-sendfile -> X-Sendfile (apache/lighttpd)
+    - иначе FileResponse с поддержкой Range
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, name)
+    except Exception:
+        raise Http404("Файл не найден.")
+    if not os.path.isfile(full_path):
+        raise Http404("Файл не найден.")
+
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+
+    offload = getattr(settings, "MEDIA_OFFLOAD", "")
+    # путь в заголовке — URL-кодированный: имена с пробелами/кириллицей/переводом строки
+    # иначе ломают заголовок (nginx раскодирует X-Accel-Redirect сам)
+    if offload == "x-accel":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = quote(settings.MEDIA_OFFLOAD_PREFIX.rstrip("/") + "/" + name.lstrip("/"))
+        response["Cache-Control"] = "private"
+        return response
+    if offload == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = quote(full_path)
+        response["Cache-Control"] = "private"
+        return response
+
+    size = os.path.getsize(full_path)
+    byte_range = parse_range(request.headers.get("Range", ""), size)
+
+    if byte_range == "unsatisfiable":
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            _iter_range(open(full_path, "rb"), start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Length"] = str(length)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    response["Accept-Ranges"] = "bytes"
+    response["Cache-Control"] = "private"
+    return response
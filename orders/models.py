@@ -1,24 +1,518 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.db.models.functions import Upper
+import hashlib
+
+from .storage import pdf_storage, order_pdf_upload_to, blob_name
 
 
 class Company(models.Model):
+    """
+    Компания (фирма), которая выполняет установки.
+    К ней привязываются пользователи (company users).
+    Также здесь хранится рейтинг и баланс (кошелёк).
+    """
     name = models.CharField(max_length=255)
     email = models.EmailField(blank=True, null=True)
+    users = models.ManyToManyField(User, blank=True, related_name="companies")
 
-    users = models.ManyToManyField(User, blank=True)
+    rating = models.DecimalField(max_digits=3, decimal_places=2, default=5.00)
+    orders_total = models.PositiveIntegerField(default=0)
+    orders_finished = models.PositiveIntegerField(default=0)
+    company_fault_count = models.PositiveIntegerField(default=0)
+    not_possible_count = models.PositiveIntegerField(default=0)
+    storno_count = models.PositiveIntegerField(default=0)
 
-    balance_eur = models.DecimalField(
-        max_digits=10,
-        decimal_places=2,
-        default=0
-    )
+    balance_eur = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    # секрет ссылки на календарь (ical.py): новая ссылка = новый nonce, старые перестают работать
+    calendar_nonce = models.CharField(max_length=32, blank=True, default="")
 
     def __str__(self):
         return self.name
 
 
+class InstallationOrder(models.Model):
+    """
+    Заказ на установку.
+    Основной объект, который назначается фирмам.
+    """
+    STATUS_CHOICES = [
+        ("inbox", "Inbox"),
+        ("open_pool", "Open Pool"),
+        ("assigned", "Zugewiesen"),
+        ("in_progress", "In Arbeit"),
+        ("finished", "Fertig"),
+        ("not_possible", "Nicht möglich"),
+        ("storno", "Storno"),
+    ]
+
+    REASON_CATEGORY = [
+        ("neutral", "Neutral"),
+        ("company_fault", "Company Fault"),
+    ]
+
+    order_number = models.CharField(max_length=100, unique=True)
+    customer_name = models.CharField(max_length=255)
+    address = models.TextField(blank=True, default="")
+    phone = models.CharField(max_length=50, blank=True, default="")
+
+    date = models.DateField()
+    time_from = models.TimeField()
+    time_to = models.TimeField()
+
+    current_company = models.ForeignKey(
+        Company, on_delete=models.SET_NULL, null=True, blank=True, related_name="current_orders"
+    )
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="inbox")
+
+    reason_category = models.CharField(max_length=20, choices=REASON_CATEGORY, blank=True, null=True)
+    reason_text = models.TextField(blank=True, null=True)
+    photo = models.ImageField(upload_to="order_photos/", blank=True, null=True)
+
+    base_price_eur = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    bonus_pot_eur = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    taken_from_pool = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="created_orders"
+    )
+
+    class Meta:
+        indexes = [
+            # расписание фирмы по дням (schedule.py): поиск пересечений и свободных окон
+            models.Index(fields=["current_company", "date", "time_from"], name="order_company_day_idx"),
+            # admin: date_hierarchy и сортировка по дате, поиск "=order_number" (iexact -> UPPER)
+            models.Index(fields=["date", "time_from"], name="order_date_idx"),
+            models.Index(Upper("order_number"), name="order_number_upper_idx"),
+        ]
+
+    def __str__(self):
+        return self.order_number
+
+
+class OrderAssignment(models.Model):
+    """
+    История назначений заказа фирмам.
+    Важно: активное назначение может быть только одно (constraint).
+    """
+    order = models.ForeignKey(InstallationOrder, on_delete=models.CASCADE, related_name="assignments")
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="assignments")
+
+    assigned_at = models.DateTimeField(auto_now_add=True)
+    unassigned_at = models.DateTimeField(blank=True, null=True)
+
+    actor_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    unassign_reason = models.CharField(max_length=255, blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["order"],
+                condition=Q(unassigned_at__isnull=True),
+                name="uniq_active_assignment_per_order",
+            )
+        ]
+
+    @property
+    def is_active(self):
+        return self.unassigned_at is None
+
+
+class PenaltyRule(models.Model):
+    """
+    Правило штрафов при отказе.
+    Выбирается по количеству часов до установки.
+    """
+    name = models.CharField(max_length=200)
+    hours_before_install_from = models.PositiveIntegerField()
+    hours_before_install_to = models.PositiveIntegerField()
+    penalty_eur = models.DecimalField(max_digits=10, decimal_places=2)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ["hours_before_install_from"]
+
+    def __str__(self):
+        return f"{self.name}: {self.penalty_eur}€"
+
+
+class BonusEscalationRule(models.Model):
+    """
+    Правило роста бонуса для заказов, которые висят в общем контейнере.
+    Выбирается по количеству часов до установки (как PenaltyRule);
+    каждое правило срабатывает для заказа один раз.
+    """
+    name = models.CharField(max_length=200)
+    hours_before_install_from = models.PositiveIntegerField()
+    hours_before_install_to = models.PositiveIntegerField()
+    increment_eur = models.DecimalField(max_digits=10, decimal_places=2)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ["hours_before_install_from"]
+
+    def __str__(self):
+        return f"{self.name}: +{self.increment_eur}€"
+
+
+class BonusEscalation(models.Model):
+    """
+    Журнал повышений bonus_pot_eur (аудит escalation-джоба).
+    """
+    order = models.ForeignKey(InstallationOrder, on_delete=models.CASCADE, related_name="bonus_escalations")
+    rule = models.ForeignKey(BonusEscalationRule, on_delete=models.CASCADE, related_name="escalations")
+    amount_eur = models.DecimalField(max_digits=10, decimal_places=2)
+    hours_to_install = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["order", "rule"], name="uniq_escalation_per_rule"),
+        ]
+
+
+class LedgerEntry(models.Model):
+    """
+    Кошелёк фирмы (журнал операций).
+    base_payment - оплата за заказ
+    bonus_credit - бонус из общего контейнера
+    penalty - штраф при отказе
+    """
+    TYPE = [
+        ("penalty", "Penalty"),
+        ("base_payment", "Base Payment"),
+        ("bonus_credit", "Bonus Credit"),
+        ("manual", "Manual"),
+    ]
+
+    SOURCE = [
+        ("direct", "Direct"),
+        ("open_pool", "Open Pool"),
+    ]
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="ledger")
+    order = models.ForeignKey(
+        InstallationOrder, on_delete=models.SET_NULL, null=True, blank=True, related_name="ledger"
+    )
+
+    entry_type = models.CharField(max_length=20, choices=TYPE)
+    source = models.CharField(max_length=20, choices=SOURCE, default="direct")
+    amount_eur = models.DecimalField(max_digits=10, decimal_places=2)
+
+    comment = models.CharField(max_length=500, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # кошелёк фирмы: лента по created_at с курсором (pagination.py)
+            models.Index(fields=["company", "created_at"], name="ledger_company_created_idx"),
+            # admin: date_hierarchy по всем фирмам
+            models.Index(fields=["created_at"], name="ledger_created_idx"),
+        ]
+
+
+class Delivery(models.Model):
+    """
+    Модуль доставки (1:1 с заказом).
+    """
+    DELIVERY_STATUS = [
+        ("none", "Нет"),
+        ("planned", "Запланировано"),
+        ("sent", "Отправлено"),
+        ("delivered", "Доставлено"),
+        ("failed", "Не удалось"),
+    ]
+
+    order = models.OneToOneField(InstallationOrder, on_delete=models.CASCADE, related_name="delivery")
+    status = models.CharField(max_length=20, choices=DELIVERY_STATUS, default="planned")
+
+    tracking_number = models.CharField(max_length=100, blank=True, null=True)
+    carrier = models.CharField(max_length=100, blank=True, null=True)
+
+    planned_date = models.DateField(blank=True, null=True)
+    delivered_date = models.DateField(blank=True, null=True)
+
+    notes = models.TextField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Delivery for {self.order.order_number}"
+
+
+class OrderDocument(models.Model):
+    """
+    PDF-документ, содержащий заказ.
+    Сейчас НЕ парсим, только сохраняем и показываем фирмам.
+    Позже парсер будет читать этот PDF и заполнять поля автоматически.
+    Файлы лежат по sha256 (order_pdfs/ab/cd/<sha256>.pdf), см. storage.py.
+    """
+    SOURCE = [
+        ("manual", "Manual Upload"),
+        ("email", "Email Attachment"),
+        ("ikea", "IKEA"),
+        ("other", "Other"),
+    ]
+
+    status = models.CharField(
+        max_length=20,
+        choices=[("new", "New"), ("linked", "Linked")],
+        default="new",
+        db_index=True,
+    )
+    source = models.CharField(max_length=20, choices=SOURCE, default="manual")
+
+    file = models.FileField(upload_to=order_pdf_upload_to, storage=pdf_storage, max_length=255)
+    filename = models.CharField(max_length=255, blank=True, default="")
+    size_bytes = models.PositiveIntegerField(default=0)
+
+    sha256 = models.CharField(max_length=64, unique=True, db_index=True)
+
+    order = models.OneToOneField(
+        InstallationOrder,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="source_pdf",
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def compute_sha256(self):
+        h = hashlib.sha256()
+        for chunk in self.file.chunks():
+            h.update(chunk)
+        return h.hexdigest()
+
+    @property
+    def blob_name(self):
+        return blob_name(self.sha256)
+
+    def save(self, *args, **kwargs):
+        if self.file:
+            try:
+                self.size_bytes = self.file.size
+            except Exception:
+                pass
+            if not self.filename:
+                self.filename = (getattr(self.file, "name", "") or "")[-255:]
+            if not self.sha256:
+                self.sha256 = self.compute_sha256()
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.filename or 'PDF'} ({self.status})"
+
+
+class OrderStatusCounter(models.Model):
+    """
+    Счётчики заказов по (дата установки, фирма, статус) для dashboard.
+    Обновляются в той же транзакции, что и заказ (counters.py + signals),
+    manage.py reconcile_counters сверяет их с InstallationOrder.
+    """
+    date = models.DateField()
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    status = models.CharField(max_length=20, choices=InstallationOrder.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "company", "status"],
+                condition=Q(company__isnull=False),
+                name="uniq_status_counter",
+            ),
+            models.UniqueConstraint(
+                fields=["date", "status"],
+                condition=Q(company__isnull=True),
+                name="uniq_status_counter_no_company",
+            ),
+        ]
+
+
+class CompanyRatingSnapshot(models.Model):
+    """
+    Рейтинг фирмы по всей истории назначений и проводок (analytics.py).
+    week_start = None — итог за всю историю, иначе — неделя (понедельник).
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="rating_snapshots")
+    week_start = models.DateField(blank=True, null=True)
+
+    assignments = models.PositiveIntegerField(default=0)
+    finished = models.PositiveIntegerField(default=0)
+    rejects = models.PositiveIntegerField(default=0)
+    faults = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)  # not_possible + storno
+    penalty_total_eur = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    fault_rate = models.DecimalField(max_digits=5, decimal_places=4, default=0)
+    reject_rate = models.DecimalField(max_digits=5, decimal_places=4, default=0)
+    finish_rate = models.DecimalField(max_digits=5, decimal_places=4, default=0)
+    rating = models.DecimalField(max_digits=3, decimal_places=2, default=5.00)
+
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company", "week_start"],
+                condition=Q(week_start__isnull=False),
+                name="uniq_rating_snapshot_week",
+            ),
+            models.UniqueConstraint(
+                fields=["company"],
+                condition=Q(week_start__isnull=True),
+                name="uniq_rating_snapshot_total",
+            ),
+        ]
+
+
+class MailboxCheckpoint(models.Model):
+    """
+    Прогресс email-ingestion (mail_ingest.py) по каждому ящику.
+    mbox: после рестарта продолжаем с last_key (порядковый номер письма).
+    Maildir: имена писем не упорядочены — обработанные ключи хранятся в MailboxMessage,
+    last_key только для отображения.
+    """
+    KIND = [
+        ("maildir", "Maildir"),
+        ("mbox", "mbox"),
+    ]
+
+    path = models.CharField(max_length=500, unique=True)
+    kind = models.CharField(max_length=20, choices=KIND)
+    last_key = models.CharField(max_length=255, blank=True, default="")
+
+    messages_total = models.PositiveIntegerField(default=0)
+    pdfs_total = models.PositiveIntegerField(default=0)
+    duplicates_total = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.kind}:{self.path} @ {self.last_key or '-'}"
+
+
+class MailboxMessage(models.Model):
+    """Уже обработанное письмо Maildir (ключ = уникальное имя файла без флагов)."""
+    checkpoint = models.ForeignKey(MailboxCheckpoint, on_delete=models.CASCADE, related_name="messages")
+    key = models.CharField(max_length=255)
+    processed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["checkpoint", "key"], name="uniq_mailbox_message"),
+        ]
+
+
+class ArchivedRecord(models.Model):
+    """
+    Архив старых записей (только чтение).
+    Сюда переносятся завершённые заказы (вместе с назначениями и доставкой),
+    закрытые назначения и старые проводки кошелька — см. archive.py.
+    """
+    KIND = [
+        ("order", "Order"),
+        ("assignment", "Assignment"),
+        ("ledger", "Ledger Entry"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND)
+    source_id = models.BigIntegerField()
+
+    # без FK: фирма/заказ могут быть удалены, архив должен остаться
+    company_id = models.BigIntegerField(blank=True, null=True, db_index=True)
+    order_number = models.CharField(max_length=100, blank=True, default="", db_index=True)
+
+    record_date = models.DateTimeField()
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "source_id"], name="uniq_archived_record"),
+        ]
+        indexes = [
+            models.Index(fields=["kind", "-record_date"], name="archive_kind_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.source_id}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Первый результат действия (взять / отказаться / завершить, API batch) по ключу клиента.
+    Повтор с тем же ключом отдаёт сохранённый ответ без повторной транзакции — см. idempotency.py.
+    """
+    STATUS = [
+        ("pending", "Pending"),
+        ("done", "Done"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    scope = models.CharField(max_length=100)
+    key = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=STATUS, default="pending")
+
+    response_status = models.PositiveSmallIntegerField(default=0)
+    location = models.CharField(max_length=500, blank=True, default="")
+    body = models.TextField(blank=True, default="")
+    messages = models.JSONField(default=list, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "scope", "key"], name="uniq_idempotency_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.key} ({self.status})"
+
+
+class OrderStatusChange(models.Model):
+    """
+    Аудит смены статуса заказа: кто, когда, из какого статуса в какой.
+    Пишется таблицей переходов (transitions.py) и services.py (назначение, отказ, взятие из пула).
+    """
+    order = models.ForeignKey(InstallationOrder, on_delete=models.CASCADE, related_name="status_changes")
+    from_status = models.CharField(max_length=20, choices=InstallationOrder.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=InstallationOrder.STATUS_CHOICES)
+
+    # фирма заказа на момент перехода
+    company = models.ForeignKey(Company, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    actor_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    reason = models.CharField(max_length=500, blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["order", "created_at"], name="status_change_order_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.order_id}: {self.from_status} -> {self.to_status}"
+
+
 class Transaction(models.Model):
+    """
+    Старый кошелёк (до LedgerEntry). Только для переноса:
+    backfill_transaction_company -> merge_legacy_wallet.
+    """
+    # null — старые строки до manage.py backfill_transaction_company
+    company = models.ForeignKey(
+        Company, on_delete=models.CASCADE, null=True, blank=True, related_name="transactions"
+    )
     date = models.DateTimeField(auto_now_add=True)
 
     type = models.CharField(max_length=50)
@@ -29,5 +523,14 @@ class Transaction(models.Model):
     order_id = models.IntegerField(null=True, blank=True)
     comment = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            # кошелёк фирмы: лента по date с курсором (pagination.py)
+            models.Index(fields=["company", "date"], name="transaction_company_date_idx"),
+            # admin: date_hierarchy по всем фирмам, поиск "=source" (iexact -> UPPER)
+            models.Index(fields=["date"], name="transaction_date_idx"),
+            models.Index(Upper("source"), name="transaction_source_upper_idx"),
+        ]
+
     def __str__(self):
         return f"{self.type} - {self.amount}€"
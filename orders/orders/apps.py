@@ -1,10 +0,0 @@
-from django.apps import AppConfig
-
-
-class OrdersConfig(AppConfig):
-    default_auto_field = "django.db.models.BigAutoField"
-    name = "orders"
-
-    def ready(self):
-        # Подключаем сигналы (понадобится позже)
-        from . import signals  # noqa
@@ -0,0 +1,83 @@
+"""
+Курсорная (keyset) пагинация лент "новые сверху": порядок (-поле даты, -id),
+следующая страница — строго раньше последней строки. Без OFFSET: каждая страница —
+короткий проход по индексу (company, <дата>) с нужной позиции.
+
+EstimatedCountPaginator — для admin-списков больших таблиц (без точного COUNT(*)).
+"""
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+PER_PAGE = 50
+
+
+def encode_cursor(dt: datetime, pk: int) -> str:
+    return base64.urlsafe_b64encode(f"{dt.isoformat()}|{pk}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """(datetime, id) или None, если курсор повреждён."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        dt, pk = raw.split("|")
+        return datetime.fromisoformat(dt), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def cursor_page(qs, cursor: str = "", field: str = "created_at", per_page: int = PER_PAGE):
+    """
+    Страница ленты: (строки, курсор следующей страницы или None).
+    Неверный курсор = первая страница.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        dt, pk = position
+        qs = qs.filter(Q(**{f"{field}__lt": dt}) | Q(**{field: dt, "id__lt": pk}))
+
+    rows = list(qs.order_by(f"-{field}", "-id")[:per_page + 1])
+    if len(rows) <= per_page:
+        return rows, None
+    rows = rows[:per_page]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, field), last.pk)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator для admin на больших таблицах:
+    - без фильтра — оценка числа строк из pg_class.reltuples (Postgres), если она больше ADMIN_EXACT_COUNT_LIMIT
+    - с фильтром/поиском — COUNT по подзапросу с LIMIT, не больше ADMIN_EXACT_COUNT_LIMIT
+    Маленькие таблицы и другие СУБД считаются как обычно.
+    """
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        if not hasattr(qs, "query") or not limit:
+            return super().count
+
+        if not qs.query.where:
+            estimate = _estimated_rows(qs.model, qs.db)
+            if estimate is not None and estimate > limit:
+                return estimate
+            return super().count
+        return qs.order_by()[:limit].count()
+
+
+def _estimated_rows(model, alias: str):
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        row = cursor.fetchone()
+    # -1 — таблицу ещё не анализировали
+    return int(row[0]) if row and row[0] >= 0 else None
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Company
+
+def is_dispatcher(user) -> bool:
+    """Dispatcher = superuser (полный доступ)."""
+    return user.is_superuser
+
+def membership_cache_key(user_id) -> str:
+    return f"auth:company_id:{user_id}"
+
+def user_company(user):
+    """
+    Возвращает первую компанию, к которой привязан пользователь фирмы.
+    Кэш: только id фирмы пользователя (AUTH_CACHE_SECONDS), сброс — в signals.py
+    при изменении Company.users. Саму фирму читаем по pk на каждом запросе:
+    balance_eur меняется UPDATE-ами мимо post_save, кэшированная копия показывала бы старый баланс.
+    """
+    timeout = settings.AUTH_CACHE_SECONDS
+    if not timeout or not user.pk:
+        return Company.objects.filter(users=user).first()
+
+    company_id = cache.get(membership_cache_key(user.pk))
+    if company_id is None:
+        company = Company.objects.filter(users=user).first()
+        cache.set(membership_cache_key(user.pk), company.id if company else 0, timeout)
+        return company
+    if not company_id:
+        return None
+    return Company.objects.filter(id=company_id).first()
+
+def can_view_order(user, order) -> bool:
+    """Dispatcher видит всё, фирма — только свои текущие заказы (как order_detail)."""
+    if is_dispatcher(user):
+        return True
+    c = user_company(user)
+    return bool(c and order is not None and order.current_company_id == c.id)
@@ -0,0 +1,128 @@
+"""
+Расписание фирм: занятые интервалы по (фирма, дата).
+
+Источник правды — сами заказы (current_company + date + time_from/time_to + активный статус),
+поэтому индекс всегда совпадает с состоянием после переходов в services.py.
+Поиск идёт по индексу order_company_day_idx (current_company, date, time_from),
+в памяти интервалы дня держим отсортированными и ищем bisect-ом.
+"""
+import bisect
+from datetime import timedelta, time as dtime
+
+from django.conf import settings
+
+from .models import InstallationOrder
+
+ACTIVE_STATUSES = ("assigned", "in_progress")
+
+
+def minutes(t) -> int:
+    return t.hour * 60 + t.minute
+
+
+def _to_time(m: int):
+    return dtime(m // 60, m % 60)
+
+
+class DaySchedule:
+    """Занятые интервалы одной фирмы за один день (отсортированы, не пересекаются)."""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def is_free(self, start: int, end: int) -> bool:
+        i = bisect.bisect_left(self.starts, end)
+        # единственный кандидат на пересечение — интервал слева от позиции вставки
+        return i == 0 or self.ends[i - 1] <= start
+
+    def add(self, start: int, end: int):
+        """
+        Вставка с слиянием: в базе у фирмы могут быть пересекающиеся заказы
+        (вставлены вручную/до проверки расписания), а is_free опирается на то,
+        что интервалы не пересекаются.
+        """
+        lo = bisect.bisect_left(self.starts, start)
+        if lo and self.ends[lo - 1] > start:
+            lo -= 1
+        hi = lo
+        while hi < len(self.starts) and self.starts[hi] < end:
+            hi += 1
+        if hi > lo:
+            start = min(start, self.starts[lo])
+            end = max(end, *self.ends[lo:hi])
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
+
+    def copy(self) -> "DaySchedule":
+        other = DaySchedule()
+        other.starts = list(self.starts)
+        other.ends = list(self.ends)
+        return other
+
+    def gaps(self, day_start: int, day_end: int, min_length: int = 0):
+        """Свободные окна внутри рабочего дня."""
+        result = []
+        cursor = day_start
+        for s, e in zip(self.starts, self.ends):
+            if s >= day_end:
+                break
+            if s > cursor and s - cursor >= min_length:
+                result.append((cursor, s))
+            cursor = max(cursor, e)
+        if day_end > cursor and day_end - cursor >= min_length:
+            result.append((cursor, day_end))
+        return result
+
+    def __len__(self):
+        return len(self.starts)
+
+
+def _busy_qs(company_id: int):
+    return InstallationOrder.objects.filter(current_company_id=company_id, status__in=ACTIVE_STATUSES)
+
+
+def is_slot_free(company_id: int, day, time_from, time_to, exclude_order_id=None) -> bool:
+    """Свободна ли фирма в окно [time_from, time_to) — один индексный запрос."""
+    qs = _busy_qs(company_id).filter(date=day, time_from__lt=time_to, time_to__gt=time_from)
+    if exclude_order_id:
+        qs = qs.exclude(id=exclude_order_id)
+    return not qs.exists()
+
+
+def check_slot_free(order: InstallationOrder, company_id: int):
+    """Для services.py: ValueError, если у фирмы уже есть заказ на это время."""
+    if not is_slot_free(company_id, order.date, order.time_from, order.time_to, exclude_order_id=order.id):
+        raise ValueError("У фирмы уже есть заказ, пересекающийся по времени.")
+
+
+def load_schedules(company_ids, days) -> dict:
+    """{(company_id, date): DaySchedule} для набора фирм и дней — одним запросом."""
+    schedules = {}
+    rows = (InstallationOrder.objects
+            .filter(current_company_id__in=list(company_ids), date__in=list(days), status__in=ACTIVE_STATUSES)
+            .values_list("current_company_id", "date", "time_from", "time_to"))
+    for cid, d, tf, tt in rows:
+        schedules.setdefault((cid, d), DaySchedule()).add(minutes(tf), minutes(tt))
+    return schedules
+
+
+def free_slots(company_id: int, start_day, days: int = 7, min_minutes: int = 60) -> list:
+    """
+    Свободные окна фирмы на неделю (в рамках WORKDAY_START..WORKDAY_END).
+    Возвращает [(date, [(time_from, time_to), ...]), ...].
+    """
+    day_start = minutes(dtime.fromisoformat(settings.WORKDAY_START))
+    day_end = minutes(dtime.fromisoformat(settings.WORKDAY_END))
+    dates = [start_day + timedelta(days=i) for i in range(days)]
+    schedules = load_schedules([company_id], dates)
+
+    result = []
+    for d in dates:
+        sched = schedules.get((company_id, d), DaySchedule())
+        result.append((d, [
+            (_to_time(s), _to_time(e)) for s, e in sched.gaps(day_start, day_end, min_minutes)
+        ]))
+    return result
@@ -9,18 +9,22 @@ from .models import (
     PenaltyRule,
     LedgerEntry,
 )
+from .counters import apply_deltas, key_of, transition_deltas
+from .signals import recalc_company
+from .transitions import COMPANY, record_changes, transition
+from .schedule import DaySchedule, check_slot_free, load_schedules, minutes
 
 
-def _hours_to_install(order: InstallationOrder) -> int:
+def _hours_to_install(order: InstallationOrder, now=None) -> int:
     """
     Считает сколько часов осталось до времени установки (date + time_from).
-    Используется для выбора штрафа.
+    Используется для выбора штрафа; now — момент отсчёта (по умолчанию сейчас).
     """
     dt_install = timezone.make_aware(
         timezone.datetime.combine(order.date, order.time_from),
         timezone.get_current_timezone()
     )
-    delta = dt_install - timezone.now()
+    delta = dt_install - (now or timezone.now())
     return max(0, int(delta.total_seconds() // 3600))
 
 
@@ -47,7 +51,8 @@ def assign_order(order_id: int, company_id: int, actor_user=None):
     Гарантия: активное назначение только одно (constraint + select_for_update).
     """
     order = InstallationOrder.objects.select_for_update().get(id=order_id)
-    company = Company.objects.get(id=company_id)
+    # блокировка фирмы сериализует параллельные назначения ей (проверка расписания)
+    company = Company.objects.select_for_update().get(id=company_id)
 
     if order.status not in ("inbox", "open_pool"):
         raise ValueError("Этот заказ нельзя назначить в текущем статусе.")
@@ -55,13 +60,90 @@ def assign_order(order_id: int, company_id: int, actor_user=None):
     if OrderAssignment.objects.filter(order=order, unassigned_at__isnull=True).exists():
         raise ValueError("Заказ уже назначен другой фирме.")
 
+    check_slot_free(order, company.id)
+
     OrderAssignment.objects.create(order=order, company=company, actor_user=actor_user)
+    record_changes([(order.id, order.status, "assigned", company.id)], actor_user=actor_user)
 
     order.current_company = company
     order.status = "assigned"
     order.save(update_fields=["current_company", "status", "updated_at"])
 
 
+@transaction.atomic
+def bulk_assign_orders(pairs, actor_user=None) -> list:
+    """
+    Массовое назначение (auto-dispatch): pairs = [(order_id, company_id), ...].
+    Одна транзакция, фиксированное число запросов на пачку:
+    - блокируем заказы, пропускаем те, что уже не inbox/open_pool или уже назначены
+    - блокируем фирмы и пропускаем заказы, пересекающиеся с их расписанием
+    - bulk_create назначений
+    - один UPDATE на фирму
+    - рейтинг каждой затронутой фирмы пересчитываем один раз
+    Возвращает список реально назначенных order_id.
+    """
+    wanted = dict(pairs)
+    if not wanted:
+        return []
+
+    rows = {}
+    old_keys = {}
+    old_status = {}
+    for oid, d, tf, tt, cid, st in (InstallationOrder.objects.select_for_update()
+                                    .filter(id__in=list(wanted), status__in=("inbox", "open_pool"))
+                                    .values_list("id", "date", "time_from", "time_to",
+                                                 "current_company_id", "status")):
+        rows[oid] = (d, tf, tt)
+        old_keys[oid] = key_of(d, cid, st)
+        old_status[oid] = st
+    already = set(
+        OrderAssignment.objects
+        .filter(order_id__in=list(rows), unassigned_at__isnull=True)
+        .values_list("order_id", flat=True)
+    )
+
+    company_ids = sorted({wanted[oid] for oid in rows})
+    # блокируем фирмы в порядке id (без deadlock) — расписание не изменится до коммита
+    list(Company.objects.select_for_update().filter(id__in=company_ids).order_by("id").values_list("id", flat=True))
+    schedules = load_schedules(company_ids, {d for d, _, _ in rows.values()})
+
+    ids = []
+    for oid in sorted(rows, key=lambda i: (rows[i][0], rows[i][1], i)):
+        if oid in already:
+            continue
+        d, tf, tt = rows[oid]
+        sched = schedules.setdefault((wanted[oid], d), DaySchedule())
+        if not sched.is_free(minutes(tf), minutes(tt)):
+            continue
+        sched.add(minutes(tf), minutes(tt))
+        ids.append(oid)
+
+    OrderAssignment.objects.bulk_create([
+        OrderAssignment(order_id=oid, company_id=wanted[oid], actor_user=actor_user)
+        for oid in ids
+    ])
+
+    by_company = {}
+    for oid in ids:
+        by_company.setdefault(wanted[oid], []).append(oid)
+
+    now = timezone.now()
+    for company_id, order_ids in by_company.items():
+        InstallationOrder.objects.filter(id__in=order_ids).update(
+            current_company_id=company_id, status="assigned", updated_at=now
+        )
+
+    # UPDATE не вызывает post_save — пересчитываем рейтинг и счётчики явно
+    for company_id in sorted(by_company):
+        recalc_company(company_id)
+    apply_deltas(transition_deltas(
+        (old_keys[oid], key_of(rows[oid][0], wanted[oid], "assigned")) for oid in ids
+    ))
+    record_changes([(oid, old_status[oid], "assigned", wanted[oid]) for oid in ids], actor_user=actor_user)
+
+    return ids
+
+
 @transaction.atomic
 def company_reject_order(order_id: int, company_id: int, reason: str, actor_user=None):
     """
@@ -107,6 +189,7 @@ def company_reject_order(order_id: int, company_id: int, reason: str, actor_user
 
         order.bonus_pot_eur = order.bonus_pot_eur + penalty
 
+    record_changes([(order.id, order.status, "open_pool", company_id)], actor_user=actor_user, reason=reason)
     order.current_company = None
     order.status = "open_pool"
     order.save(update_fields=["current_company", "status", "bonus_pot_eur", "updated_at"])
@@ -126,8 +209,11 @@ def take_from_open_pool(order_id: int, company_id: int, actor_user=None):
     if OrderAssignment.objects.filter(order=order, unassigned_at__isnull=True).exists():
         raise ValueError("Заказ уже назначен.")
 
-    company = Company.objects.get(id=company_id)
+    company = Company.objects.select_for_update().get(id=company_id)
+    check_slot_free(order, company.id)
+
     OrderAssignment.objects.create(order=order, company=company, actor_user=actor_user)
+    record_changes([(order.id, order.status, "assigned", company.id)], actor_user=actor_user)
 
     order.current_company = company
     order.status = "assigned"
@@ -135,9 +221,9 @@ def take_from_open_pool(order_id: int, company_id: int, actor_user=None):
     order.save(update_fields=["current_company", "status", "taken_from_pool", "updated_at"])
 
 
-@transaction.atomic
-def finish_order_and_pay(order_id: int, actor_company_id: int):
+def finish_order_and_pay(order_id: int, actor_company_id: int, actor_user=None):
+    """
+    Фирма завершает заказ: переход -> finished по таблице (transitions.py).
+    Эффект перехода начисляет base_price_eur и bonus_pot_eur (если есть — бонус из общего контейнера).
     """
-    Фирма завершает заказ:
-    - статус -> finished
-    - начисляем base_price_eur
+    transition(order_id, "finished", COMPANY, company_id=actor_company_id, actor_user=actor_user)
@@ -0,0 +1,178 @@
+from contextlib import contextmanager
+from decimal import Decimal
+import threading
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.db.models import Count, Q
+from django.dispatch import receiver
+
+from core.auth import invalidate
+from .counters import apply_deltas, key_of, transition_deltas
+from .models import InstallationOrder, Company, Delivery, ArchivedRecord
+from .permissions import membership_cache_key
+
+
+def clamp(v: Decimal, a: Decimal, b: Decimal) -> Decimal:
+    """Ограничивает число в диапазоне [a, b]."""
+    return max(a, min(b, v))
+
+
+_deferred = threading.local()
+
+
+@contextmanager
+def defer_rating_recalc():
+    """
+    Для массовых операций: вместо пересчёта рейтинга на каждый заказ
+    собираем id фирм и пересчитываем каждую один раз в конце.
+    """
+    if getattr(_deferred, "ids", None) is not None:
+        yield
+        return
+    _deferred.ids = set()
+    try:
+        yield
+        ids = _deferred.ids
+    finally:
+        _deferred.ids = None
+    for company_id in sorted(ids):
+        recalc_company(company_id)
+
+
+def _recalc_or_defer(company_id: int):
+    ids = getattr(_deferred, "ids", None)
+    if ids is not None:
+        ids.add(company_id)
+    else:
+        recalc_company(company_id)
+
+
+def recalc_company(company_id: int):
+    """
+    Пересчитывает рейтинг фирмы по заказам.
+    Сейчас рейтинг простой:
+    - базово 5.00
+    - company_fault ухудшает
+    - not_possible/storno ухудшают
+    """
+    c = Company.objects.filter(id=company_id).first()
+    if not c:
+        return
+
+    # Здесь — быстрый рейтинг по заказам фирмы, включая перенесённые в архив (archive.py):
+    # архивация не должна менять рейтинг.
+    # Рейтинг по всей истории assignments/штрафов: analytics.py (manage.py compute_ratings)
+    hot = InstallationOrder.objects.filter(current_company_id=company_id).aggregate(
+        total=Count("id"),
+        finished=Count("id", filter=Q(status="finished")),
+        company_fault=Count("id", filter=Q(reason_category="company_fault")),
+        not_possible=Count("id", filter=Q(status="not_possible")),
+        storno=Count("id", filter=Q(status="storno")),
+    )
+    archived = ArchivedRecord.objects.filter(kind="order", company_id=company_id).aggregate(
+        total=Count("id"),
+        finished=Count("id", filter=Q(data__status="finished")),
+        company_fault=Count("id", filter=Q(data__reason_category="company_fault")),
+        not_possible=Count("id", filter=Q(data__status="not_possible")),
+        storno=Count("id", filter=Q(data__status="storno")),
+    )
+    total, finished, company_fault, not_possible, storno = (
+        hot[k] + archived[k] for k in ("total", "finished", "company_fault", "not_possible", "storno")
+    )
+
+    if total == 0:
+        rating = Decimal("5.00")
+    else:
+        fault_rate = Decimal(company_fault) / Decimal(total)
+        fail_rate = Decimal(not_possible + storno) / Decimal(total)
+        rating = Decimal("5.00") - (fault_rate * Decimal("3.00")) - (fail_rate * Decimal("2.00"))
+        rating = clamp(rating, Decimal("1.00"), Decimal("5.00")).quantize(Decimal("0.01"))
+
+    c.orders_total = total
+    c.orders_finished = finished
+    c.company_fault_count = company_fault
+    c.not_possible_count = not_possible
+    c.storno_count = storno
+    c.rating = rating
+    c.save(update_fields=[
+        "orders_total", "orders_finished", "company_fault_count",
+        "not_possible_count", "storno_count", "rating"
+    ])
+
+
+_COUNTER_FIELDS = ("date", "current_company_id", "status")
+
+
+def _counter_key(instance: InstallationOrder):
+    """Ключ счётчика без лишних запросов: None, если поля отложены (.only/.defer)."""
+    values = instance.__dict__
+    if any(f not in values for f in _COUNTER_FIELDS):
+        return None
+    return key_of(values["date"], values["current_company_id"], values["status"])
+
+
+@receiver(post_init, sender=InstallationOrder)
+def order_loaded(sender, instance: InstallationOrder, **kwargs):
+    # запоминаем ключ счётчика, с которым заказ пришёл из базы
+    instance._counter_key = _counter_key(instance) if instance.pk else None
+
+
+@receiver(pre_save, sender=InstallationOrder)
+def order_saving(sender, instance: InstallationOrder, **kwargs):
+    # заказ загружен с .only()/.defer() — старый ключ берём из базы
+    if instance.pk and instance._counter_key is None and not instance._state.adding:
+        row = (InstallationOrder.objects.filter(pk=instance.pk)
+               .values_list(*_COUNTER_FIELDS).first())
+        instance._counter_key = key_of(*row) if row else None
+
+
+@receiver(post_save, sender=InstallationOrder)
+def order_saved(sender, instance: InstallationOrder, created, **kwargs):
+    # 1) Автоматически создаём объект доставки для каждого заказа
+    if created:
+        Delivery.objects.get_or_create(order=instance)
+
+    # 2) Пересчитываем рейтинг фирмы
+    if instance.current_company_id:
+        _recalc_or_defer(instance.current_company_id)
+
+    # 3) Счётчики dashboard
+    old = None if created else instance._counter_key
+    new = key_of(instance.date, instance.current_company_id, instance.status)
+    apply_deltas(transition_deltas([(old, new)]))
+    instance._counter_key = new
+
+
+@receiver(post_delete, sender=InstallationOrder)
+def order_deleted(sender, instance: InstallationOrder, **kwargs):
+    if instance.current_company_id:
+        _recalc_or_defer(instance.current_company_id)
+
+    apply_deltas(transition_deltas([(_counter_key(instance), None)]))
+
+
+# ---------------- кэш user_company (permissions.py) ----------------
+
+@receiver(pre_delete, sender=Company)
+def company_deleting(sender, instance: Company, **kwargs):
+    # связи Company.users удаляются каскадом без m2m_changed
+    invalidate(*(membership_cache_key(uid) for uid in instance.users.values_list("id", flat=True)))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance: User, **kwargs):
+    invalidate(membership_cache_key(instance.pk))
+
+
+@receiver(m2m_changed, sender=Company.users.through)
+def company_users_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        user_ids = [instance.pk]
+    elif action == "pre_clear":
+        user_ids = list(instance.users.values_list("id", flat=True))
+    else:
+        user_ids = pk_set or []
+    invalidate(*(membership_cache_key(uid) for uid in user_ids))
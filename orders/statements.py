@@ -0,0 +1,234 @@
+"""
+Месячные выписки по кошельку (LedgerEntry) для всех фирм: CSV + PDF.
+
+- один упорядоченный потоковый запрос за месяц по всем фирмам (company_id, created_at, id),
+  группировка в памяти через itertools.groupby
+- остатки сходятся с Company.balance_eur:
+  closing = balance_eur - сумма проводок после конца месяца, opening = closing - сумма за месяц
+- все данные читаются в одной транзакции REPEATABLE READ (Postgres): баланс фирмы и суммы проводок
+  берутся из одного снимка и сходятся даже при параллельных проводках
+- CSV и PDF (Pillow) рендерятся в ProcessPoolExecutor, файлы — MEDIA_ROOT/statements/YYYY-MM/
+- только из manage.py generate_statements (cron), не в запросе gunicorn: страница выписок
+  лишь ставит месяц в очередь (файл .requested), cron-запуск с --pending её разбирает
+Проводки, уже перенесённые в архив (archive.py), в выписку не попадают.
+"""
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Company, LedgerEntry
+
+PAGE_SIZE = (1240, 1754)  # A4, 150 dpi
+MARGIN = 80
+LINE = 30
+ROWS_PER_PAGE = (PAGE_SIZE[1] - 2 * MARGIN - 6 * LINE) // LINE
+
+
+def month_bounds(month: date):
+    """[начало месяца, начало следующего) в локальной таймзоне."""
+    start = date(month.year, month.month, 1)
+    end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    tz = timezone.get_current_timezone()
+    return (timezone.make_aware(datetime.combine(start, datetime.min.time()), tz),
+            timezone.make_aware(datetime.combine(end, datetime.min.time()), tz))
+
+
+def statements_dir(month: date) -> str:
+    return os.path.join(str(settings.MEDIA_ROOT), "statements", f"{month:%Y-%m}")
+
+
+REQUEST_MARKER = ".requested"
+
+
+def request_statements(month: date):
+    """Ставит месяц в очередь для manage.py generate_statements --pending."""
+    directory = statements_dir(month)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, REQUEST_MARKER), "w") as f:
+        f.write(timezone.now().isoformat())
+
+
+def is_requested(month: date) -> bool:
+    return os.path.exists(os.path.join(statements_dir(month), REQUEST_MARKER))
+
+
+def pending_months() -> list:
+    root = os.path.join(str(settings.MEDIA_ROOT), "statements")
+    if not os.path.isdir(root):
+        return []
+    result = []
+    for name in sorted(os.listdir(root)):
+        if os.path.exists(os.path.join(root, name, REQUEST_MARKER)):
+            try:
+                result.append(datetime.strptime(name, "%Y-%m").date())
+            except ValueError:
+                continue
+    return result
+
+
+def load_statements(month: date) -> list:
+    """
+    Данные выписок всех фирм (picklable dict-ы для процессов).
+    Запросы: фирмы, суммы после конца месяца (GROUP BY), проводки месяца (один поток) —
+    в одной транзакции REPEATABLE READ.
+    """
+    if connections["default"].in_atomic_block:
+        # уже внутри транзакции вызывающего: уровень изоляции не сменить, читаем в ней
+        return _load_statements(month)
+    with transaction.atomic(using="default"):
+        if connections["default"].vendor == "postgresql":
+            with connections["default"].cursor() as cursor:
+                # первая команда транзакции — снимок на все запросы ниже
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        return _load_statements(month)
+
+
+def _load_statements(month: date) -> list:
+    start, end = month_bounds(month)
+    companies = list(Company.objects.order_by("id").values_list("id", "name", "balance_eur"))
+    after = dict(
+        LedgerEntry.objects.filter(created_at__gte=end)
+        .values_list("company_id").annotate(s=Sum("amount_eur")).order_by()
+    )
+
+    rows = (LedgerEntry.objects
+            .filter(created_at__gte=start, created_at__lt=end)
+            .order_by("company_id", "created_at", "id")
+            .values_list("company_id", "created_at", "entry_type", "source", "amount_eur",
+                         "order__order_number", "comment")
+            .iterator(chunk_size=2000))
+    entries = {}
+    for company_id, group in itertools.groupby(rows, key=lambda r: r[0]):
+        entries[company_id] = [
+            (timezone.localtime(created).strftime("%Y-%m-%d %H:%M"), entry_type, source, amount,
+             order_number or "", comment or "")
+            for _, created, entry_type, source, amount, order_number, comment in group
+        ]
+
+    cents = Decimal("0.01")
+    result = []
+    for company_id, name, balance in companies:
+        items = entries.get(company_id, [])
+        closing = (balance - (after.get(company_id) or Decimal("0"))).quantize(cents)
+        total = sum((r[3] for r in items), Decimal("0")).quantize(cents)
+        result.append({
+            "company_id": company_id,
+            "company": name,
+            "month": f"{month:%Y-%m}",
+            "opening": str(closing - total),
+            "closing": str(closing),
+            "credit": str(sum((r[3] for r in items if r[3] > 0), Decimal("0")).quantize(cents)),
+            "debit": str(sum((r[3] for r in items if r[3] < 0), Decimal("0")).quantize(cents)),
+            "rows": [(d, t, s, str(a), o, c) for d, t, s, a, o, c in items],
+        })
+    return result
+
+
+def _write_csv(path: str, st: dict):
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.writer(f, delimiter=";")
+        w.writerow(["Фирма", st["company"]])
+        w.writerow(["Месяц", st["month"]])
+        w.writerow(["Остаток на начало", st["opening"]])
+        w.writerow([])
+        w.writerow(["Дата", "Тип", "Источник", "Сумма €", "Заказ", "Комментарий"])
+        w.writerows(st["rows"])
+        w.writerow([])
+        w.writerow(["Поступления", st["credit"]])
+        w.writerow(["Списания", st["debit"]])
+        w.writerow(["Остаток на конец", st["closing"]])
+
+
+def _font(path: str, size: int):
+    from PIL import ImageFont
+    try:
+        return ImageFont.truetype(path, size)
+    except OSError:
+        return ImageFont.load_default(size=size)
+
+
+def _write_pdf(path: str, st: dict, font_path: str):
+    from PIL import Image, ImageDraw
+
+    font, bold = _font(font_path, 20), _font(font_path, 26)
+    columns = (0, 220, 420, 560, 700, 860)
+    chunks = [st["rows"][i:i + ROWS_PER_PAGE] for i in range(0, len(st["rows"]), ROWS_PER_PAGE)] or [[]]
+
+    pages = []
+    for n, chunk in enumerate(chunks, start=1):
+        page = Image.new("L", PAGE_SIZE, 255)
+        draw = ImageDraw.Draw(page)
+        y = MARGIN
+        draw.text((MARGIN, y), f"Выписка {st['month']} · {st['company']}", font=bold, fill=0)
+        y += LINE * 2
+        if n == 1:
+            draw.text((MARGIN, y), f"Остаток на начало: {st['opening']} €", font=font, fill=0)
+            y += LINE
+        for x, title in zip(columns, ("Дата", "Тип", "Источник", "Сумма €", "Заказ", "Комментарий")):
+            draw.text((MARGIN + x, y), title, font=font, fill=110)
+        y += LINE
+        for row in chunk:
+            for x, value in zip(columns, row):
+                draw.text((MARGIN + x, y), str(value)[:28], font=font, fill=0)
+            y += LINE
+        if n == len(chunks):
+            y += LINE
+            draw.text((MARGIN, y), f"Поступления: {st['credit']} €   Списания: {st['debit']} €", font=font, fill=0)
+            draw.text((MARGIN, y + LINE), f"Остаток на конец: {st['closing']} €", font=bold, fill=0)
+        draw.text((PAGE_SIZE[0] - MARGIN - 120, PAGE_SIZE[1] - MARGIN), f"{n}/{len(chunks)}", font=font, fill=110)
+        pages.append(page)
+
+    pages[0].save(path, "PDF", resolution=150, save_all=True, append_images=pages[1:])
+
+
+def render_statement(st: dict, out_dir: str, font_path: str) -> int:
+    """
+    В отдельном процессе: CSV + PDF одной фирмы (атомарно через .tmp). Возвращает company_id.
+    Не трогает settings и БД — работает и при spawn.
+    """
+    base = os.path.join(out_dir, str(st["company_id"]))
+    _write_csv(base + ".csv.tmp", st)
+    os.replace(base + ".csv.tmp", base + ".csv")
+    _write_pdf(base + ".pdf.tmp", st, font_path)
+    os.replace(base + ".pdf.tmp", base + ".pdf")
+    return st["company_id"]
+
+
+def generate_statements(month: date, workers: int = None) -> dict:
+    """Выписки всех фирм за месяц. Возвращает статистику с временем этапов."""
+    t0 = time.perf_counter()
+    statements = load_statements(month)
+    t1 = time.perf_counter()
+
+    out_dir = statements_dir(month)
+    os.makedirs(out_dir, exist_ok=True)
+    font_path = settings.STATEMENT_FONT
+    workers = workers or settings.STATEMENT_WORKERS or None
+    if workers == 1:
+        done = [render_statement(st, out_dir, font_path) for st in statements]
+    else:
+        # открытые соединения с БД не должны достаться дочерним процессам
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            done = list(pool.map(render_statement, statements, itertools.repeat(out_dir),
+                                 itertools.repeat(font_path), chunksize=4))
+    t2 = time.perf_counter()
+
+    return {
+        "month": f"{month:%Y-%m}",
+        "companies": len(done),
+        "entries": sum(len(st["rows"]) for st in statements),
+        "dir": out_dir,
+        "load_s": round(t1 - t0, 2),
+        "render_s": round(t2 - t1, 2),
+        "total_s": round(t2 - t0, 2),
+    }
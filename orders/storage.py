@@ -0,0 +1,117 @@
+import os
+import re
+import shutil
+import tempfile
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+PDF_PREFIX = "order_pdfs"
+BLOB_RE = re.compile(r"^order_pdfs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})\.pdf$")
+
+
+def blob_name(sha256: str) -> str:
+    """Путь blob-а по хешу: order_pdfs/ab/cd/<sha256>.pdf"""
+    return f"{PDF_PREFIX}/{sha256[:2]}/{sha256[2:4]}/{sha256}.pdf"
+
+
+def sha256_from_name(name: str):
+    """Обратное преобразование: sha256 из пути blob-а (или None для старых путей)."""
+    m = BLOB_RE.match(name or "")
+    return m.group(1) if m else None
+
+
+def order_pdf_upload_to(instance, filename):
+    """upload_to для OrderDocument.file — sha256 считается в save() до записи файла."""
+    return blob_name(instance.sha256)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище PDF по содержимому.
+    - имя файла = sha256, поэтому одинаковый PDF хранится один раз
+    - запись через временный файл + os.replace (атомарно)
+    - загруженный во временный файл PDF не копируется, а hardlink-ится
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # одинаковое имя = одинаковое содержимое, суффиксы не нужны
+        return name
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            # blob уже есть — переиспользуем без записи
+            return name
+
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+
+        if hasattr(content, "temporary_file_path"):
+            try:
+                self._link_into(content.temporary_file_path(), full_path)
+                return name
+            except OSError:
+                pass  # другой диск / FS без hardlink — пишем копию
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in content.chunks():
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            self._finish(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return name
+
+    def _link_into(self, src_path: str, full_path: str):
+        # mkstemp не подходит: os.link не пишет поверх существующего файла.
+        # uuid4 — уникальное имя для любых процессов и потоков, пишущих один blob
+        tmp_path = os.path.join(os.path.dirname(full_path), f".tmp-{uuid.uuid4().hex}")
+        os.link(src_path, tmp_path)
+        try:
+            self._finish(tmp_path, full_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _finish(self, tmp_path: str, full_path: str):
+        if self.file_permissions_mode is not None:
+            os.chmod(tmp_path, self.file_permissions_mode)
+        os.replace(tmp_path, full_path)
+
+    def path_for_sha256(self, sha256: str) -> str:
+        """Абсолютный путь на диске сразу по хешу, без запроса в БД."""
+        return self.path(blob_name(sha256))
+
+    def link_existing(self, src_path: str, sha256: str) -> str:
+        """
+        Кладёт файл с диска в хранилище по хешу.
+        Hardlink если возможно (zero-copy), иначе копия. Возвращает имя blob-а.
+        """
+        name = blob_name(sha256)
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            return name
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        try:
+            self._link_into(src_path, full_path)
+        except OSError:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path), prefix=".tmp-")
+            os.close(fd)
+            try:
+                shutil.copyfile(src_path, tmp_path)
+                self._finish(tmp_path, full_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        return name
+
+
+pdf_storage = ContentAddressedStorage()
@@ -0,0 +1,94 @@
+from datetime import date, time, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from orders.analytics import compute, load_columns, write_snapshots
+from orders.archive import archive_all
+from orders.models import (
+    ArchivedRecord, Company, CompanyRatingSnapshot, InstallationOrder, LedgerEntry, OrderAssignment,
+)
+from orders.transitions import DISPATCHER, bulk_transition
+
+
+class RatingHistoryTests(TestCase):
+    def setUp(self):
+        self.a = Company.objects.create(name="A")
+        self.b = Company.objects.create(name="B")
+        old = timezone.now() - timedelta(days=400)
+
+        def order(number, status, company, category=None):
+            return InstallationOrder.objects.create(
+                order_number=number, customer_name="x", date=date(2024, 1, 1),
+                time_from=time(8), time_to=time(9), current_company=company,
+                status=status, reason_category=category,
+            )
+
+        done = order("R-1", "finished", self.a)
+        failed = order("R-2", "storno", self.a, "company_fault")
+        running = order("R-3", "assigned", self.b)
+        # A отказалась от R-3 до того, как его взяла B
+        OrderAssignment.objects.create(order=running, company=self.a, unassigned_at=old)
+        for o, company in ((done, self.a), (failed, self.a), (running, self.b)):
+            OrderAssignment.objects.create(order=o, company=company)
+        LedgerEntry.objects.create(company=self.a, entry_type="penalty", amount_eur=Decimal("-25.00"))
+
+        InstallationOrder.objects.filter(status__in=("finished", "storno")).update(updated_at=old)
+        OrderAssignment.objects.update(assigned_at=old)
+        LedgerEntry.objects.update(created_at=old)
+
+    def _totals(self):
+        result = compute(load_columns())
+        index = {int(cid): i for i, cid in enumerate(result["company_ids"])}
+        keys = ("assignments", "finished", "failed", "faults", "rejects", "penalty_cents", "rating")
+        return {cid: tuple(float(result["totals"][k][i]) for k in keys) for cid, i in index.items()}
+
+    def test_archived_history_is_counted(self):
+        before = self._totals()
+        self.assertEqual(before[self.a.id], (3.0, 1.0, 1.0, 1.0, 1.0, 2500.0, before[self.a.id][-1]))
+
+        archive_all(timezone.now() - timedelta(days=365))
+
+        self.assertEqual(set(ArchivedRecord.objects.values_list("kind", flat=True)),
+                         {"order", "assignment", "ledger"})
+        self.assertEqual(OrderAssignment.objects.count(), 1)
+        self.assertEqual(self._totals(), before)
+
+    def test_page_only_reads_snapshots(self):
+        user = User.objects.create_user("disp", password="x")
+        self.client.force_login(user)
+
+        response = self.client.get(reverse("company_ratings"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "manage.py compute_ratings")
+        self.assertFalse(CompanyRatingSnapshot.objects.exists())
+
+        call_command("compute_ratings", stdout=StringIO())
+        response = self.client.get(reverse("company_ratings"))
+        self.assertEqual(len(response.context["snapshots"]), 2)
+
+    def test_penalties_are_summed_exactly(self):
+        # сумма должна сходиться с кошельком до цента (0.1 + 0.2 во float — 0.30000000000000004)
+        LedgerEntry.objects.bulk_create([
+            LedgerEntry(company=self.b, entry_type="penalty", amount_eur=Decimal(amount))
+            for amount in ("-0.10", "-0.20") * 5000
+        ])
+        write_snapshots(compute(load_columns()))
+
+        totals = CompanyRatingSnapshot.objects.filter(week_start__isnull=True)
+        self.assertEqual(totals.get(company=self.b).penalty_total_eur, Decimal("1500.00"))
+        self.assertEqual(totals.get(company=self.a).penalty_total_eur, Decimal("25.00"))
+        weekly = CompanyRatingSnapshot.objects.filter(company=self.b, week_start__isnull=False)
+        self.assertEqual(sum(w.penalty_total_eur for w in weekly), Decimal("1500.00"))
+
+    def test_storno_closed_assignment_is_not_a_reject(self):
+        order = InstallationOrder.objects.get(order_number="R-3")
+        bulk_transition([order.id], "storno", DISPATCHER, reason="x")
+
+        b = self._totals()[self.b.id]
+        self.assertEqual(b[:5], (1.0, 0.0, 1.0, 0.0, 0.0))
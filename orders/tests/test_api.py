@@ -0,0 +1,17 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+
+class ApiLoginTests(TestCase):
+    def _login(self, username, password):
+        return self.client.post(reverse("api_login"), json.dumps({"username": username, "password": password}),
+                                content_type="application/json")
+
+    def test_password_is_not_stripped(self):
+        User.objects.create_user("inst", password=" secret ")
+
+        self.assertEqual(self._login(" inst ", " secret ").status_code, 200)
+        self.assertEqual(self._login("inst", "secret").status_code, 401)
@@ -0,0 +1,57 @@
+from datetime import date, time, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from orders.archive import archive_orders
+from orders.models import ArchivedRecord, Company, InstallationOrder, OrderStatusChange
+
+
+class ArchiveOrdersTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="A")
+        for i, (status, category) in enumerate([
+            ("finished", None), ("finished", None), ("storno", "company_fault"), ("not_possible", "neutral"),
+        ]):
+            order = InstallationOrder.objects.create(
+                order_number=f"A-{i}", customer_name="x", date=date(2024, 1, 1),
+                time_from=time(8), time_to=time(9), current_company=self.company,
+                status=status, reason_category=category,
+            )
+            OrderStatusChange.objects.create(order=order, from_status="assigned", to_status=status,
+                                             company=self.company)
+        # ещё один заказ в работе — остаётся в горячей таблице
+        InstallationOrder.objects.create(
+            order_number="A-open", customer_name="x", date=date(2030, 1, 1),
+            time_from=time(8), time_to=time(9), current_company=self.company, status="assigned",
+        )
+        InstallationOrder.objects.filter(status__in=("finished", "storno", "not_possible")).update(
+            updated_at=timezone.now() - timedelta(days=400)
+        )
+
+    def _rating(self):
+        c = Company.objects.get(id=self.company.id)
+        return (c.rating, c.orders_total, c.orders_finished, c.company_fault_count,
+                c.not_possible_count, c.storno_count)
+
+    def test_rating_unchanged_after_archiving(self):
+        before = self._rating()
+        self.assertEqual(before[1:], (5, 2, 1, 1, 1))
+
+        archived = archive_orders(timezone.now() - timedelta(days=365))
+
+        self.assertEqual(archived, 4)
+        self.assertEqual(InstallationOrder.objects.count(), 1)
+        self.assertEqual(self._rating(), before)
+
+        # следующий пересчёт (любой save заказа) тоже даёт тот же рейтинг
+        InstallationOrder.objects.get(order_number="A-open").save()
+        self.assertEqual(self._rating(), before)
+
+    def test_cascaded_audit_is_archived(self):
+        archive_orders(timezone.now() - timedelta(days=365))
+
+        self.assertFalse(OrderStatusChange.objects.exists())
+        record = ArchivedRecord.objects.get(kind="order", order_number="A-2")
+        self.assertEqual([c["to_status"] for c in record.data["status_changes"]], ["storno"])
+        self.assertEqual(record.data["bonus_escalations"], [])
@@ -0,0 +1,46 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from orders.models import Company
+from orders.permissions import user_company
+
+
+@override_settings(AUTH_CACHE_SECONDS=300)
+class UserCompanyCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name="A")
+        self.user = User.objects.create_user("inst", password="x")
+        self.company.users.add(self.user)
+
+    def test_balance_is_fresh_after_update(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("wallet")).context["company"].balance_eur, Decimal("0"))
+
+        # выплаты меняют баланс UPDATE-ом, без post_save
+        Company.objects.filter(id=self.company.id).update(balance_eur=Decimal("42.50"))
+
+        self.assertEqual(self.client.get(reverse("wallet")).context["company"].balance_eur, Decimal("42.50"))
+
+    def test_membership_is_cached_and_reset(self):
+        self.assertEqual(user_company(self.user), self.company)
+        with self.assertNumQueries(1):
+            user_company(self.user)
+
+        self.company.users.remove(self.user)
+        self.assertIsNone(user_company(self.user))
+
+    def test_benchmark_keeps_shared_cache(self):
+        cache.set("unrelated", "kept")
+        out = StringIO()
+
+        call_command("auth_query_benchmark", username="inst", stdout=out)
+
+        self.assertIn("/pool/", out.getvalue())
+        self.assertEqual(cache.get("unrelated"), "kept")
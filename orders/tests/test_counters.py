@@ -0,0 +1,78 @@
+from datetime import timedelta, time
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from orders.counters import apply_deltas, dashboard_counts, key_of, reconcile
+from orders.models import Company, InstallationOrder, OrderStatusCounter
+from orders.transitions import DISPATCHER, bulk_transition
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="A")
+        self.today = timezone.localdate()
+
+    def _order(self, number, status="assigned", day=None):
+        return InstallationOrder.objects.create(
+            order_number=number, customer_name="x", date=day or self.today,
+            time_from=time(8), time_to=time(9), current_company=self.company, status=status,
+        )
+
+    def _counts(self):
+        return {(c.company_id, c.status): c.count
+                for c in OrderStatusCounter.objects.filter(count__gt=0, date=self.today)}
+
+    def test_save_delete_and_update_keep_counters_exact(self):
+        a = self._order("C-1")
+        b = self._order("C-2")
+        self.assertEqual(self._counts(), {(self.company.id, "assigned"): 2})
+
+        a.status = "in_progress"
+        a.save()
+        b.delete()
+        self.assertEqual(self._counts(), {(self.company.id, "in_progress"): 1})
+
+        # массовый UPDATE (без post_save) — дельты применяет bulk_transition
+        bulk_transition([a.id], "finished", DISPATCHER)
+        self.assertEqual(self._counts(), {(self.company.id, "finished"): 1})
+        self.assertEqual(reconcile(), 0)
+
+    def test_reconcile_repairs_drift(self):
+        self._order("C-1")
+        InstallationOrder.objects.update(status="storno")  # мимо сигналов
+
+        self.assertEqual(reconcile(), 2)
+        self.assertEqual(self._counts(), {(self.company.id, "storno"): 1})
+
+    @override_settings(NOT_POSSIBLE_REVIEW_DAYS=7)
+    def test_not_possible_review_is_windowed(self):
+        self._order("C-1", "not_possible")
+        self._order("C-2", "not_possible", day=self.today - timedelta(days=30))
+
+        data = dashboard_counts()
+
+        self.assertEqual(data["by_status"]["not_possible"], 2)
+        self.assertEqual(data["not_possible_review"], 1)
+        self.assertEqual(data["review_since"], self.today - timedelta(days=7))
+
+    def test_apply_deltas_in_lock_order(self):
+        tomorrow = self.today + timedelta(days=1)
+        keys = [
+            key_of(tomorrow, self.company.id, "assigned"),
+            key_of(self.today, self.company.id, "inbox"),
+            key_of(self.today, None, "inbox"),
+            key_of(self.today, self.company.id, "assigned"),
+        ]
+        seen = []
+        real_filter = OrderStatusCounter.objects.filter
+
+        def spy(**kwargs):
+            seen.append(key_of(kwargs["date"], kwargs["company_id"], kwargs["status"]))
+            return real_filter(**kwargs)
+
+        with mock.patch.object(OrderStatusCounter.objects, "filter", side_effect=spy):
+            apply_deltas({key: 1 for key in keys})
+
+        self.assertEqual(seen, [keys[2], keys[3], keys[1], keys[0]])
@@ -0,0 +1,53 @@
+import random
+import unittest
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.test import SimpleTestCase
+
+from orders import dispatch
+from orders.schedule import DaySchedule
+
+
+def _synthetic(n_orders, n_companies, days=3, seed=7):
+    rnd = random.Random(seed)
+    orders = []
+    for oid in range(n_orders):
+        start = rnd.randrange(7 * 60, 17 * 60, 30)
+        orders.append((oid, date(2030, 1, 1) + timedelta(days=rnd.randrange(days)), start,
+                       start + rnd.choice((60, 90, 120, 180))))
+    companies = {cid: round(rnd.uniform(1, 5), 2) for cid in range(n_companies)}
+    return orders, companies
+
+
+class DispatchSolverTests(SimpleTestCase):
+    def _assert_valid(self, orders, plan, max_per_day):
+        by_order = {o[0]: o for o in orders}
+        per_day = defaultdict(list)
+        for oid, cid in plan.items():
+            _, day, start, end = by_order[oid]
+            per_day[(cid, day)].append((start, end))
+        for intervals in per_day.values():
+            self.assertLessEqual(len(intervals), max_per_day)
+            intervals.sort()
+            for (_, end), (start, _) in zip(intervals, intervals[1:]):
+                self.assertLessEqual(end, start)
+
+    def test_greedy_respects_slots_and_daily_limit(self):
+        orders, companies = _synthetic(600, 20)
+        plan = dispatch.solve_greedy(orders, companies, defaultdict(DaySchedule), max_per_day=4, load_weight=0.5)
+        self._assert_valid(orders, plan, 4)
+
+    def test_explicit_zero_limit_is_not_replaced_by_default(self):
+        orders = [(1, date(2030, 1, 1), 480, 540)]
+        self.assertEqual(dispatch.solve_greedy(orders, {1: 5.0}, defaultdict(DaySchedule), max_per_day=0), {})
+
+    @unittest.skipIf(dispatch.linear_sum_assignment is None, "нужны numpy и scipy")
+    def test_hungarian_is_valid_and_not_worse_than_greedy(self):
+        orders, companies = _synthetic(600, 20)
+        greedy = dispatch.solve_greedy(orders, companies, defaultdict(DaySchedule), max_per_day=4, load_weight=0.5)
+        hungarian = dispatch.solve_hungarian(orders, companies, defaultdict(DaySchedule), max_per_day=4,
+                                             load_weight=0.5)
+        self._assert_valid(orders, hungarian, 4)
+        self.assertGreaterEqual(len(hungarian), len(greedy))
+        self.assertEqual(dispatch.solve_hungarian(orders[:1], companies, defaultdict(DaySchedule), max_per_day=0), {})
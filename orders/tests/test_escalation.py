@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from orders.escalation import escalate_bonus_pots
+from orders.models import BonusEscalation, BonusEscalationRule, InstallationOrder
+
+# фиксированный момент далеко от сегодняшнего: проверка окна должна идти от now, а не от часов сервера
+NOW = timezone.make_aware(datetime(2030, 3, 4, 6, 0))
+
+
+class EscalationTests(TestCase):
+    def setUp(self):
+        self.late = BonusEscalationRule.objects.create(
+            name="24h", hours_before_install_from=0, hours_before_install_to=24, increment_eur=Decimal("10.00"))
+        self.early = BonusEscalationRule.objects.create(
+            name="48h", hours_before_install_from=25, hours_before_install_to=48, increment_eur=Decimal("5.00"))
+
+    def _order(self, number, hours, status="open_pool"):
+        at = timezone.localtime(NOW + timedelta(hours=hours))
+        return InstallationOrder.objects.create(
+            order_number=number, customer_name="x", date=at.date(), time_from=at.time(),
+            time_to=(at + timedelta(hours=1)).time(), status=status,
+        )
+
+    def _bonus(self, order):
+        return InstallationOrder.objects.get(id=order.id).bonus_pot_eur
+
+    def test_thresholds(self):
+        soon = self._order("E-1", 5)
+        edge = self._order("E-2", 24)
+        later = self._order("E-3", 30)
+        far = self._order("E-4", 100)
+        taken = self._order("E-5", 5, status="assigned")
+        past = self._order("E-6", -2)
+
+        self.assertEqual(escalate_bonus_pots(now=NOW), {"24h": 2, "48h": 1})
+
+        self.assertEqual(self._bonus(soon), Decimal("10.00"))
+        self.assertEqual(self._bonus(edge), Decimal("10.00"))
+        self.assertEqual(self._bonus(later), Decimal("5.00"))
+        for order in (far, taken, past):
+            self.assertEqual(self._bonus(order), Decimal("0.00"))
+        self.assertEqual(BonusEscalation.objects.get(order=later).hours_to_install, 30)
+
+    def test_each_rule_raises_once(self):
+        order = self._order("E-1", 30)
+
+        escalate_bonus_pots(now=NOW)
+        self.assertEqual(escalate_bonus_pots(now=NOW + timedelta(hours=1)), {"24h": 0, "48h": 0})
+        self.assertEqual(self._bonus(order), Decimal("5.00"))
+
+        # заказ дошёл до следующего порога — срабатывает только новое правило
+        self.assertEqual(escalate_bonus_pots(now=NOW + timedelta(hours=10)), {"24h": 1, "48h": 0})
+        escalate_bonus_pots(now=NOW + timedelta(hours=11))
+        self.assertEqual(self._bonus(order), Decimal("15.00"))
+        self.assertEqual(BonusEscalation.objects.filter(order=order).count(), 2)
+
+    def test_dry_run_changes_nothing(self):
+        order = self._order("E-1", 5)
+        self.assertEqual(escalate_bonus_pots(now=NOW, dry_run=True), {"24h": 1, "48h": 0})
+        self.assertEqual(self._bonus(order), Decimal("0.00"))
+        self.assertFalse(BonusEscalation.objects.exists())
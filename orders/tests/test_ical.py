@@ -0,0 +1,36 @@
+from django.contrib.auth.models import User
+from django.core import signing
+from django.test import TestCase
+from django.urls import reverse
+
+from orders.ical import SIGN_SALT, company_id_from_token, feed_token
+from orders.models import Company
+
+
+class CalendarTokenTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="A")
+        self.user = User.objects.create_user("inst", password="pw")
+        self.company.users.add(self.user)
+
+    def test_token_resolves_company(self):
+        token = feed_token(self.company)
+        self.assertEqual(company_id_from_token(token), self.company.id)
+        self.assertEqual(self.client.get(reverse("calendar_feed", args=[token])).status_code, 200)
+
+    def test_regenerate_revokes_old_links(self):
+        old = feed_token(self.company)
+        self.client.force_login(self.user)
+
+        self.client.post(reverse("calendar_regenerate"))
+
+        self.assertIsNone(company_id_from_token(old))
+        self.assertEqual(self.client.get(reverse("calendar_feed", args=[old])).status_code, 404)
+        new = feed_token(Company.objects.get(id=self.company.id))
+        self.assertNotEqual(new, old)
+        self.assertEqual(company_id_from_token(new), self.company.id)
+
+    def test_token_without_nonce_is_rejected(self):
+        feed_token(self.company)
+        legacy = signing.Signer(salt=SIGN_SALT).sign(str(self.company.id))
+        self.assertIsNone(company_id_from_token(legacy))
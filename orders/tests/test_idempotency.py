@@ -0,0 +1,90 @@
+import json
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from orders.idempotency import HEADER, sweep_expired
+from orders.models import Company, IdempotencyKey, InstallationOrder, LedgerEntry, PenaltyRule
+from orders.services import assign_order
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="A")
+        self.user = User.objects.create_user("inst", password="x")
+        self.company.users.add(self.user)
+        self.client.force_login(self.user)
+        PenaltyRule.objects.create(name="any", hours_before_install_from=0, hours_before_install_to=10 ** 6,
+                                   penalty_eur=Decimal("50.00"))
+        self.order = InstallationOrder.objects.create(
+            order_number="I-1", customer_name="x", date=timezone.localdate() + timedelta(days=3),
+            time_from=time(8), time_to=time(9), status="inbox",
+        )
+        assign_order(self.order.id, self.company.id)
+
+    def _messages(self, response):
+        return [str(m) for m in response.context["messages"]]
+
+    def test_reject_replay_returns_first_result_without_second_penalty(self):
+        url = reverse("reject_order", args=[self.order.id])
+        first = self.client.post(url, {"reason": "krank", "idempotency_key": "k1"}, follow=True)
+        again = self.client.post(url, {"reason": "krank", "idempotency_key": "k1"}, follow=True)
+
+        self.assertEqual(self._messages(first), ["Вы отказались от заказа. Он ушёл в общий контейнер."])
+        self.assertEqual(again.redirect_chain, first.redirect_chain)
+        self.assertEqual(self._messages(again), self._messages(first))
+        self.assertEqual(LedgerEntry.objects.filter(entry_type="penalty").count(), 1)
+        self.assertEqual(Company.objects.get(id=self.company.id).balance_eur, Decimal("-50.00"))
+
+    def test_new_key_runs_the_action_again(self):
+        url = reverse("reject_order", args=[self.order.id])
+        self.client.post(url, {"idempotency_key": "k1"})
+        response = self.client.post(url, {"idempotency_key": "k2"}, follow=True)
+
+        # второй отказ — уже ошибка сервиса, а не повтор первого ответа
+        self.assertNotEqual(self._messages(response), ["Вы отказались от заказа. Он ушёл в общий контейнер."])
+        self.assertEqual(LedgerEntry.objects.filter(entry_type="penalty").count(), 1)
+
+    def test_api_batch_replay_and_pending(self):
+        url = reverse("api_batch")
+        body = json.dumps({"actions": [{"op": "status", "id": self.order.id, "status": "in_progress"}]})
+        first = self.client.post(url, body, content_type="application/json", headers={HEADER: "b1"})
+        again = self.client.post(url, body, content_type="application/json", headers={HEADER: "b1"})
+
+        self.assertEqual(first.json()["results"][0]["ok"], True)
+        self.assertEqual(again.json(), first.json())
+        self.assertEqual(InstallationOrder.objects.get(id=self.order.id).status, "in_progress")
+
+        IdempotencyKey.objects.create(user=self.user, scope="api_batch", key="b2",
+                                      expires_at=timezone.now() + timedelta(hours=1))
+        busy = self.client.post(url, body, content_type="application/json", headers={HEADER: "b2"})
+        self.assertEqual(busy.status_code, 409)
+
+    def test_long_running_request_is_not_treated_as_abandoned(self):
+        url = reverse("api_batch")
+        body = json.dumps({"actions": [{"op": "status", "id": self.order.id, "status": "in_progress"}]})
+        IdempotencyKey.objects.create(user=self.user, scope="api_batch", key="b3",
+                                      expires_at=timezone.now() + timedelta(hours=1))
+        # первый запрос всё ещё выполняется пять минут спустя
+        IdempotencyKey.objects.filter(key="b3").update(created_at=timezone.now() - timedelta(minutes=5))
+
+        busy = self.client.post(url, body, content_type="application/json", headers={HEADER: "b3"})
+        self.assertEqual(busy.status_code, 409)
+        self.assertEqual(InstallationOrder.objects.get(id=self.order.id).status, "assigned")
+
+        with self.settings(IDEMPOTENCY_PENDING_SECONDS=60):
+            retried = self.client.post(url, body, content_type="application/json", headers={HEADER: "b3"})
+        self.assertEqual(retried.json()["results"][0]["ok"], True)
+        self.assertEqual(InstallationOrder.objects.get(id=self.order.id).status, "in_progress")
+
+    def test_sweep_expired(self):
+        now = timezone.now()
+        IdempotencyKey.objects.create(user=self.user, scope="s", key="old", expires_at=now - timedelta(seconds=1))
+        IdempotencyKey.objects.create(user=self.user, scope="s", key="new", expires_at=now + timedelta(hours=1))
+
+        self.assertEqual(sweep_expired(), 1)
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["new"])
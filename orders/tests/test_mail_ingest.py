@@ -0,0 +1,101 @@
+import hashlib
+import mailbox
+import os
+import tempfile
+from email.message import EmailMessage
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from orders import mail_ingest
+from orders.mail_ingest import ingest_mailbox
+from orders.models import MailboxCheckpoint, MailboxMessage, OrderDocument
+from orders.storage import pdf_storage
+
+
+def _message(body: bytes) -> bytes:
+    msg = EmailMessage()
+    msg["Subject"] = "Auftrag"
+    msg.set_content("siehe Anhang")
+    msg.add_attachment(body, maintype="application", subtype="pdf", filename="auftrag.pdf")
+    return msg.as_bytes()
+
+
+class MaildirIngestTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.maildir = os.path.join(tmp.name, "Maildir")
+        for sub in ("cur", "new", "tmp"):
+            os.makedirs(os.path.join(self.maildir, sub))
+        media = override_settings(MEDIA_ROOT=os.path.join(tmp.name, "media"))
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def _deliver(self, name: str, body: bytes):
+        with open(os.path.join(self.maildir, "new", name), "wb") as f:
+            f.write(_message(body))
+
+    def test_key_sorting_before_watermark_is_not_skipped(self):
+        self._deliver("999999999.M1P1.host", b"%PDF-1 first")
+        self.assertEqual(ingest_mailbox(self.maildir)["pdfs"], 1)
+
+        # как строка "1000000000..." < "999999999...", но письмо новое
+        self._deliver("1000000000.M2P2.host", b"%PDF-1 second")
+        self._deliver("999999998.M3P3.host", b"%PDF-1 late")
+        stats = ingest_mailbox(self.maildir)
+
+        self.assertEqual((stats["messages"], stats["pdfs"]), (2, 2))
+        self.assertEqual(OrderDocument.objects.count(), 3)
+        self.assertEqual(MailboxMessage.objects.count(), 3)
+        self.assertEqual(ingest_mailbox(self.maildir)["messages"], 0)
+
+    def _blobs(self):
+        root = pdf_storage.path("order_pdfs")
+        return sorted(f for _, _, files in os.walk(root) for f in files)
+
+    def test_seen_keys_are_looked_up_only_for_present_messages(self):
+        self._deliver("100.M1P1.host", b"%PDF-1 a")
+        checkpoint = MailboxCheckpoint.objects.create(path=self.maildir, kind="maildir")
+        MailboxMessage.objects.bulk_create(
+            [MailboxMessage(checkpoint=checkpoint, key=f"{i}.gone.host") for i in range(50)]
+        )
+
+        with CaptureQueriesContext(connection) as ctx:
+            keys = mail_ingest._new_keys(mailbox.Maildir(self.maildir, factory=None), "maildir", checkpoint)
+
+        self.assertEqual(keys, ["100.M1P1.host"])
+        self.assertIn("100.M1P1.host", ctx.captured_queries[-1]["sql"])
+        self.assertNotIn("gone", ctx.captured_queries[-1]["sql"])
+
+    def test_concurrent_duplicate_is_skipped_per_document(self):
+        OrderDocument(source="email", file=ContentFile(b"%PDF-1 dup", name="dup.pdf"),
+                      sha256=hashlib.sha256(b"%PDF-1 dup").hexdigest()).save()
+        self._deliver("100.M1P1.host", b"%PDF-1 dup")
+        self._deliver("101.M2P2.host", b"%PDF-1 new")
+
+        # проверка дублей "не видит" документ — как если бы его закоммитили сразу после неё
+        with mock.patch.object(mail_ingest, "_known_shas", return_value=set()):
+            stats = ingest_mailbox(self.maildir)
+
+        self.assertEqual((stats["messages"], stats["pdfs"], stats["duplicates"]), (2, 1, 1))
+        self.assertEqual(OrderDocument.objects.count(), 2)
+        self.assertEqual(len(self._blobs()), 2)
+
+    def test_rollback_removes_written_blobs(self):
+        OrderDocument(source="email", file=ContentFile(b"%PDF-1 old", name="old.pdf"),
+                      sha256=hashlib.sha256(b"%PDF-1 old").hexdigest()).save()
+        self._deliver("100.M1P1.host", b"%PDF-1 new")
+        MailboxCheckpoint.objects.create(path=self.maildir, kind="maildir")
+        self.assertEqual(len(self._blobs()), 1)
+
+        with mock.patch.object(MailboxCheckpoint, "save", side_effect=RuntimeError("db down")):
+            with self.assertRaises(RuntimeError):
+                ingest_mailbox(self.maildir)
+
+        self.assertEqual(OrderDocument.objects.count(), 1)
+        self.assertEqual(self._blobs(), [hashlib.sha256(b"%PDF-1 old").hexdigest() + ".pdf"])
+        self.assertFalse(MailboxMessage.objects.exists())
@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+from datetime import date, time
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from orders.media import parse_range
+from orders.models import Company, InstallationOrder
+
+PHOTO = "order_photos/Küche 1.jpg"
+DATA = bytes(range(100))
+
+
+class ParseRangeTests(TestCase):
+    def test_forms(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))    # suffix
+        self.assertEqual(parse_range("bytes=-500", 100), (0, 99))    # suffix длиннее файла
+        self.assertEqual(parse_range("bytes=95-", 100), (95, 99))    # open-ended
+        self.assertEqual(parse_range("bytes=90-500", 100), (90, 99))
+
+    def test_unsatisfiable(self):
+        for header in ("bytes=100-", "bytes=100-200", "bytes=-0", "bytes=9-3"):
+            self.assertEqual(parse_range(header, 100), "unsatisfiable", header)
+
+    def test_ignored(self):
+        # несколько диапазонов и мусор не поддерживаем — отдаём файл целиком
+        for header in ("", "bytes=-", "bytes=0-1,5-6", "items=0-1", "bytes=a-b"):
+            self.assertIsNone(parse_range(header, 100), header)
+
+
+class ProtectedMediaTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_OFFLOAD="")
+        override.enable()
+        self.addCleanup(override.disable)
+
+        os.makedirs(os.path.join(self.media_root, "order_photos"))
+        with open(os.path.join(self.media_root, PHOTO), "wb") as f:
+            f.write(DATA)
+
+        self.company = Company.objects.create(name="A")
+        self.order = InstallationOrder.objects.create(
+            order_number="M-1", customer_name="x", date=date(2030, 1, 1),
+            time_from=time(8), time_to=time(9), current_company=self.company, status="assigned", photo=PHOTO,
+        )
+        self.user = User.objects.create_user("inst", password="x")
+        self.company.users.add(self.user)
+        self.url = reverse("protected_media", args=[PHOTO])
+
+    def _get(self, **headers):
+        self.client.force_login(self.user)
+        return self.client.get(self.url, headers=headers)
+
+    def test_full_and_ranges(self):
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), DATA)
+
+        response = self._get(Range="bytes=-10")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 90-99/100")
+        self.assertEqual(b"".join(response.streaming_content), DATA[90:])
+
+        response = self._get(Range="bytes=95-")
+        self.assertEqual(response["Content-Length"], "5")
+        self.assertEqual(b"".join(response.streaming_content), DATA[95:])
+
+    def test_unsatisfiable_is_416(self):
+        response = self._get(Range="bytes=100-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */100")
+
+    def test_multiple_ranges_return_whole_file(self):
+        response = self._get(Range="bytes=0-1,5-6")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), DATA)
+
+    def test_other_company_is_denied(self):
+        other = User.objects.create_user("other", password="x")
+        Company.objects.create(name="B").users.add(other)
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    @override_settings(MEDIA_OFFLOAD="x-accel", MEDIA_OFFLOAD_PREFIX="/protected-media/")
+    def test_offload_header_is_quoted(self):
+        response = self._get()
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/order_photos/K%C3%BCche%201.jpg")
+
+    @override_settings(MEDIA_OFFLOAD="x-sendfile")
+    def test_sendfile_header_is_quoted(self):
+        response = self._get()
+        self.assertTrue(response["X-Sendfile"].endswith("/order_photos/K%C3%BCche%201.jpg"))
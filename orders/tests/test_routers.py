@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.http import HttpResponse, JsonResponse
+from django.test import TransactionTestCase, override_settings
+from django.urls import path, reverse
+
+from core.routers import PIN_COOKIE, REPLICA, read_replica, use_replica
+
+
+def _usernames():
+    return sorted(User.objects.values_list("username", flat=True))
+
+
+@read_replica
+def replica_view(request):
+    return JsonResponse({"users": _usernames()})
+
+
+def primary_view(request):
+    return JsonResponse({"users": _usernames()})
+
+
+def write_view(request):
+    User.objects.create(username=f"new-{User.objects.count()}")
+    return HttpResponse("ok")
+
+
+urlpatterns = [
+    path("replica/", replica_view, name="test_replica_view"),
+    path("primary/", primary_view, name="test_primary_view"),
+    path("write/", write_view, name="test_write_view"),
+]
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    DATABASE_ROUTERS=["core.routers.ReplicaRouter"],
+    MIDDLEWARE=[
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "core.routers.ReplicaPinMiddleware",
+    ],
+    REPLICA_PIN_SECONDS=10,
+)
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Два sqlite: тестовая default и отдельный файл "replica" с другими данными —
+    по ответу видно, с какой БД прочитали (в обычном прогоне реплика — зеркало default).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # alias добавляем после setUpClass: test runner не создаёт для него тестовую БД,
+        # это отдельный временный файл
+        cls._tmp = tempfile.mkdtemp()
+        cls._saved = connections.settings.get(REPLICA)
+        if cls._saved is not None:
+            del connections[REPLICA]
+        connections.settings[REPLICA] = connections.configure_settings({
+            "default": connections.settings["default"],
+            REPLICA: {"ENGINE": "django.db.backends.sqlite3", "NAME": os.path.join(cls._tmp, "replica.sqlite3")},
+        })[REPLICA]
+        # схема реплики — без роутера (он разрешает migrate только на default)
+        with override_settings(DATABASE_ROUTERS=[]):
+            call_command("migrate", database=REPLICA, run_syncdb=True, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        if cls._saved is None:
+            del connections.settings[REPLICA]
+        else:
+            connections.settings[REPLICA] = cls._saved
+        shutil.rmtree(cls._tmp, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        User.objects.using(REPLICA).all().delete()
+        User.objects.create(username="primary")
+        User.objects.using(REPLICA).create(username="replica")
+
+    def test_reads_go_to_primary_by_default(self):
+        self.assertEqual(_usernames(), ["primary"])
+        self.assertEqual(self.client.get(reverse("test_primary_view")).json()["users"], ["primary"])
+
+    def test_use_replica_reads_replica_but_writes_primary(self):
+        with use_replica():
+            self.assertEqual(_usernames(), ["replica"])
+            User.objects.create(username="written")
+            with transaction.atomic():
+                # внутри транзакции — только primary
+                self.assertEqual(_usernames(), ["primary", "written"])
+        self.assertEqual(_usernames(), ["primary", "written"])
+
+    def test_read_replica_view(self):
+        response = self.client.get(reverse("test_replica_view"))
+        self.assertEqual(response.json()["users"], ["replica"])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_pins_user_to_primary(self):
+        response = self.client.post(reverse("test_write_view"))
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 10)
+
+        # cookie живёт в клиенте — следующее чтение видит свою запись
+        self.assertEqual(self.client.get(reverse("test_replica_view")).json()["users"], ["new-1", "primary"])
+
+        self.client.cookies[PIN_COOKIE] = str(int(time.time()) - 1)
+        self.assertEqual(self.client.get(reverse("test_replica_view")).json()["users"], ["replica"])
+
+    def test_broken_pin_cookie_is_ignored(self):
+        self.client.cookies[PIN_COOKIE] = "garbage"
+        self.assertEqual(self.client.get(reverse("test_replica_view")).json()["users"], ["replica"])
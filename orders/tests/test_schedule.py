@@ -0,0 +1,66 @@
+from datetime import date, time
+
+from django.test import TestCase
+
+from orders.models import Company, InstallationOrder
+from orders.schedule import DaySchedule, load_schedules
+from orders.services import assign_order, bulk_assign_orders, take_from_open_pool
+
+DAY = date(2030, 1, 1)
+
+
+class DayScheduleTests(TestCase):
+    def test_overlapping_intervals_are_merged(self):
+        sched = DaySchedule()
+        sched.add(8 * 60, 17 * 60)
+        sched.add(9 * 60, 10 * 60)
+
+        self.assertEqual((sched.starts, sched.ends), ([480], [1020]))
+        self.assertFalse(sched.is_free(11 * 60, 12 * 60))
+        self.assertTrue(sched.is_free(17 * 60, 18 * 60))
+
+    def test_add_bridges_several_intervals(self):
+        sched = DaySchedule()
+        for s, e in ((8, 9), (10, 11), (12, 13), (15, 16)):
+            sched.add(s * 60, e * 60)
+        sched.add(8 * 60 + 30, 12 * 60 + 30)
+
+        self.assertEqual(list(zip(sched.starts, sched.ends)), [(480, 780), (900, 960)])
+        self.assertTrue(sched.is_free(13 * 60, 15 * 60))
+
+
+class OverlappingOrdersTests(TestCase):
+    """У фирмы в базе два пересекающихся заказа: 8-17 и 9-10 (внесены до проверки расписания)."""
+
+    def setUp(self):
+        self.company = Company.objects.create(name="A")
+        for number, tf, tt in (("S-1", 8, 17), ("S-2", 9, 10)):
+            self._order(number, tf, tt, status="assigned", company=self.company)
+
+    def _order(self, number, tf, tt, status="inbox", company=None):
+        return InstallationOrder.objects.create(
+            order_number=number, customer_name="x", date=DAY, time_from=time(tf), time_to=time(tt),
+            status=status, current_company=company,
+        )
+
+    def test_loaded_schedule_is_busy_inside_long_order(self):
+        sched = load_schedules([self.company.id], [DAY])[(self.company.id, DAY)]
+        self.assertFalse(sched.is_free(11 * 60, 12 * 60))
+
+    def test_assign_order_refuses_slot(self):
+        order = self._order("S-3", 11, 12)
+        with self.assertRaises(ValueError):
+            assign_order(order.id, self.company.id)
+        self.assertEqual(InstallationOrder.objects.get(id=order.id).status, "inbox")
+
+    def test_take_from_open_pool_refuses_slot(self):
+        order = self._order("S-3", 11, 12, status="open_pool")
+        with self.assertRaises(ValueError):
+            take_from_open_pool(order.id, self.company.id)
+        self.assertEqual(InstallationOrder.objects.get(id=order.id).status, "open_pool")
+
+    def test_bulk_assign_skips_slot(self):
+        busy = self._order("S-3", 11, 12)
+        free = self._order("S-4", 17, 18)
+
+        self.assertEqual(bulk_assign_orders([(busy.id, self.company.id), (free.id, self.company.id)]), [free.id])
@@ -0,0 +1,47 @@
+import os
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from orders.models import Company, LedgerEntry
+from orders.statements import is_requested, load_statements, month_bounds, statements_dir
+
+
+class StatementsTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.company = Company.objects.create(name="A", balance_eur=Decimal("100.00"))
+        start, end = month_bounds(date(2030, 1, 1))
+        for created, amount in ((start, "30.00"), (end, "20.00")):
+            e = LedgerEntry.objects.create(company=self.company, entry_type="manual", amount_eur=Decimal(amount))
+            LedgerEntry.objects.filter(id=e.id).update(created_at=created)
+
+    def test_balances_reconcile_with_company_balance(self):
+        (st,) = load_statements(date(2030, 1, 1))
+        # 100 сейчас - 20 после конца месяца = 80 на конец, 80 - 30 за месяц = 50 на начало
+        self.assertEqual((st["opening"], st["closing"], st["credit"]), ("50.00", "80.00", "30.00"))
+
+    def test_view_only_queues_and_command_generates(self):
+        dispatcher = User.objects.create_superuser("root", "r@x", "pw")
+        self.client.force_login(dispatcher)
+
+        response = self.client.post(reverse("statements"), {"month": "2030-01"})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(is_requested(date(2030, 1, 1)))
+        self.assertFalse(os.path.exists(os.path.join(statements_dir(date(2030, 1, 1)), f"{self.company.id}.csv")))
+
+        call_command("generate_statements", pending=True, workers=1, stdout=open(os.devnull, "w"))
+
+        self.assertFalse(is_requested(date(2030, 1, 1)))
+        self.assertTrue(os.path.exists(os.path.join(statements_dir(date(2030, 1, 1)), f"{self.company.id}.pdf")))
@@ -0,0 +1,88 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.test import SimpleTestCase
+
+from orders.storage import ContentAddressedStorage, blob_name, sha256_from_name
+
+PDF = b"%PDF-1.4 test\n"
+SHA = hashlib.sha256(PDF).hexdigest()
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.storage = ContentAddressedStorage(location=self.root)
+
+    def _files(self):
+        return sorted(os.path.relpath(os.path.join(d, f), self.root)
+                      for d, _, files in os.walk(self.root) for f in files)
+
+    def _source(self):
+        fd, path = tempfile.mkstemp(dir=self.root, prefix="src-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(PDF)
+        return path
+
+    def test_blob_name_round_trip(self):
+        self.assertEqual(sha256_from_name(blob_name(SHA)), SHA)
+        self.assertIsNone(sha256_from_name("order_pdfs/old.pdf"))
+
+    def test_same_content_is_stored_once(self):
+        name = blob_name(SHA)
+        self.assertEqual(self.storage.save(name, ContentFile(PDF)), name)
+        self.assertEqual(self.storage.save(name, ContentFile(PDF)), name)
+
+        self.assertEqual(self._files(), [name])
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), PDF)
+
+    def test_temporary_upload_is_hardlinked(self):
+        upload = TemporaryUploadedFile("a.pdf", "application/pdf", len(PDF), None)
+        upload.write(PDF)
+        upload.flush()
+        self.addCleanup(upload.close)
+
+        name = self.storage.save(blob_name(SHA), upload)
+
+        self.assertTrue(os.path.samefile(self.storage.path(name), upload.temporary_file_path()))
+
+    def test_link_existing_dedupes(self):
+        first, second = self._source(), self._source()
+
+        self.assertEqual(self.storage.link_existing(first, SHA), blob_name(SHA))
+        self.assertEqual(self.storage.link_existing(second, SHA), blob_name(SHA))
+
+        self.assertTrue(os.path.samefile(self.storage.path_for_sha256(SHA), first))
+        self.assertEqual(self._files(), sorted([blob_name(SHA), *(os.path.basename(p) for p in (first, second))]))
+
+    def test_concurrent_writes_of_same_blob(self):
+        sources = [self._source() for _ in range(8)]
+        barrier = threading.Barrier(len(sources))
+        errors = []
+
+        def write(src):
+            barrier.wait()
+            try:
+                # обходим быстрый выход по os.path.exists — все потоки пишут одновременно
+                self.storage._link_into(src, self.storage.path_for_sha256(SHA))
+            except Exception as e:
+                errors.append(e)
+
+        os.makedirs(os.path.dirname(self.storage.path_for_sha256(SHA)))
+        threads = [threading.Thread(target=write, args=(src,)) for src in sources]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertFalse([f for f in self._files() if ".tmp-" in f])
+        with open(self.storage.path_for_sha256(SHA), "rb") as f:
+            self.assertEqual(f.read(), PDF)
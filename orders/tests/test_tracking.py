@@ -0,0 +1,66 @@
+import asyncio
+from datetime import date, time
+from unittest import mock
+
+from django.test import TestCase
+
+from orders import tracking
+from orders.models import Delivery, InstallationOrder
+
+
+class FixedCarrier(tracking.CarrierAdapter):
+    name = "test-carrier"
+
+    def __init__(self):
+        self.results = {}
+
+    def fetch(self, tracking_number):
+        return self.results.get(tracking_number)
+
+
+class SyncDeliveriesTests(TestCase):
+    def setUp(self):
+        self.carrier = FixedCarrier()
+        tracking.register(self.carrier)
+
+    def _delivery(self, number, status):
+        order = InstallationOrder.objects.create(
+            order_number=f"D-{number}", customer_name="x", date=date(2030, 1, 1),
+            time_from=time(8), time_to=time(9),
+        )
+        delivery, _ = Delivery.objects.update_or_create(
+            order=order, defaults={"status": status, "carrier": "Test-Carrier", "tracking_number": number},
+        )
+        return delivery
+
+    def test_forward_update_and_no_backward_move(self):
+        forward = self._delivery("T1", "planned")
+        backward = self._delivery("T2", "sent")
+        self.carrier.results = {
+            "T1": tracking.TrackingResult("delivered", date(2030, 1, 2)),
+            "T2": tracking.TrackingResult("planned"),
+        }
+
+        stats = tracking.sync_deliveries(concurrency=2)
+
+        self.assertEqual((stats["updated"], stats["backward"]), (1, 1))
+        forward.refresh_from_db()
+        self.assertEqual((forward.status, forward.delivered_date), ("delivered", date(2030, 1, 2)))
+        self.assertEqual(Delivery.objects.get(id=backward.id).status, "sent")
+
+    def test_manual_edit_during_sync_is_kept(self):
+        delivery = self._delivery("T1", "planned")
+        self.carrier.results = {"T1": tracking.TrackingResult("sent")}
+        real_run = asyncio.run
+
+        def run_then_edit(coro):
+            result = real_run(coro)
+            # диспетчер отметил доставку вручную, пока шёл опрос
+            Delivery.objects.filter(id=delivery.id).update(status="delivered", delivered_date=date(2030, 1, 1))
+            return result
+
+        with mock.patch.object(tracking.asyncio, "run", run_then_edit):
+            stats = tracking.sync_deliveries(concurrency=1)
+
+        self.assertEqual((stats["updated"], stats["conflicts"]), (0, 1))
+        self.assertEqual(Delivery.objects.get(id=delivery.id).status, "delivered")
@@ -0,0 +1,159 @@
+import json
+from datetime import date, time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from orders.forms import OrderCompanyUpdateForm
+from orders.models import Company, InstallationOrder, LedgerEntry, OrderAssignment, OrderStatusChange
+from orders.transitions import COMPANY, DISPATCHER, TransitionError, bulk_transition, save_company_update
+
+
+class BulkTransitionTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="A")
+        self.other = Company.objects.create(name="B")
+        self.dispatcher = User.objects.create_superuser("disp", password="x")
+
+    def _order(self, number, status="assigned", company=None, base="100.00", bonus="0.00"):
+        company = company or self.company
+        order = InstallationOrder.objects.create(
+            order_number=number, customer_name="x", date=date(2030, 1, 1),
+            time_from=time(8), time_to=time(9), current_company=company, status=status,
+            base_price_eur=Decimal(base), bonus_pot_eur=Decimal(bonus),
+        )
+        OrderAssignment.objects.create(order=order, company=company)
+        return order
+
+    def test_finish_pays_companies(self):
+        a = self._order("T-1", bonus="20.00")
+        b = self._order("T-2", status="in_progress", company=self.other, base="50.00")
+
+        done = bulk_transition([a.id, b.id], "finished", DISPATCHER, actor_user=self.dispatcher)
+
+        self.assertEqual(sorted(done), sorted([a.id, b.id]))
+        self.assertEqual(set(InstallationOrder.objects.values_list("status", flat=True)), {"finished"})
+        self.assertEqual(Company.objects.get(id=self.company.id).balance_eur, Decimal("120.00"))
+        self.assertEqual(Company.objects.get(id=self.other.id).balance_eur, Decimal("50.00"))
+        self.assertEqual(
+            sorted(LedgerEntry.objects.filter(company=self.company).values_list("entry_type", flat=True)),
+            ["base_payment", "bonus_credit"],
+        )
+        self.assertEqual(OrderStatusChange.objects.filter(to_status="finished").count(), 2)
+
+    def test_all_or_nothing(self):
+        ok = self._order("T-1")
+        foreign = self._order("T-2", company=self.other)
+
+        with self.assertRaises(TransitionError) as cm:
+            bulk_transition([ok.id, foreign.id, 999999], "finished", COMPANY, company_id=self.company.id)
+
+        self.assertEqual(set(cm.exception.errors), {foreign.id, 999999})
+        self.assertEqual(set(InstallationOrder.objects.values_list("status", flat=True)), {"assigned"})
+        self.assertFalse(LedgerEntry.objects.exists())
+        self.assertEqual(Company.objects.get(id=self.company.id).balance_eur, Decimal("0"))
+        self.assertFalse(OrderStatusChange.objects.exists())
+
+    def test_unknown_reason_category(self):
+        order = self._order("T-1")
+        with self.assertRaises(TransitionError):
+            bulk_transition([order.id], "storno", DISPATCHER, reason="x", reason_category="nope")
+        self.assertEqual(InstallationOrder.objects.get(id=order.id).status, "assigned")
+
+    def test_storno_closes_active_assignment(self):
+        order = self._order("T-1")
+
+        bulk_transition([order.id], "storno", DISPATCHER, actor_user=self.dispatcher, reason="Kunde sagt ab")
+
+        assignment = OrderAssignment.objects.get(order=order)
+        self.assertIsNotNone(assignment.unassigned_at)
+        self.assertEqual(assignment.unassign_reason, "Kunde sagt ab")
+        # фирма остаётся у заказа — рейтинг/счётчики по-прежнему её
+        self.assertEqual(InstallationOrder.objects.get(id=order.id).current_company_id, self.company.id)
+        self.assertEqual(Company.objects.get(id=self.company.id).storno_count, 1)
+
+
+class BulkStatusViewTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="A")
+        self.order = InstallationOrder.objects.create(
+            order_number="V-1", customer_name="x", date=date(2030, 1, 1),
+            time_from=time(8), time_to=time(9), current_company=self.company, status="assigned",
+        )
+        self.client.force_login(User.objects.create_superuser("disp", password="x"))
+
+    def _messages(self, response):
+        return [str(m) for m in response.context["messages"]]
+
+    def test_empty_selection_is_rejected(self):
+        url = reverse("bulk_status")
+        for data in ({"target": "storno"}, {"ids": [self.order.id]}, {"ids": [self.order.id], "target": "x"}):
+            response = self.client.post(url, {"date": "2030-01-01", **data}, follow=True)
+            self.assertEqual(self._messages(response), ["Выберите заказы и новый статус."])
+        self.assertEqual(InstallationOrder.objects.get(id=self.order.id).status, "assigned")
+
+    def test_unknown_reason_category_is_an_error_not_500(self):
+        response = self.client.post(reverse("bulk_status"), {
+            "date": "2030-01-01", "ids": [self.order.id], "target": "storno",
+            "reason": "x", "reason_category": "nope",
+        }, follow=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._messages(response), [f"#{self.order.id}: Неизвестная категория причины."])
+
+    def test_api_bulk_status(self):
+        url = reverse("api_bulk_status")
+        response = self.client.post(url, json.dumps({"ids": [self.order.id, 999999], "status": "storno",
+                                                     "reason": "x"}), content_type="application/json")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(list(response.json()["errors"]), ["999999"])
+
+        response = self.client.post(url, json.dumps({"ids": [self.order.id], "status": "storno", "reason": "x"}),
+                                    content_type="application/json")
+        self.assertEqual(response.json(), {"ids": [self.order.id]})
+        self.assertEqual(InstallationOrder.objects.get(id=self.order.id).status, "storno")
+
+    def test_api_bulk_status_rejects_non_string_reason(self):
+        url = reverse("api_bulk_status")
+        for extra in ({"reason_category": ["neutral"]}, {"reason_category": 1}, {"reason": {"x": 1}}):
+            response = self.client.post(url, json.dumps({"ids": [self.order.id], "status": "storno",
+                                                         "reason": "x", **extra}),
+                                        content_type="application/json")
+            self.assertEqual(response.status_code, 400, extra)
+            self.assertIn("должен быть строкой", response.json()["error"])
+        self.assertEqual(InstallationOrder.objects.get(id=self.order.id).status, "assigned")
+
+
+class CompanyUpdateFormTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="A")
+        self.order = InstallationOrder.objects.create(
+            order_number="F-1", customer_name="x", date=date(2030, 1, 1),
+            time_from=time(8), time_to=time(9), current_company=self.company, status="assigned",
+        )
+
+    def _form(self, data):
+        form = OrderCompanyUpdateForm(data, instance=InstallationOrder.objects.get(id=self.order.id))
+        self.assertTrue(form.is_valid(), form.errors)
+        return form
+
+    def test_reason_saved_and_status_goes_through_table(self):
+        form = self._form({"status": "in_progress", "reason_text": "Termin bestätigt"})
+        save_company_update(form, self.company.id)
+
+        order = InstallationOrder.objects.get(id=self.order.id)
+        self.assertEqual((order.status, order.reason_text), ("in_progress", "Termin bestätigt"))
+        self.assertEqual(OrderStatusChange.objects.filter(order=order, to_status="in_progress").count(), 1)
+
+    def test_stale_form_does_not_overwrite_storno(self):
+        form = self._form({"status": "assigned", "reason_text": "später"})
+        # пока форма открыта, диспетчер сторнирует заказ
+        bulk_transition([self.order.id], "storno", DISPATCHER, reason="Kunde sagt ab")
+
+        with self.assertRaises(ValueError):
+            save_company_update(form, self.company.id)
+
+        order = InstallationOrder.objects.get(id=self.order.id)
+        self.assertEqual(order.status, "storno")
+        self.assertEqual(order.reason_text, "Kunde sagt ab")
@@ -0,0 +1,128 @@
+from datetime import date, time, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from orders.models import Company, InstallationOrder, LedgerEntry, Transaction
+from orders.pagination import cursor_page
+
+
+class WalletFeedTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="A")
+        self.other = Company.objects.create(name="B")
+        LedgerEntry.objects.bulk_create(
+            [LedgerEntry(company=self.company, entry_type="manual", amount_eur=Decimal(i)) for i in range(120)]
+            + [LedgerEntry(company=self.other, entry_type="manual", amount_eur=Decimal(1)) for _ in range(5)]
+        )
+        # группы строк с одинаковым created_at — порядок держится на id
+        now = timezone.now()
+        for i, entry in enumerate(LedgerEntry.objects.order_by("id")):
+            LedgerEntry.objects.filter(id=entry.id).update(created_at=now - timedelta(minutes=i // 7))
+
+    def _walk(self, per_page=25, on_page=None):
+        qs = LedgerEntry.objects.filter(company=self.company)
+        seen, cursor, pages = [], "", 0
+        while True:
+            rows, cursor = cursor_page(qs, cursor, per_page=per_page)
+            seen += [(e.created_at, e.id) for e in rows]
+            pages += 1
+            if on_page:
+                on_page(pages)
+            if not cursor:
+                return seen
+
+    def test_pages_cover_feed_once_in_order(self):
+        seen = self._walk()
+        self.assertEqual(len(seen), 120)
+        self.assertEqual(len({pk for _, pk in seen}), 120)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_new_entries_do_not_shift_pages(self):
+        def add_entry(page):
+            LedgerEntry.objects.create(company=self.company, entry_type="manual", amount_eur=Decimal(1))
+
+        seen = self._walk(on_page=add_entry)
+        # новые строки выше курсора не попадают в уже начатый обход и не дублируют старые
+        self.assertEqual(len(seen), 120)
+        self.assertEqual(len({pk for _, pk in seen}), 120)
+
+    def test_wallet_view_shows_only_own_company(self):
+        user = User.objects.create_user("inst", password="x")
+        self.company.users.add(user)
+        self.client.force_login(user)
+
+        first = self.client.get(reverse("wallet"))
+        second = self.client.get(reverse("wallet"), {"cursor": first.context["next_cursor"]})
+
+        entries = list(first.context["entries"]) + list(second.context["entries"])
+        self.assertEqual({e.company_id for e in entries}, {self.company.id})
+        self.assertEqual(len({e.id for e in entries}), len(entries))
+
+
+class LegacyWalletCommandTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Montage Nord", balance_eur=Decimal("70.00"))
+        self.order = InstallationOrder.objects.create(
+            order_number="L-1", customer_name="x", date=date(2024, 1, 1),
+            time_from=time(8), time_to=time(9), current_company=self.company, status="finished",
+        )
+        self.day = timezone.now() - timedelta(days=300)
+        self.rows = [
+            Transaction.objects.create(type="base_payment", source="x", amount=Decimal("100.00"), order_id=self.order.id),
+            Transaction.objects.create(type="penalty", source="montage nord ", amount=Decimal("-30.00")),
+            Transaction.objects.create(type="storno", source="Unbekannt", amount=Decimal("5.00")),
+        ]
+        Transaction.objects.update(date=self.day)
+
+    def _run(self, name, *args):
+        out = StringIO()
+        call_command(name, *args, stdout=out)
+        return out.getvalue()
+
+    def test_backfill_links_by_order_then_source(self):
+        Company.objects.create(name="Dup")
+        Company.objects.create(name="dup")
+        dup = Transaction.objects.create(type="manual", source="DUP", amount=Decimal("1.00"))
+
+        self._run("backfill_transaction_company")
+
+        links = dict(Transaction.objects.values_list("id", "company_id"))
+        self.assertEqual(links, {self.rows[0].id: self.company.id, self.rows[1].id: self.company.id,
+                                 self.rows[2].id: None, dup.id: None})
+
+    def test_merge_keeps_balance_equal_to_ledger(self):
+        Transaction.objects.filter(id__in=[t.id for t in self.rows[:2]]).update(company=self.company)
+
+        self._run("merge_legacy_wallet", "--batch", "1")
+
+        self.assertFalse(Transaction.objects.filter(company__isnull=False).exists())
+        entries = LedgerEntry.objects.filter(company=self.company).order_by("id")
+        self.assertEqual([(e.entry_type, e.amount_eur, e.order_id) for e in entries],
+                         [("base_payment", Decimal("100.00"), self.order.id), ("penalty", Decimal("-30.00"), None)])
+        self.assertEqual({e.created_at for e in entries}, {self.day})
+        self.assertEqual(Company.objects.get(id=self.company.id).balance_eur, Decimal("70.00"))
+
+    def test_merge_refuses_when_balance_does_not_match(self):
+        Transaction.objects.update(company=self.company)  # 100 - 30 + 5 != 70
+
+        with self.assertRaises(CommandError):
+            self._run("merge_legacy_wallet")
+
+        self.assertEqual(Transaction.objects.filter(company__isnull=False).count(), 3)
+        self.assertFalse(LedgerEntry.objects.exists())
+
+    def test_merge_adjust_balance(self):
+        Company.objects.filter(id=self.company.id).update(balance_eur=Decimal("0"))
+        Transaction.objects.update(company=self.company)
+
+        self._run("merge_legacy_wallet", "--adjust-balance", "--batch", "2")
+
+        self.assertEqual(Company.objects.get(id=self.company.id).balance_eur, Decimal("75.00"))
+        unknown = LedgerEntry.objects.get(amount_eur=Decimal("5.00"))
+        self.assertEqual((unknown.entry_type, unknown.source, unknown.comment), ("manual", "direct", "[storno/Unbekannt]"))
@@ -0,0 +1,214 @@
+"""
+Синхронизация статусов доставки у перевозчиков.
+
+- адаптер перевозчика: CarrierAdapter.fetch(tracking_number) -> TrackingResult | None (синхронный,
+  обычно HTTP через urllib); в asyncio вызывается через to_thread
+- реестр адаптеров: Delivery.carrier (без учёта регистра) -> адаптер;
+  HTTP-перевозчики настраиваются в settings.TRACKING_CARRIERS, свои — через register()
+- sync_deliveries: все planned/sent с tracking_number, пачками по id;
+  общий лимит параллельных запросов (семафор) + лимит запросов в секунду на перевозчика;
+  изменения пишутся UPDATE-ом по строке с условием "поля не менялись с чтения"
+  (status, delivered_date, tracking_number) — ручная правка во время опроса не затирается;
+  статус назад (sent -> planned) не переводим
+"""
+import asyncio
+import json
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Delivery
+
+SYNC_STATUSES = ("planned", "sent")
+
+# статусы перевозчика -> Delivery.status
+STATUS_MAP = {
+    "planned": "planned",
+    "created": "planned",
+    "label_created": "planned",
+    "sent": "sent",
+    "in_transit": "sent",
+    "out_for_delivery": "sent",
+    "delivered": "delivered",
+    "failed": "failed",
+    "returned": "failed",
+    "lost": "failed",
+}
+# порядок статусов: перевозчик может вернуть устаревший статус — назад не переводим
+STATUS_RANK = {"planned": 0, "sent": 1, "delivered": 2, "failed": 2}
+
+
+@dataclass(frozen=True)
+class TrackingResult:
+    status: str
+    delivered_date: date | None = None
+
+
+class CarrierAdapter:
+    """Базовый адаптер. rate — запросов в секунду к этому перевозчику (0 = без лимита)."""
+
+    name = ""
+    rate = 0.0
+
+    def fetch(self, tracking_number: str) -> TrackingResult | None:
+        raise NotImplementedError
+
+
+class HttpJsonCarrier(CarrierAdapter):
+    """
+    GET url.format(tracking_number=...) -> {"status": "in_transit", "delivered_date": "YYYY-MM-DD"}.
+    404 = перевозчик номер не знает (None).
+    """
+
+    def __init__(self, name: str, url: str, rate: float = 0.0, timeout: float = 10.0):
+        self.name = name
+        self.url = url
+        self.rate = rate
+        self.timeout = timeout
+
+    def fetch(self, tracking_number):
+        url = self.url.format(tracking_number=urllib.parse.quote(tracking_number, safe=""))
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as resp:
+                payload = json.loads(resp.read())
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+        status = STATUS_MAP.get(str(payload.get("status", "")).lower())
+        if not status:
+            return None
+        delivered = payload.get("delivered_date")
+        return TrackingResult(status, date.fromisoformat(delivered) if delivered else None)
+
+
+_registry = {}
+
+
+def register(adapter: CarrierAdapter):
+    _registry[adapter.name.strip().lower()] = adapter
+
+
+def get_adapter(carrier: str) -> CarrierAdapter | None:
+    if not _registry:
+        for name, conf in settings.TRACKING_CARRIERS.items():
+            register(HttpJsonCarrier(name, conf["url"], rate=float(conf.get("rate", 0))))
+    return _registry.get((carrier or "").strip().lower())
+
+
+class RateLimiter:
+    """
+    Равномерный лимит запросов в секунду. Резервирование слота не содержит await,
+    поэтому в одном event loop lock не нужен; переживает несколько asyncio.run.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_at = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self.next_at)
+        self.next_at = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def _fetch_all(rows, limiters, concurrency: int):
+    """rows: [(delivery_id, adapter, tracking_number)] -> {delivery_id: TrackingResult | Exception | None}"""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(delivery_id, adapter, tracking_number):
+        async with sem:
+            await limiters[adapter.name].wait()
+            try:
+                return delivery_id, await asyncio.to_thread(adapter.fetch, tracking_number)
+            except Exception as e:
+                return delivery_id, e
+
+    return dict(await asyncio.gather(*(one(*r) for r in rows)))
+
+
+def sync_deliveries(concurrency: int = None, batch: int = 500, limit: int = None, log=None) -> dict:
+    """
+    Опрашивает перевозчиков по всем planned/sent доставкам. Возвращает статистику прогона.
+    log(str) — для прогресса по пачкам (management command).
+    """
+    concurrency = concurrency or settings.TRACKING_CONCURRENCY
+    qs = (Delivery.objects
+          .filter(status__in=SYNC_STATUSES, tracking_number__isnull=False)
+          .exclude(tracking_number=""))
+    limiters = {}
+    stats = {"checked": 0, "updated": 0, "no_adapter": 0, "unknown": 0, "errors": 0,
+             "backward": 0, "conflicts": 0}
+    t0 = time.perf_counter()
+    last_id = 0
+
+    while limit is None or stats["checked"] < limit:
+        size = batch if limit is None else min(batch, limit - stats["checked"])
+        chunk = list(qs.filter(id__gt=last_id).order_by("id")
+                     .values_list("id", "carrier", "tracking_number", "status", "delivered_date")[:size])
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+
+        rows = []
+        current = {}
+        for delivery_id, carrier, tracking_number, status, delivered_date in chunk:
+            adapter = get_adapter(carrier)
+            if not adapter:
+                stats["no_adapter"] += 1
+                continue
+            limiters.setdefault(adapter.name, RateLimiter(adapter.rate))
+            rows.append((delivery_id, adapter, tracking_number))
+            current[delivery_id] = (status, delivered_date, tracking_number)
+
+        results = asyncio.run(_fetch_all(rows, limiters, concurrency)) if rows else {}
+        stats["checked"] += len(chunk)
+
+        now = timezone.now()
+        changed = []
+        for delivery_id, result in results.items():
+            if isinstance(result, Exception):
+                stats["errors"] += 1
+                continue
+            if result is None:
+                stats["unknown"] += 1
+                continue
+            delivered_date = result.delivered_date
+            if result.status == "delivered" and not delivered_date:
+                delivered_date = timezone.localdate()
+            status, old_date, tracking_number = current[delivery_id]
+            if (result.status, delivered_date) == (status, old_date):
+                continue
+            if STATUS_RANK[result.status] < STATUS_RANK[status]:
+                stats["backward"] += 1
+                continue
+            changed.append((delivery_id, current[delivery_id], result.status, delivered_date))
+
+        updated = 0
+        with transaction.atomic():
+            for delivery_id, (status, old_date, tracking_number), new_status, delivered_date in changed:
+                # update() не трогает auto_now — updated_at ставим сами
+                updated += Delivery.objects.filter(
+                    id=delivery_id, status=status, delivered_date=old_date, tracking_number=tracking_number,
+                ).update(status=new_status, delivered_date=delivered_date, updated_at=now)
+        stats["updated"] += updated
+        stats["conflicts"] += len(changed) - updated
+        if log:
+            log(f"  пачка до id={last_id}: проверено {len(chunk)}, обновлено {updated}")
+
+    seconds = time.perf_counter() - t0
+    stats["seconds"] = round(seconds, 2)
+    stats["per_minute"] = round(stats["checked"] / seconds * 60) if seconds else 0
+    return stats
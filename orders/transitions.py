@@ -0,0 +1,263 @@
+"""
+Таблица переходов статуса заказа (InstallationOrder.STATUS_CHOICES).
+
+- TRANSITIONS: (из статуса, в статус) -> кто может (company / dispatcher), guard-ы, побочные эффекты
+  (оплата фирмы при finished, закрытие активного назначения при not_possible / storno)
+- bulk_transition: весь набор заказов проверяется в памяти; если хоть один не проходит —
+  ничего не меняется (TransitionError со списком ошибок). Иначе в одной транзакции:
+  один UPDATE статуса, эффекты пачкой (проводки, балансы), счётчики dashboard, рейтинг —
+  один раз на фирму, кэш фирм, аудит (OrderStatusChange) одним bulk_create
+- назначение, отказ и взятие из пула остаются в services.py (там своя логика назначений),
+  аудит они пишут через record_changes
+
+UPDATE не вызывает post_save — всё, что делают сигналы заказа, здесь делается явно.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .counters import apply_deltas, key_of, transition_deltas
+from .models import Company, InstallationOrder, LedgerEntry, OrderAssignment, OrderStatusChange
+from .signals import recalc_company
+
+COMPANY = "company"
+DISPATCHER = "dispatcher"
+REASON_STATUSES = ("not_possible", "storno")
+STATUS_LABELS = dict(InstallationOrder.STATUS_CHOICES)
+
+_ROW_FIELDS = (
+    "id", "order_number", "status", "date", "current_company_id", "taken_from_pool",
+    "base_price_eur", "bonus_pot_eur", "reason_text",
+)
+
+
+class TransitionError(ValueError):
+    """errors: {order_id: сообщение}. str() — все сообщения через пробел."""
+
+    def __init__(self, errors: dict):
+        self.errors = errors
+        super().__init__(" ".join(dict.fromkeys(errors.values())))
+
+
+@dataclass(frozen=True)
+class Context:
+    actor: str
+    company_id: int | None
+    actor_user: object
+    reason: str
+
+
+# ---------------- guards: (row, ctx) -> сообщение об ошибке или None ----------------
+
+def own_order(row, ctx):
+    if ctx.actor == COMPANY and row["current_company_id"] != ctx.company_id:
+        return "Заказ не принадлежит этой фирме."
+
+
+def has_company(row, ctx):
+    if not row["current_company_id"]:
+        return "У заказа нет фирмы."
+
+
+def has_reason(row, ctx):
+    if not (ctx.reason or (row["reason_text"] or "").strip()):
+        return "Для not_possible/storno обязательна причина."
+
+
+# ---------------- эффекты: (rows, ctx) — один вызов на весь набор ----------------
+
+def pay_companies(rows, ctx):
+    """
+    Оплата завершённых заказов: base_payment + bonus_credit (как раньше finish_order_and_pay),
+    проводки одним bulk_create, баланс — один UPDATE на фирму.
+    """
+    company_ids = sorted({r["current_company_id"] for r in rows})
+    # блокируем фирмы в порядке id (без deadlock)
+    list(Company.objects.select_for_update().filter(id__in=company_ids).order_by("id").values_list("id", flat=True))
+
+    entries = []
+    totals = {}
+    for r in rows:
+        cid = r["current_company_id"]
+        base, bonus = r["base_price_eur"], r["bonus_pot_eur"]
+        totals.setdefault(cid, Decimal("0"))
+        if base > 0:
+            totals[cid] += base
+            entries.append(LedgerEntry(
+                company_id=cid, order_id=r["id"], entry_type="base_payment",
+                source="open_pool" if r["taken_from_pool"] else "direct",
+                amount_eur=base, comment=f"Оплата за заказ {r['order_number']}",
+            ))
+        if bonus > 0:
+            totals[cid] += bonus
+            entries.append(LedgerEntry(
+                company_id=cid, order_id=r["id"], entry_type="bonus_credit", source="open_pool",
+                amount_eur=bonus, comment=f"Бонус из общего контейнера за заказ {r['order_number']}",
+            ))
+
+    LedgerEntry.objects.bulk_create(entries)
+    for cid in company_ids:
+        if totals[cid]:
+            Company.objects.filter(id=cid).update(balance_eur=F("balance_eur") + totals[cid])
+
+
+def close_assignments(rows, ctx):
+    """
+    not_possible / storno: активное назначение закрывается (слот фирмы свободен, заказ не "висит"
+    на ней). current_company остаётся — по нему считаются рейтинг и счётчики фирмы.
+    Причина — из перехода или уже записанная в заказе; один UPDATE на причину.
+    """
+    by_reason = {}
+    for r in rows:
+        reason = (ctx.reason or (r["reason_text"] or "")).strip()[:255]
+        by_reason.setdefault(reason, []).append(r["id"])
+    now = timezone.now()
+    for reason, ids in by_reason.items():
+        OrderAssignment.objects.filter(order_id__in=ids, unassigned_at__isnull=True).update(
+            unassigned_at=now, unassign_reason=reason, actor_user=ctx.actor_user,
+        )
+
+
+@dataclass(frozen=True)
+class Transition:
+    actors: tuple
+    guards: tuple = ()
+    effects: tuple = ()
+
+
+_WORK = Transition(actors=(COMPANY, DISPATCHER), guards=(own_order,))
+_FINISH = Transition(actors=(COMPANY, DISPATCHER), guards=(own_order, has_company), effects=(pay_companies,))
+_FAIL = Transition(actors=(COMPANY, DISPATCHER), guards=(own_order, has_reason), effects=(close_assignments,))
+_CANCEL = Transition(actors=(DISPATCHER,), guards=(has_reason,))
+
+TRANSITIONS = {
+    ("assigned", "in_progress"): _WORK,
+    ("in_progress", "assigned"): _WORK,
+    ("assigned", "finished"): _FINISH,
+    ("in_progress", "finished"): _FINISH,
+    ("assigned", "not_possible"): _FAIL,
+    ("in_progress", "not_possible"): _FAIL,
+    ("assigned", "storno"): _FAIL,
+    ("in_progress", "storno"): _FAIL,
+    ("not_possible", "storno"): _FAIL,
+    # отмена ещё не назначенного заказа
+    ("inbox", "storno"): _CANCEL,
+    ("open_pool", "storno"): _CANCEL,
+}
+
+
+def targets(status: str, actor: str) -> list:
+    """Куда можно перевести заказ из status (для выбора в формах)."""
+    return [to for (frm, to), t in TRANSITIONS.items() if frm == status and actor in t.actors]
+
+
+def _check(row, target: str, ctx: Context):
+    if row["status"] == target:
+        return f"Заказ уже в статусе {STATUS_LABELS.get(target, target)}."
+    t = TRANSITIONS.get((row["status"], target))
+    if not t or ctx.actor not in t.actors:
+        return f"Переход {row['status']} -> {target} недоступен."
+    for guard in t.guards:
+        error = guard(row, ctx)
+        if error:
+            return error
+    return None
+
+
+def record_changes(changes, actor_user=None, reason: str = ""):
+    """Аудит: changes = [(order_id, from_status, to_status, company_id)] — одним bulk_create."""
+    OrderStatusChange.objects.bulk_create([
+        OrderStatusChange(order_id=oid, from_status=frm, to_status=to, company_id=cid,
+                          actor_user=actor_user, reason=reason[:500])
+        for oid, frm, to, cid in changes if frm != to
+    ])
+
+
+@transaction.atomic
+def bulk_transition(order_ids, target: str, actor: str, company_id: int = None,
+                    actor_user=None, reason: str = "", reason_category: str = None) -> list:
+    """
+    Переводит все order_ids в target или ни один (TransitionError).
+    actor: "company" (тогда company_id — фирма пользователя) или "dispatcher".
+    reason/reason_category — записываются в заказ (reason_text) и в аудит.
+    Возвращает список id в порядке обработки.
+    """
+    reason = (reason or "").strip()
+    ctx = Context(actor=actor, company_id=company_id, actor_user=actor_user, reason=reason)
+    wanted = set(order_ids)
+    if not wanted:
+        return []
+    if reason_category and reason_category not in dict(InstallationOrder.REASON_CATEGORY):
+        raise TransitionError({oid: "Неизвестная категория причины." for oid in wanted})
+
+    rows = list(InstallationOrder.objects.select_for_update()
+                .filter(id__in=wanted).order_by("id").values(*_ROW_FIELDS))
+    errors = {oid: "Заказ не найден." for oid in wanted - {r["id"] for r in rows}}
+    for r in rows:
+        error = _check(r, target, ctx)
+        if error:
+            errors[r["id"]] = error
+    if errors:
+        raise TransitionError(errors)
+
+    ids = [r["id"] for r in rows]
+    changes = {"status": target, "updated_at": timezone.now()}
+    if reason and target in REASON_STATUSES:
+        changes["reason_text"] = reason
+    if reason_category:
+        changes["reason_category"] = reason_category
+    InstallationOrder.objects.filter(id__in=ids).update(**changes)
+
+    # эффекты — по одному вызову на тип перехода
+    by_transition = {}
+    for r in rows:
+        by_transition.setdefault(TRANSITIONS[(r["status"], target)], []).append(r)
+    for t, group in by_transition.items():
+        for effect in t.effects:
+            effect(group, ctx)
+
+    apply_deltas(transition_deltas(
+        (key_of(r["date"], r["current_company_id"], r["status"]),
+         key_of(r["date"], r["current_company_id"], target))
+        for r in rows
+    ))
+    company_ids = sorted({r["current_company_id"] for r in rows if r["current_company_id"]})
+    for cid in company_ids:
+        recalc_company(cid)
+    record_changes(
+        [(r["id"], r["status"], target, r["current_company_id"]) for r in rows],
+        actor_user=actor_user, reason=reason,
+    )
+    return ids
+
+
+def transition(order_id: int, target: str, actor: str, company_id: int = None, actor_user=None,
+               reason: str = "", reason_category: str = None):
+    """Один заказ; ошибка — ValueError с одним сообщением."""
+    bulk_transition([order_id], target, actor, company_id=company_id, actor_user=actor_user,
+                    reason=reason, reason_category=reason_category)
+
+
+@transaction.atomic
+def save_company_update(form, company_id: int, actor_user=None):
+    """
+    OrderCompanyUpdateForm: причина/фото сохраняются формой, смена статуса — только через таблицу.
+    Строку блокируем до записи: если статус успели сменить (диспетчер сторнировал),
+    форма устарела — ничего не пишем. Поле status формой не сохраняется никогда.
+    """
+    order = form.instance
+    target = form.cleaned_data["status"]
+    locked = InstallationOrder.objects.select_for_update().only("status", "current_company_id").get(pk=order.pk)
+    if locked.status != form.current_status or locked.current_company_id != company_id:
+        raise ValueError("Заказ изменился, пока форма была открыта. Обновите страницу.")
+    fields = [f for f in form.changed_data if f != "status"]
+    if fields:
+        form.save(commit=False)
+        order.status = locked.status
+        order.save(update_fields=[*fields, "updated_at"])
+    if target != form.current_status:
+        transition(order.pk, target, COMPANY, company_id=company_id, actor_user=actor_user)
+    order.status = target
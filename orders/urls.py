@@ -1,19 +1,65 @@
 from django.urls import path
-from django.contrib.auth import views as auth_views
-from . import views
+from . import views, api
 
 urlpatterns = [
-    path("", views.wallet_view, name="wallet"),
+    path("", views.home, name="home"),
 
-    # login без слэша
-    path("login", auth_views.LoginView.as_view(
-        template_name="registration/login.html"
-    ), name="login_no_slash"),
+    path("login/", views.user_login, name="login"),
+    path("logout/", views.user_logout, name="logout"),
 
-    # login со слэшем
-    path("login/", auth_views.LoginView.as_view(
-        template_name="registration/login.html"
-    ), name="login"),
+    path("orders/", views.order_list, name="order_list"),
+    path("orders/<int:pk>/", views.order_detail, name="order_detail"),
+    path("orders/<int:pk>/edit-company/", views.order_edit_company, name="order_edit_company"),
 
-    path("logout/", auth_views.LogoutView.as_view(next_page="/login/"), name="logout"),
+    path("pool/", views.pool, name="pool"),
+    path("pool/<int:pk>/take/", views.pool_take, name="pool_take"),
+
+    path("my-orders/", views.my_orders, name="my_orders"),
+    path("orders/<int:pk>/reject/", views.reject_order, name="reject_order"),
+    path("orders/<int:pk>/finish/", views.finish_order, name="finish_order"),
+
+    path("schedule/", views.company_schedule, name="company_schedule"),
+    path("calendar/<str:token>.ics", views.calendar_feed, name="calendar_feed"),
+    path("calendar/regenerate/", views.calendar_regenerate, name="calendar_regenerate"),
+
+    path("wallet/", views.wallet, name="wallet"),
+
+    path("deliveries/", views.delivery_list, name="delivery_list"),
+    path("orders/<int:order_pk>/delivery/", views.delivery_edit, name="delivery_edit"),
+
+    path("dashboard/", views.dashboard, name="dashboard"),
+    path("statements/", views.statements, name="statements"),
+    path("orders/bulk-status/", views.bulk_status, name="bulk_status"),
+
+    path("companies/ratings/", views.company_ratings, name="company_ratings"),
+
+    # PDF Inbox
+    path("pdf-inbox/", views.pdf_inbox, name="pdf_inbox"),
+    path("pdf-upload/", views.pdf_upload, name="pdf_upload"),
+    path("pdf-inbox/<int:doc_id>/create-order/", views.pdf_create_order, name="pdf_create_order"),
+
+    # Архив (только чтение)
+    path("archive/", views.archive_list, name="archive_list"),
+    path("archive/<int:pk>/", views.archive_detail, name="archive_detail"),
+
+    # Защищённые медиа-файлы (PDF, фото) с проверкой доступа
+    path("media/<path:path>", views.protected_media, name="protected_media"),
+
+    # Статистика соединений с БД (dispatcher)
+    path("ops/db-stats/", views.db_stats, name="db_stats"),
+
+    # Профили запросов (dispatcher)
+    path("ops/profiles/", views.profiles, name="profiles"),
+    path("ops/profiles/<str:profile_id>/", views.profile_detail, name="profile_detail"),
+    path("ops/profiles/<str:profile_id>/download/", views.profile_download, name="profile_download"),
+
+    # Email Inbox (manage.py ingest_mail)
+    path("inbox/", views.inbox, name="inbox"),
+
+    # JSON API для мобильного приложения (api.py)
+    path("api/v1/login/", api.api_login, name="api_login"),
+    path("api/v1/my-orders/", api.my_orders, name="api_my_orders"),
+    path("api/v1/pool/", api.pool, name="api_pool"),
+    path("api/v1/orders/batch/", api.batch, name="api_batch"),
+    path("api/v1/orders/bulk-status/", api.bulk_status, name="api_bulk_status"),
 ]
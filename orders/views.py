@@ -1,36 +1,728 @@
+import json
+import os
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import render, redirect
-from .models import Company, Transaction
+from django.core.exceptions import PermissionDenied
+from django.db import connection
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import condition, require_POST
+from django.db.models import Q
+
+from .models import (
+    InstallationOrder, Company, LedgerEntry, Delivery, OrderDocument, ArchivedRecord, MailboxCheckpoint,
+    CompanyRatingSnapshot,
+)
+from .permissions import is_dispatcher, user_company, can_view_order
+from .forms import OrderCreateForm, OrderCompanyUpdateForm, DeliveryForm, PdfUploadForm
+from .services import assign_order, take_from_open_pool, company_reject_order, finish_order_and_pay
+from .media import media_response
+from .storage import sha256_from_name
+from .schedule import free_slots
+from .counters import dashboard_counts
+from .ical import feed_token, rotate_nonce, company_id_from_token, feed_state, build_feed
+from .pagination import cursor_page
+from .idempotency import idempotent, new_key
+from .statements import is_requested, request_statements, statements_dir
+from .transitions import (
+    DISPATCHER, STATUS_LABELS, TransitionError, bulk_transition, save_company_update, targets,
+)
+from core.routers import read_replica
+from core import dbstats
+from core import profiling
+
+
+def home(request):
+    return redirect("order_list")
+
+
+def user_login(request):
+    if request.user.is_authenticated:
+        return redirect("order_list")
+
+    if request.method == "POST":
+        u = request.POST.get("username", "").strip()
+        p = request.POST.get("password", "").strip()
+        user = authenticate(request, username=u, password=p)
+        if user:
+            login(request, user)
+            return redirect("order_list")
+        messages.error(request, "Неверный логин или пароль.")
+
+    return render(request, "orders/login.html")
+
+
+def user_logout(request):
+    logout(request)
+    return redirect("login")
+
+
+@login_required
+@read_replica
+def order_list(request):
+    """
+    Dispatcher видит все заказы.
+    Фирма видит только свои.
+    """
+    qs = InstallationOrder.objects.select_related("current_company").order_by("-created_at")
+
+    if not is_dispatcher(request.user):
+        c = user_company(request.user)
+        qs = qs.filter(current_company=c) if c else qs.none()
+
+    q = request.GET.get("q", "").strip()
+    status = request.GET.get("status", "").strip()
+    try:
+        date_from = timezone.datetime.strptime(request.GET.get("date_from", ""), "%Y-%m-%d").date()
+    except ValueError:
+        date_from = None
+
+    if q:
+        qs = qs.filter(Q(order_number__icontains=q) | Q(customer_name__icontains=q))
+    if status:
+        qs = qs.filter(status=status)
+    if date_from:
+        # ссылка "на проверку" с dashboard
+        qs = qs.filter(date__gte=date_from)
+
+    return render(request, "orders/order_list.html", {
+        "orders": qs[:300],
+        "q": q,
+        "status": status,
+        "status_choices": InstallationOrder.STATUS_CHOICES,
+        "is_dispatcher": is_dispatcher(request.user),
+    })
 
 
 @login_required
-def wallet_view(request):
+def order_detail(request, pk):
     """
-    Фирма видит только СВОЙ кошелёк.
-    Определяем фирму по связи Company.users <-> request.user
+    Карточка заказа. Фирма должна видеть PDF и фото.
     """
-    company = Company.objects.filter(users=request.user).first()
+    order = get_object_or_404(InstallationOrder.objects.select_related("current_company"), pk=pk)
+
+    if not can_view_order(request.user, order):
+        messages.error(request, "Нет доступа к этому заказу.")
+        return redirect("my_orders")
+
+    return render(request, "orders/order_detail.html", {
+        "order": order,
+        "is_dispatcher": is_dispatcher(request.user),
+        "company": user_company(request.user),
+        "idempotency_key": new_key(),
+    })
+
+
+@login_required
+def order_edit_company(request, pk):
+    """
+    Форма для фирмы: обновить статус, причину, фото.
+    """
+    order = get_object_or_404(InstallationOrder, pk=pk)
+    c = user_company(request.user)
+    if not c or order.current_company_id != c.id:
+        messages.error(request, "Нет доступа.")
+        return redirect("my_orders")
+
+    if request.method == "POST":
+        form = OrderCompanyUpdateForm(request.POST, request.FILES, instance=order)
+        if form.is_valid():
+            try:
+                save_company_update(form, c.id, actor_user=request.user)
+                messages.success(request, "Обновлено.")
+                return redirect("order_detail", pk=order.pk)
+            except ValueError as e:
+                form.add_error(None, str(e))
+    else:
+        form = OrderCompanyUpdateForm(instance=order)
+
+    return render(request, "orders/order_form.html", {"form": form, "order": order})
+
+
+# ---------------- PDF INBOX ----------------
+
+@login_required
+def pdf_inbox(request):
+    """
+    Контейнер новых PDF заказов.
+    Доступ: только dispatcher.
+    """
+    if not is_dispatcher(request.user):
+        return redirect("my_orders")
+
+    docs = OrderDocument.objects.filter(status="new").order_by("-created_at")[:300]
+    return render(request, "orders/pdf_inbox.html", {"docs": docs})
+
+
+@login_required
+def pdf_upload(request):
+    """
+    Загрузка PDF заказа в контейнер.
+    Дубликаты отсеиваются по sha256 (unique).
+    Доступ: только dispatcher.
+    """
+    if not is_dispatcher(request.user):
+        return redirect("my_orders")
+
+    if request.method == "POST":
+        form = PdfUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                form.save()
+                messages.success(request, "PDF загружен в контейнер.")
+                return redirect("pdf_inbox")
+            except Exception as e:
+                messages.error(request, f"Не удалось сохранить PDF (возможно дубль): {e}")
+    else:
+        form = PdfUploadForm()
+
+    return render(request, "orders/pdf_upload.html", {"form": form})
+
+
+@login_required
+def pdf_create_order(request, doc_id):
+    """
+    Создание InstallationOrder из PDF (пока вручную).
+    После создания связываем PDF с заказом и убираем из контейнера.
+    """
+    if not is_dispatcher(request.user):
+        return redirect("my_orders")
+
+    doc = get_object_or_404(OrderDocument, pk=doc_id, status="new")
+
+    if request.method == "POST":
+        form = OrderCreateForm(request.POST)
+        if form.is_valid():
+            order = form.save(commit=False)
+            order.status = "inbox"
+            order.created_by = request.user
+            order.save()
 
-    # Если пользователь ни к какой фирме не привязан
-    if not company:
-        # Админ может управлять фирмами через /admin/
-        if request.user.is_superuser:
-            return redirect("/admin/")
-        # Обычному пользователю покажем простое сообщение
-        return render(request, "orders/wallet.html", {
-            "company": None,
-            "balance": 0,
-            "transactions": [],
-            "message": "Ваша учетная запись не привязана ни к одной фирме. Обратитесь к администратору."
+            doc.order = order
+            doc.status = "linked"
+            doc.save(update_fields=["order", "status"])
+
+            messages.success(request, "Заказ создан и PDF привязан.")
+            return redirect("order_detail", pk=order.id)
+    else:
+        form = OrderCreateForm(initial={
+            "order_number": f"PDF-{doc.id}",
+            "customer_name": "Импорт из PDF",
+            "base_price_eur": 100,
         })
 
-    # Транзакции (пока без привязки к компании в модели Transaction — показываем все)
-    # Если позже добавим ForeignKey на Company, тут легко отфильтруем.
-    transactions = Transaction.objects.all().order_by("-date")[:200]
+    return render(request, "orders/pdf_create_order.html", {"doc": doc, "form": form})
+
+
+# ---------------- POOL / MY ORDERS / WALLET ----------------
+
+@login_required
+def pool(request):
+    """
+    Общий контейнер. Любая фирма может взять заказ.
+    """
+    c = user_company(request.user)
+    if not c:
+        messages.error(request, "Вы не привязаны к фирме.")
+        return redirect("order_list")
+
+    qs = InstallationOrder.objects.filter(status="open_pool").order_by("date", "time_from")[:300]
+    # один ключ на показ страницы: scope включает id заказа, так что ссылки не пересекаются
+    return render(request, "orders/pool.html", {"orders": qs, "company": c, "idempotency_key": new_key()})
+
+
+@login_required
+@idempotent("pool_take")
+def pool_take(request, pk):
+    c = user_company(request.user)
+    if not c:
+        return redirect("pool")
+    try:
+        take_from_open_pool(pk, c.id, actor_user=request.user)
+        messages.success(request, "Вы взяли заказ.")
+    except Exception as e:
+        messages.error(request, str(e))
+    return redirect("my_orders")
+
+
+@login_required
+def my_orders(request):
+    """
+    Заказы текущей фирмы.
+    """
+    c = user_company(request.user)
+    if not c:
+        messages.error(request, "Вы не привязаны к фирме.")
+        return redirect("order_list")
+
+    qs = InstallationOrder.objects.filter(current_company=c).order_by("date", "time_from")[:300]
+    ical_url = request.build_absolute_uri(reverse("calendar_feed", args=[feed_token(c)]))
+    return render(request, "orders/my_orders.html", {"orders": qs, "company": c, "ical_url": ical_url})
+
+
+@login_required
+@require_POST
+def calendar_regenerate(request):
+    """
+    Новая ссылка на календарь фирмы; старые ссылки (у всех сотрудников) перестают работать.
+    """
+    c = user_company(request.user)
+    if not c:
+        return redirect("order_list")
+    # c может быть из кэша user_company — меняем nonce у свежей записи
+    rotate_nonce(Company.objects.get(id=c.id))
+    messages.success(request, "Ссылка на календарь обновлена. Старые ссылки больше не работают.")
+    return redirect("my_orders")
+
+
+def _calendar_state(request, token):
+    """(company_id, состояние фида) — один агрегат на запрос для ETag и Last-Modified."""
+    if not hasattr(request, "_calendar_state"):
+        company_id = company_id_from_token(token)
+        request._calendar_state = (company_id, feed_state(company_id) if company_id else None)
+    return request._calendar_state
+
+
+def _calendar_etag(request, token):
+    company_id, state = _calendar_state(request, token)
+    if not state:
+        return None
+    count, last = state
+    return f"{company_id}-{count}-{last.timestamp() if last else 0}"
+
+
+def _calendar_last_modified(request, token):
+    _, state = _calendar_state(request, token)
+    return state[1] if state else None
+
+
+@condition(etag_func=_calendar_etag, last_modified_func=_calendar_last_modified)
+def calendar_feed(request, token):
+    """
+    .ics-фид заказов фирмы для календаря (ссылка на странице "Мои заказы").
+    Доступ по подписанной ссылке, без логина; 304 если ничего не менялось (ical.py).
+    """
+    company_id, state = _calendar_state(request, token)
+    if not company_id:
+        raise Http404
+    response = HttpResponse(build_feed(company_id, state), content_type="text/calendar; charset=utf-8")
+    response["Content-Disposition"] = 'inline; filename="orders.ics"'
+    response["Cache-Control"] = "private, max-age=300"
+    return response
+
+
+@login_required
+@idempotent("reject_order")
+def reject_order(request, pk):
+    """
+    Отказ фирмы -> штраф -> заказ уходит в open_pool.
+    """
+    c = user_company(request.user)
+    if not c:
+        return redirect("my_orders")
+
+    reason = (request.POST.get("reason", "") or "").strip()[:200]
+    if not reason:
+        reason = "No reason"
+
+    try:
+        company_reject_order(pk, c.id, reason=reason, actor_user=request.user)
+        messages.success(request, "Вы отказались от заказа. Он ушёл в общий контейнер.")
+    except Exception as e:
+        messages.error(request, str(e))
+    return redirect("my_orders")
+
+
+@login_required
+@idempotent("finish_order")
+def finish_order(request, pk):
+    """
+    Завершение заказа -> начисление base + bonus.
+    """
+    c = user_company(request.user)
+    if not c:
+        return redirect("my_orders")
+    try:
+        finish_order_and_pay(pk, c.id, actor_user=request.user)
+        messages.success(request, "Заказ завершён. Оплата/бонус начислены в кошелёк.")
+    except Exception as e:
+        messages.error(request, str(e))
+    return redirect("order_detail", pk=pk)
+
+
+@login_required
+def company_schedule(request):
+    """
+    Свободные окна фирмы на 7 дней вперёд.
+    Фирма видит своё расписание, dispatcher — любой фирмы (?company=<id>).
+    """
+    if is_dispatcher(request.user) and request.GET.get("company"):
+        c = get_object_or_404(Company, pk=request.GET["company"])
+    else:
+        c = user_company(request.user)
+    if not c:
+        messages.error(request, "Вы не привязаны к фирме.")
+        return redirect("order_list")
+
+    return render(request, "orders/schedule.html", {
+        "company": c,
+        "days": free_slots(c.id, timezone.localdate()),
+    })
+
+
+@login_required
+def wallet(request):
+    """
+    Кошелёк фирмы: баланс и операции.
+    """
+    c = user_company(request.user)
+    if not c:
+        messages.error(request, "Вы не привязаны к фирме.")
+        return redirect("order_list")
+
+    entries, next_cursor = cursor_page(
+        LedgerEntry.objects.filter(company=c).select_related("order"), request.GET.get("cursor", "")
+    )
+    return render(request, "orders/wallet.html", {"company": c, "entries": entries, "next_cursor": next_cursor})
+
+
+# ---------------- DELIVERY ----------------
+
+@login_required
+def delivery_list(request):
+    qs = Delivery.objects.select_related("order", "order__current_company").order_by("-updated_at")[:300]
+    if not is_dispatcher(request.user):
+        c = user_company(request.user)
+        qs = qs.filter(order__current_company=c) if c else qs.none()
+    return render(request, "orders/delivery_list.html", {"deliveries": qs})
+
+
+@login_required
+def delivery_edit(request, order_pk):
+    order = get_object_or_404(InstallationOrder, pk=order_pk)
+    if not is_dispatcher(request.user):
+        c = user_company(request.user)
+        if not c or order.current_company_id != c.id:
+            messages.error(request, "Нет доступа.")
+            return redirect("my_orders")
+
+    delivery = getattr(order, "delivery", None)
+    if not delivery:
+        Delivery.objects.create(order=order)
+        delivery = order.delivery
+
+    if request.method == "POST":
+        form = DeliveryForm(request.POST, instance=delivery)
+        if form.is_valid():
+            form.save()
+            messages.success(request, "Доставка обновлена.")
+            return redirect("order_detail", pk=order.pk)
+    else:
+        form = DeliveryForm(instance=delivery)
+
+    return render(request, "orders/delivery_form.html", {"order": order, "form": form})
+
+
+@login_required
+@read_replica
+def company_ratings(request):
+    """
+    Рейтинг фирм по всей истории, включая архив (manage.py compute_ratings -> CompanyRatingSnapshot).
+    Страница только читает снимки: полный пересчёт идёт по cron, не в запросе.
+    ?company=<id> — понедельная динамика фирмы.
+    """
+    snapshots = CompanyRatingSnapshot.objects.all()
+    totals = (snapshots
+              .filter(week_start__isnull=True)
+              .select_related("company")
+              .order_by("-rating", "company__name"))
+
+    selected = None
+    weeks = []
+    if request.GET.get("company"):
+        selected = get_object_or_404(Company, pk=request.GET["company"])
+        weeks = (snapshots
+                 .filter(company=selected, week_start__isnull=False)
+                 .order_by("-week_start")[:26])
+
+    return render(request, "orders/company_ratings.html", {
+        "snapshots": totals,
+        "selected": selected,
+        "weeks": weeks,
+    })
+
+
+# ---------------- ARCHIVE (только чтение) ----------------
+
+@login_required
+@read_replica
+def archive_list(request):
+    """
+    Архив закрытых заказов, назначений и проводок.
+    Доступ: только dispatcher.
+    """
+    if not is_dispatcher(request.user):
+        return redirect("my_orders")
+
+    qs = ArchivedRecord.objects.defer("data").order_by("-record_date")
+
+    q = request.GET.get("q", "").strip()
+    kind = request.GET.get("kind", "").strip()
+    if q:
+        qs = qs.filter(order_number=q)
+    if kind:
+        qs = qs.filter(kind=kind)
+
+    return render(request, "orders/archive_list.html", {
+        "records": qs[:300],
+        "q": q,
+        "kind": kind,
+        "kind_choices": ArchivedRecord.KIND,
+    })
+
+
+@login_required
+def archive_detail(request, pk):
+    if not is_dispatcher(request.user):
+        return redirect("my_orders")
+    record = get_object_or_404(ArchivedRecord, pk=pk)
+    return render(request, "orders/archive_detail.html", {
+        "record": record,
+        "data_json": json.dumps(record.data, ensure_ascii=False, indent=2),
+    })
+
+
+# ---------------- MEDIA (PDF / фото) ----------------
+
+@login_required
+def protected_media(request, path):
+    """
+    Отдача файлов из MEDIA_ROOT с теми же правами, что и order_detail.
+    PDF без заказа (ещё в PDF Inbox) видит только dispatcher.
+    """
+    if path.startswith("order_pdfs/"):
+        sha = sha256_from_name(path)
+        docs = OrderDocument.objects.select_related("order")
+        # новые PDF ищем по sha256 (unique index), старые — по имени файла
+        doc = docs.filter(sha256=sha).first() if sha else docs.filter(file=path).first()
+        if not doc:
+            raise Http404("Файл не найден.")
+        allowed = is_dispatcher(request.user) if doc.order is None else can_view_order(request.user, doc.order)
+    elif path.startswith("order_photos/"):
+        order = InstallationOrder.objects.filter(photo=path).first()
+        if not order:
+            raise Http404("Файл не найден.")
+        allowed = can_view_order(request.user, order)
+    else:
+        allowed = is_dispatcher(request.user)
+
+    if not allowed:
+        raise PermissionDenied("Нет доступа к этому файлу.")
+    return media_response(request, path)
+
+
+# ---------------- DASHBOARD ----------------
+
+@login_required
+def dashboard(request):
+    """
+    Dashboard диспетчера: inbox, open pool, просроченные, not_possible на проверку,
+    разбивка по фирмам и по дням. Читает только OrderStatusCounter (counters.py),
+    поэтому не зависит от числа заказов.
+    Доступ: только dispatcher.
+    """
+    if not is_dispatcher(request.user):
+        return redirect("my_orders")
+
+    data = dashboard_counts()
+    statuses = [code for code, _ in InstallationOrder.STATUS_CHOICES]
+    return render(request, "orders/dashboard.html", {
+        "data": data,
+        "status_labels": [label for _, label in InstallationOrder.STATUS_CHOICES],
+        "companies": [
+            (cid, name, [counts.get(st, 0) for st in statuses])
+            for (cid, name), counts in data["by_company"].items()
+        ],
+        "days": [
+            (d, [counts.get(st, 0) for st in statuses])
+            for d, counts in data["by_day"].items()
+        ],
+    })
+
+
+# ---------------- BULK STATUS ----------------
+
+def _bulk_day(value: str):
+    try:
+        return timezone.datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return timezone.localdate()
+
+
+@login_required
+@idempotent("bulk_status")
+def bulk_status(request):
+    """
+    Массовая смена статуса заказов дня (закрыть storno / not_possible и т.п.).
+    Через transitions.bulk_transition: или все выбранные заказы, или ни одного (ошибки — по заказам).
+    Доступ: только dispatcher.
+    """
+    if not is_dispatcher(request.user):
+        return redirect("my_orders")
+
+    day = _bulk_day(request.POST.get("date") or request.GET.get("date"))
+    if request.method == "POST":
+        ids = [int(x) for x in request.POST.getlist("ids") if x.isdigit()]
+        target = request.POST.get("target", "")
+        if not ids or target not in STATUS_LABELS:
+            messages.error(request, "Выберите заказы и новый статус.")
+            return redirect(f"{reverse('bulk_status')}?date={day:%Y-%m-%d}")
+        try:
+            done = bulk_transition(
+                ids, target, DISPATCHER, actor_user=request.user,
+                reason=request.POST.get("reason", "").strip()[:500],
+                reason_category=request.POST.get("reason_category") or None,
+            )
+            messages.success(request, f"Статус {STATUS_LABELS[target]}: {len(done)} заказов.")
+        except TransitionError as e:
+            for oid, error in sorted(e.errors.items())[:20]:
+                messages.error(request, f"#{oid}: {error}")
+        return redirect(f"{reverse('bulk_status')}?date={day:%Y-%m-%d}")
+
+    # только заказы, которые диспетчер может куда-то перевести
+    open_statuses = {code for code, _ in InstallationOrder.STATUS_CHOICES if targets(code, DISPATCHER)}
+    orders = (InstallationOrder.objects.select_related("current_company")
+              .filter(date=day, status__in=open_statuses).order_by("time_from", "id"))
+    available = {to for st in {o.status for o in orders} for to in targets(st, DISPATCHER)}
+    return render(request, "orders/bulk_status.html", {
+        "day": day,
+        "orders": orders,
+        "targets": [(code, label) for code, label in InstallationOrder.STATUS_CHOICES if code in available],
+        "reason_categories": InstallationOrder.REASON_CATEGORY,
+        "idempotency_key": new_key(),
+    })
+
+
+# ---------------- STATEMENTS ----------------
+
+def _statement_month(value: str):
+    """YYYY-MM -> первое число месяца; пусто/ошибка -> прошлый месяц."""
+    try:
+        year, month = (int(x) for x in value.split("-"))
+        return timezone.datetime(year, month, 1).date()
+    except (ValueError, AttributeError):
+        today = timezone.localdate()
+        return timezone.datetime(today.year - (today.month == 1), (today.month - 2) % 12 + 1, 1).date()
+
+
+@login_required
+def statements(request):
+    """
+    Месячные выписки фирм (statements.py): GET — список файлов, POST — поставить месяц в очередь.
+    Сами выписки формирует manage.py generate_statements --pending (cron), не worker gunicorn.
+    Доступ: только dispatcher.
+    """
+    if not is_dispatcher(request.user):
+        return redirect("my_orders")
+
+    month = _statement_month(request.POST.get("month") or request.GET.get("month", ""))
+    if request.method == "POST":
+        request_statements(month)
+        messages.success(request, f"Выписки за {month:%Y-%m} поставлены в очередь, появятся после ближайшего запуска.")
+        return redirect(f"{reverse('statements')}?month={month:%Y-%m}")
+
+    directory = statements_dir(month)
+    files = set(os.listdir(directory)) if os.path.isdir(directory) else set()
+    rows = [
+        (c, f"statements/{month:%Y-%m}/{c.id}.csv" if f"{c.id}.csv" in files else None,
+         f"statements/{month:%Y-%m}/{c.id}.pdf" if f"{c.id}.pdf" in files else None)
+        for c in Company.objects.order_by("name")
+    ]
+    return render(request, "orders/statements.html", {"month": month, "rows": rows, "requested": is_requested(month)})
+
+
+# ---------------- OPS ----------------
+
+@login_required
+def db_stats(request):
+    """
+    Статистика соединений с БД текущего процесса (gunicorn worker):
+    reuse rate, время подключения, лимит соединений на сервере.
+    Доступ: только dispatcher.
+    """
+    if not is_dispatcher(request.user):
+        return redirect("my_orders")
+
+    data = dbstats.snapshot()
+    data["conn_max_age"] = connection.settings_dict.get("CONN_MAX_AGE")
+    data["pool"] = bool(connection.settings_dict.get("OPTIONS", {}).get("pool"))
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cur:
+            cur.execute("SHOW max_connections")
+            data["server_max_connections"] = int(cur.fetchone()[0])
+            cur.execute("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()")
+            data["server_open_connections"] = cur.fetchone()[0]
+    return JsonResponse(data)
+
+
+@login_required
+def profiles(request):
+    """
+    Профили запросов (core/profiling.py): X-Profile: 1 / ?_profile=1 или выборка PROFILE_SAMPLE_RATE.
+    Доступ: только dispatcher.
+    """
+    if not is_dispatcher(request.user):
+        return redirect("my_orders")
+    return render(request, "orders/profiles.html", {
+        "profiles": profiling.list_profiles(),
+        "ring_size": settings.PROFILE_RING_SIZE,
+    })
+
+
+@login_required
+def profile_detail(request, profile_id):
+    """Топ функций (pstats) и SQL timeline одного профиля. ?sort=tottime|cumulative|calls"""
+    if not is_dispatcher(request.user):
+        return redirect("my_orders")
+
+    sort = request.GET.get("sort", "cumulative")
+    if sort not in ("cumulative", "tottime", "calls"):
+        sort = "cumulative"
+    loaded = profiling.load_profile(profile_id, sort=sort)
+    if not loaded:
+        raise Http404
+    meta, stats_text = loaded
+    return render(request, "orders/profile_detail.html", {"meta": meta, "stats_text": stats_text, "sort": sort})
+
+
+@login_required
+def profile_download(request, profile_id):
+    """.prof для snakeviz / python -m pstats."""
+    if not is_dispatcher(request.user):
+        return redirect("my_orders")
+    path = profiling.profile_path(profile_id, ".prof")
+    if not path:
+        raise Http404
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=f"{profile_id}.prof")
+
+
+# ---------------- EMAIL INBOX ----------------
+
+@login_required
+def inbox(request):
+    """
+    Email Inbox: состояние ingestion (manage.py ingest_mail) и последние PDF из почты.
+    Сами PDF попадают в PDF Inbox.
+    """
+    if not is_dispatcher(request.user):
+        return redirect("my_orders")
 
-    return render(request, "orders/wallet.html", {
-        "company": company,
-        "balance": company.balance_eur,
-        "transactions": transactions,
-        "message": ""
+    return render(request, "orders/inbox.html", {
+        "checkpoints": MailboxCheckpoint.objects.order_by("path"),
+        "docs": OrderDocument.objects.filter(source="email").order_by("-created_at")[:50],
     })